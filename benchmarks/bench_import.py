@@ -0,0 +1,61 @@
+"""Time `import cta` in fresh interpreters.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_import
+
+"""
+
+import subprocess
+
+import statistics
+
+import sys
+
+STATEMENTS = {
+    "python": "pass",
+    "import cta": "import cta",
+    "from cta import CTAClient": "from cta import CTAClient",
+    "to_records": (
+        "from cta.responses import ArrivalResponse\n"
+        "ArrivalResponse({'ctatt': {'errCd': '0', 'eta': []}}).to_records()"
+    ),
+}
+
+
+def time_import(statement: str, repeat: int = 10) -> float:
+    """Median milliseconds for a new interpreter to run the statement."""
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(time.perf_counter() - start)"
+    )
+    timings = [
+        float(subprocess.check_output([sys.executable, "-c", code]))
+        for _ in range(repeat)
+    ]
+
+    return statistics.median(timings) * 1000
+
+
+def imported_modules(statement: str) -> set[str]:
+    code = f"import sys\n{statement}\nprint(' '.join(sys.modules))"
+
+    return set(subprocess.check_output([sys.executable, "-c", code]).decode().split())
+
+
+def main() -> None:
+    for name, statement in STATEMENTS.items():
+        heavy = sorted(
+            module
+            for module in ["pandas", "numpy", "requests", "asyncio"]
+            if module in imported_modules(statement)
+        )
+        print(
+            f"{name:>28}: {time_import(statement):7.1f} ms, loads {heavy or 'nothing heavy'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compare the columnar Trains.to_frame with the previous record based path.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_to_frame
+
+"""
+import pandas as pd
+
+import timeit
+
+from cta.responses import LocationResponse, Trains
+
+from benchmarks.payloads import locations_payload
+
+
+def records_to_frame(data: dict) -> pd.DataFrame:
+    """Previous implementation of LocationResponse.to_frame."""
+
+    def trains_to_frame(trains: list[dict]) -> pd.DataFrame:
+        df_trains = pd.DataFrame.from_records(trains)
+        for col in ["prdt", "arrT"]:
+            df_trains[col] = pd.to_datetime(df_trains[col])
+
+        return Trains.add_convenient_columns(df_trains)
+
+    dfs = [
+        trains_to_frame(route["train"]).assign(train=route["@name"])
+        for route in data["ctatt"]["route"]
+    ]
+
+    return pd.concat(dfs, ignore_index=True)
+
+
+def main(number: int = 50) -> None:
+    for trains_per_route in [5, 25, 100]:
+        data = locations_payload(trains_per_route=trains_per_route)
+        records = timeit.timeit(lambda: records_to_frame(data), number=number)
+        columnar = timeit.timeit(
+            lambda: LocationResponse(data=data).to_frame(), number=number
+        )
+
+        n_trains = trains_per_route * len(data["ctatt"]["route"])
+        print(
+            f"{n_trains:>5} trains: "
+            f"records {records / number * 1000:7.2f} ms, "
+            f"columnar {columnar / number * 1000:7.2f} ms, "
+            f"speedup {records / columnar:4.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import random
+
+from datetime import datetime, timedelta
+
+from cta.route import Route
+
+
+STATIONS = [
+    (40590, 30115, "Damen", "Service toward O'Hare"),
+    (40380, 30074, "Clark/Lake", "Service toward Forest Park"),
+    (41660, 30322, "Lake", "Service toward Howard"),
+    (40170, 30033, "Ashland", "Service toward Harlem/Lake"),
+    (40070, 30014, "Jackson", "Service toward Forest Park"),
+    (41320, 30257, "Belmont", "Service toward Kimball"),
+    (40550, 30107, "Irving Park", "Service toward O'Hare"),
+    (41330, 30259, "Montrose", "Service toward O'Hare"),
+]
+DESTINATIONS = [(30171, "O'Hare"), (0, "UIC-Halsted"), (30077, "Forest Park")]
+
+
+def _timestamp(time: datetime) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def eta(rng: random.Random, now: datetime, rn: int, route: str = "Blue") -> dict:
+    """Single prediction like the ones of the arrivals and follow endpoints."""
+    sta_id, stp_id, sta_nm, stp_de = rng.choice(STATIONS)
+    dest_st, dest_nm = rng.choice(DESTINATIONS)
+    prdt = now - timedelta(seconds=rng.randint(0, 60))
+
+    return {
+        "staId": str(sta_id),
+        "stpId": str(stp_id),
+        "staNm": sta_nm,
+        "stpDe": stp_de,
+        "rn": str(rn),
+        "rt": route,
+        "destSt": str(dest_st),
+        "destNm": dest_nm,
+        "trDr": rng.choice(["1", "5"]),
+        "prdt": _timestamp(prdt),
+        "arrT": _timestamp(prdt + timedelta(seconds=rng.randint(60, 1800))),
+        "isApp": rng.choice(["0", "0", "0", "1"]),
+        "isSch": rng.choice(["0", "0", "0", "1"]),
+        "isDly": rng.choice(["0", "0", "0", "0", "1"]),
+        "isFlt": "0",
+        "flags": None,
+        "lat": f"{41.88 + rng.uniform(-0.1, 0.1):.5f}",
+        "lon": f"{-87.63 + rng.uniform(-0.1, 0.1):.5f}",
+        "heading": str(rng.randint(0, 359)),
+    }
+
+
+def train(rng: random.Random, now: datetime, rn: int) -> dict:
+    """Single train like the ones of the locations endpoint."""
+    prediction = eta(rng, now, rn)
+
+    return {
+        "rn": prediction["rn"],
+        "destSt": prediction["destSt"],
+        "destNm": prediction["destNm"],
+        "trDr": prediction["trDr"],
+        "nextStaId": prediction["staId"],
+        "nextStpId": prediction["stpId"],
+        "nextStaNm": prediction["staNm"],
+        "prdt": prediction["prdt"],
+        "arrT": prediction["arrT"],
+        "isApp": prediction["isApp"],
+        "isDly": prediction["isDly"],
+        "flags": None,
+        "lat": prediction["lat"],
+        "lon": prediction["lon"],
+        "heading": prediction["heading"],
+    }
+
+
+def arrivals_payload(n_trains: int = 100, seed: int = 0) -> dict:
+    """Payload of the arrivals endpoint with n_trains predictions."""
+    rng = random.Random(seed)
+    now = datetime(2022, 5, 15, 15, 0, 0)
+
+    return {
+        "ctatt": {
+            "tmst": _timestamp(now),
+            "errCd": "0",
+            "errNm": None,
+            "eta": [eta(rng, now, rn=100 + i) for i in range(n_trains)],
+        }
+    }
+
+
+def locations_payload(trains_per_route: int = 25, seed: int = 0) -> dict:
+    """Payload of the locations endpoint for every route."""
+    rng = random.Random(seed)
+    now = datetime(2022, 5, 15, 15, 0, 0)
+
+    routes = [
+        {
+            "@name": route.value,
+            "train": [
+                train(rng, now, rn=100 * (i + 1) + j) for j in range(trains_per_route)
+            ],
+        }
+        for i, route in enumerate(Route)
+    ]
+
+    return {
+        "ctatt": {
+            "tmst": _timestamp(now),
+            "errCd": "0",
+            "errNm": None,
+            "route": routes,
+        }
+    }
+
+
+ROUTE_FLAGS = ["red", "blue", "g", "brn", "p", "pexp", "y", "pnk", "o"]
+STATION_WORDS = [
+    "Damen", "Western", "California", "Kedzie", "Pulaski", "Cicero", "Austin",
+    "Harlem", "Halsted", "Ashland", "Racine", "Clark", "Lake", "State", "Wells",
+    "Belmont", "Fullerton", "Addison", "Irving Park", "Montrose", "Lawrence",
+    "Jackson", "Monroe", "Washington", "Division", "Chicago", "Grand", "Roosevelt",
+]  # fmt: skip
+
+
+def stations_dataset(n_stations: int = 150, seed: int = 0) -> list[dict]:
+    """Records like the stations dataset with two stops per station."""
+    rng = random.Random(seed)
+
+    records = []
+    for i in range(n_stations):
+        name = STATION_WORDS[i % len(STATION_WORDS)]
+        if i >= len(STATION_WORDS):
+            name = f"{name}/{rng.choice(STATION_WORDS)}"
+        routes = set(rng.sample(ROUTE_FLAGS, k=rng.choice([1, 1, 1, 2])))
+        map_id = 40000 + 10 * i
+        for direction, stop_id in [("N", 30000 + 2 * i), ("S", 30001 + 2 * i)]:
+            records.append(
+                {
+                    "stop_id": stop_id,
+                    "direction_id": direction,
+                    "stop_name": f"{name} ({direction}-bound)",
+                    "station_name": name,
+                    "station_descriptive_name": f"{name} ({', '.join(sorted(routes))})",
+                    "map_id": map_id,
+                    "ada": rng.random() < 0.7,
+                    **{flag: flag in routes for flag in ROUTE_FLAGS},
+                    "location": {
+                        "latitude": f"{41.88 + rng.uniform(-0.2, 0.2):.6f}",
+                        "longitude": f"{-87.63 + rng.uniform(-0.2, 0.2):.6f}",
+                    },
+                }
+            )
+
+    return records
@@ -0,0 +1,208 @@
+"""Benchmark the hot paths on synthetic payloads.
+
+Reports the ops/sec, latency percentiles and peak memory of each stage and
+can compare them against a stored baseline. Run from the root of the
+repository:
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json
+
+The comparison exits with status 1 if any stage got slower than the
+threshold.
+
+"""
+
+import argparse
+
+import json
+
+import sys
+
+import tempfile
+
+import time
+
+import tracemalloc
+
+from pathlib import Path
+
+from typing import Callable, Optional
+
+from cta.analytics import headways
+from cta.client import ParamBuilder
+from cta.responses import ArrivalResponse, LocationResponse, Trains
+from cta.route import Route
+from cta.spatial import TrainIndex
+from cta.stations import Stations
+
+from benchmarks.payloads import arrivals_payload, locations_payload, stations_dataset
+
+
+def percentile(timings: list[float], q: float) -> float:
+    timings = sorted(timings)
+    index = min(int(q / 100 * len(timings)), len(timings) - 1)
+
+    return timings[index]
+
+
+def peak_memory(func: Callable[[], object]) -> int:
+    """Peak bytes allocated during a single call."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def measure(
+    func: Callable[[], object], min_time: float = 1, min_calls: int = 10
+) -> dict[str, float]:
+    """Time calls of func for at least min_time seconds and min_calls calls."""
+    func()
+
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < min_calls or time.perf_counter() - started < min_time:
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "calls": len(timings),
+        "ops_per_sec": len(timings) / sum(timings),
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p90_ms": percentile(timings, 90) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "peak_kib": peak_memory(func) / 1024,
+    }
+
+
+def cases(directory: Path) -> dict[str, Callable[[], object]]:
+    """Stages to benchmark keyed by name."""
+    builder = ParamBuilder(key="abc")
+    mapids = [40590, 40380, 41660, 40170]
+
+    arrivals = ArrivalResponse(data=arrivals_payload(n_trains=500))
+    locations_data = locations_payload(trains_per_route=100)
+    locations = LocationResponse(data=locations_data)
+
+    stations_file = directory / "stations.json"
+    stations_file.write_text(json.dumps(stations_dataset(n_stations=150)))
+    stations = Stations(snapshot=stations_file)
+
+    df_arrivals = arrivals.to_frame()
+
+    positions = locations.to_records()
+    index = TrainIndex()
+    index.update(positions)
+
+    return {
+        "ParamBuilder.build": lambda: builder.build(mapid=mapids, route=Route.BLUE),
+        "Response._check_input": arrivals._check_input,
+        "Trains.to_frame[500]": Trains(arrivals.data["ctatt"]["eta"]).to_frame,
+        "LocationResponse.to_frame[800]": lambda: LocationResponse(
+            data=locations_data
+        ).to_frame(),
+        "LocationResponse.to_frame[800,cached]": locations.to_frame,
+        "LocationResponse.to_records[800]": locations.to_records,
+        "analytics.headways[500]": lambda: headways(df_arrivals),
+        "Stations.lookup": lambda: stations.lookup("lake", route=Route.BLUE),
+        "TrainIndex.update[800]": lambda: index.update(positions),
+        "TrainIndex.nearest[k=5]": lambda: index.nearest(41.88, -87.63, k=5),
+        "TrainIndex.within[1km]": lambda: index.within(41.88, -87.63, radius=1000),
+    }
+
+
+def run(
+    pattern: Optional[str] = None, min_time: float = 1
+) -> dict[str, dict[str, float]]:
+    with tempfile.TemporaryDirectory() as directory:
+        stages = cases(Path(directory))
+        return {
+            name: measure(func, min_time=min_time)
+            for name, func in stages.items()
+            if pattern is None or pattern.lower() in name.lower()
+        }
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+) -> dict[str, float]:
+    """Relative change of the ops/sec of the stages in both results.
+
+    Returns:
+        Change per stage. Negative when the stage got slower.
+
+    """
+    return {
+        name: result["ops_per_sec"] / baseline[name]["ops_per_sec"] - 1
+        for name, result in results.items()
+        if name in baseline
+    }
+
+
+def report(
+    results: dict[str, dict[str, float]], changes: Optional[dict[str, float]] = None
+) -> str:
+    header = f"{'stage':<34} {'ops/sec':>10} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'peak KiB':>10}"
+    if changes is not None:
+        header += f" {'change':>8}"
+
+    lines = [header, "-" * len(header)]
+    for name, result in results.items():
+        line = (
+            f"{name:<34} {result['ops_per_sec']:>10.1f} {result['p50_ms']:>9.3f} "
+            f"{result['p90_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['peak_kib']:>10.1f}"
+        )
+        if changes is not None:
+            change = changes.get(name)
+            line += f" {change:>+8.1%}" if change is not None else f" {'new':>8}"
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", help="Only run matching stages.")
+    parser.add_argument("--min-time", type=float, default=1, help="Seconds per stage.")
+    parser.add_argument("--save", type=Path, help="Write the results to this file.")
+    parser.add_argument("--compare", type=Path, help="Baseline results to compare to.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Fraction of ops/sec which may be lost before failing the comparison.",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, min_time=args.min_time)
+
+    changes = None
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())
+        changes = compare(results, baseline)
+
+    print(report(results, changes))
+
+    if args.save is not None:
+        args.save.write_text(json.dumps(results, indent=2))
+
+    regressions = [
+        name for name, change in (changes or {}).items() if change < -args.threshold
+    ]
+    if regressions:
+        print(
+            f"\nRegressed by more than {args.threshold:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
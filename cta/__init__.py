@@ -1,6 +1,42 @@
-from cta.client import CTAClient
-from cta.route import Route
-from cta.stations import Stations
+"""Python client for the Chicago Transit Authority train tracker API.
+
+Modules are imported on first use so that `import cta` stays fast and pandas
+is only needed for DataFrames.
+
+"""
+import importlib
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from cta.client import CTAClient, AsyncCTAClient
+    from cta.poller import Poller
+    from cta.route import Route
+    from cta.stations import Stations
 
 
 __version__ = "0.0.2"
+
+_lazy_attributes = {
+    "CTAClient": "cta.client",
+    "AsyncCTAClient": "cta.client",
+    "Poller": "cta.poller",
+    "Route": "cta.route",
+    "Stations": "cta.stations",
+}
+
+__all__ = list(_lazy_attributes)
+
+
+def __getattr__(name: str):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module 'cta' has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_lazy_attributes[name]), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_lazy_attributes])
@@ -0,0 +1,42 @@
+import importlib
+
+from types import ModuleType
+
+from typing import Any, Optional
+
+
+class LazyModule:
+    """Stand-in for a module which is only imported on first attribute access.
+
+    Not to be used by itself.
+
+    Args:
+        name: Name of the module to import.
+        extra: Extra of python-cta which installs the module.
+
+    """
+
+    def __init__(self, name: str, extra: Optional[str] = None):
+        self._name = name
+        self._extra = extra
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError as e:
+                msg = f"The {self._name!r} package is required for this feature."
+                if self._extra is not None:
+                    msg += f" Install with: pip install 'python-cta[{self._extra}]'"
+                raise ImportError(msg) from e
+
+        return self._module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+
+        return f"<lazy module {self._name!r} ({state})>"
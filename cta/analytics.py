@@ -0,0 +1,258 @@
+"""Headways, bunching and schedule adherence from frames of the trains.
+
+Works on the frames of the arrivals, follow and locations responses as well
+as on the history read back with the ArchiveReader. Each train passing a
+station is observed once: its latest prediction for that stop. Everything is
+computed on sorted arrays so a full day of snapshots of every route takes
+seconds.
+
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+from cta._lazy import LazyModule
+
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = LazyModule("numpy", extra="pandas")
+    pd = LazyModule("pandas", extra="pandas")
+
+
+MINUTE = 60
+GROUP_COLUMNS = ["route", "trDr", "staId"]
+
+
+def _station_column(df_trains: pd.DataFrame) -> str:
+    """staId for the arrivals and follow frames, nextStaId for locations."""
+    return "staId" if "staId" in df_trains.columns else "nextStaId"
+
+
+def _route_column(df_trains: pd.DataFrame) -> str:
+    return "rt" if "rt" in df_trains.columns else "train"
+
+
+def _seconds(values: pd.Series) -> np.ndarray:
+    return values.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def _datetimes(seconds: np.ndarray) -> np.ndarray:
+    return seconds.astype("datetime64[s]")
+
+
+def _starts(*keys: np.ndarray) -> np.ndarray:
+    """Where any of the sorted keys changes. True for the first row."""
+    starts = np.zeros(len(keys[0]), dtype=bool)
+    starts[:1] = True
+    for key in keys:
+        starts[1:] |= key[1:] != key[:-1]
+
+    return starts
+
+
+def observed_arrivals(df_trains: pd.DataFrame, trip_gap: float = 20) -> pd.DataFrame:
+    """Latest prediction of each train at each station it passes.
+
+    The predictions of a run number for a station are split into separate
+    trips when the predicted arrival jumps by more than trip_gap, like on its
+    way back later in the day.
+
+    Args:
+        df_trains: Frame of the trains with one row per prediction and
+            snapshot.
+        trip_gap: Minutes between predictions of separate trips.
+
+    Returns:
+        One row per train and station with the route, direction, station,
+        run number, arrival time and time of the latest prediction. Also
+        the latest schedule based arrival time, whether the train was ever
+        flagged as delayed and the number of predictions, when the frame has
+        the isSch and isDly columns.
+
+    """
+    station = _station_column(df_trains)
+    df_trains = df_trains.dropna(subset=[station, "rn", "arrT", "prdt"])
+
+    rn_codes, rn_values = pd.factorize(df_trains["rn"])
+    stations = df_trains[station].to_numpy(dtype=np.int64)
+    arrivals = _seconds(df_trains["arrT"])
+    predictions = _seconds(df_trains["prdt"])
+
+    order = np.lexsort((predictions, stations, rn_codes))
+    rn_codes = rn_codes[order]
+    stations = stations[order]
+    arrivals = arrivals[order]
+    predictions = predictions[order]
+
+    starts = _starts(rn_codes, stations)
+    starts[1:] |= np.abs(np.diff(arrivals)) > trip_gap * MINUTE
+    first = np.flatnonzero(starts)
+    last = np.append(first[1:], len(order))[: len(first)] - 1
+
+    rows = order[last]
+    observed = {
+        "route": df_trains[_route_column(df_trains)].to_numpy()[rows],
+        "trDr": df_trains["trDr"].to_numpy()[rows],
+        "staId": stations[last],
+        "rn": rn_values.to_numpy()[rn_codes[last]],
+        "arrT": _datetimes(arrivals[last]),
+        "prdt": _datetimes(predictions[last]),
+    }
+
+    if "isSch" in df_trains.columns:
+        scheduled = df_trains["isSch"].to_numpy(dtype=bool)[order]
+        positions = np.where(scheduled, np.arange(len(order)), -1)
+        latest = np.maximum.accumulate(positions)[last]
+        has_schedule = latest >= first
+        scheduled_arrivals = np.where(has_schedule, arrivals[latest], 0)
+        observed["scheduled_arrT"] = np.where(
+            has_schedule,
+            _datetimes(scheduled_arrivals),
+            np.datetime64("NaT", "s"),
+        )
+        observed["isSch"] = scheduled[last]
+
+    if "isDly" in df_trains.columns:
+        delayed = df_trains["isDly"].to_numpy(dtype=bool)[order]
+        observed["isDly"] = np.logical_or.reduceat(delayed, first)
+
+    observed["predictions"] = last - first + 1
+
+    return pd.DataFrame(observed)
+
+
+def headways(df_trains: pd.DataFrame, trip_gap: float = 20) -> pd.DataFrame:
+    """Minutes between consecutive trains at each station and direction.
+
+    Args:
+        df_trains: Frame of the trains with one row per prediction and
+            snapshot.
+        trip_gap: Minutes between predictions of separate trips.
+
+    Returns:
+        Observed arrivals sorted by route, direction, station and arrival time
+        with the headway to the previous train, its run number and the ratio
+        of the headway to the median headway of the station and direction.
+        The first train of each station and direction has no headway.
+
+    Examples:
+        Headways at every station over the recorded morning.
+
+        >>> df_arrivals = ArchiveReader("archive").read("arrivals", start=start, end=end)
+        >>> df_headways = headways(df_arrivals)
+
+    """
+    df_observed = observed_arrivals(df_trains, trip_gap=trip_gap)
+    if df_observed.empty:
+        return df_observed.assign(previous_rn=[], headway=[], headway_ratio=[])
+
+    routes = pd.factorize(df_observed["route"], sort=True)[0]
+    directions = pd.factorize(df_observed["trDr"], sort=True)[0]
+    stations = df_observed["staId"].to_numpy()
+    arrivals = _seconds(df_observed["arrT"])
+
+    order = np.lexsort((arrivals, stations, directions, routes))
+    df_observed = df_observed.iloc[order].reset_index(drop=True)
+    starts = _starts(routes[order], directions[order], stations[order])
+
+    headway = np.empty(len(order))
+    headway[0] = np.nan
+    headway[1:] = np.diff(arrivals[order]) / MINUTE
+    headway[starts] = np.nan
+
+    previous_rn = np.empty(len(order), dtype=object)
+    previous_rn[1:] = df_observed["rn"].to_numpy()[:-1]
+    previous_rn[starts] = None
+
+    groups = np.cumsum(starts) - 1
+    median = pd.Series(headway).groupby(groups).transform("median").to_numpy()
+
+    return df_observed.assign(
+        previous_rn=previous_rn,
+        headway=headway,
+        headway_ratio=headway / median,
+    )
+
+
+def bunching(df_headways: pd.DataFrame, factor: float = 0.25) -> pd.DataFrame:
+    """Trains arriving right behind the previous one.
+
+    Args:
+        df_headways: Frame from headways.
+        factor: Largest ratio of the headway to the median headway of the
+            station and direction.
+
+    Returns:
+        Rows of the headways where the train is bunched with previous_rn.
+
+    """
+    return df_headways.loc[df_headways["headway_ratio"] <= factor]
+
+
+def gaps(df_headways: pd.DataFrame, factor: float = 2) -> pd.DataFrame:
+    """Trains arriving long after the previous one.
+
+    Args:
+        df_headways: Frame from headways.
+        factor: Smallest ratio of the headway to the median headway of the
+            station and direction.
+
+    Returns:
+        Rows of the headways where the gap since previous_rn is too long.
+
+    """
+    return df_headways.loc[df_headways["headway_ratio"] >= factor]
+
+
+def schedule_spread(
+    df_trains: pd.DataFrame,
+    trip_gap: float = 20,
+    by: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """Spread between the schedule based and the tracked arrival times.
+
+    Only the trains which had a schedule based prediction before being
+    tracked count towards the spread. Positive minutes are later than the
+    schedule.
+
+    Args:
+        df_trains: Frame of the arrivals or follow endpoints with one row per
+            prediction and snapshot.
+        trip_gap: Minutes between predictions of separate trips.
+        by: Columns of the observed arrivals to group by. Defaults to the
+            route, direction and station.
+
+    Returns:
+        Per group, the number of observed arrivals, the share flagged as
+        delayed, the number with a schedule based prediction and the mean,
+        median and 90th percentile of their spread in minutes.
+
+    """
+    df_observed = observed_arrivals(df_trains, trip_gap=trip_gap)
+    if "scheduled_arrT" not in df_observed.columns:
+        raise ValueError("The frame needs the isSch column of the arrivals.")
+
+    tracked = ~df_observed["isSch"].to_numpy()
+    spread = (
+        _seconds(df_observed["arrT"]) - _seconds(df_observed["scheduled_arrT"])
+    ) / MINUTE
+    spread[df_observed["scheduled_arrT"].isna().to_numpy() | ~tracked] = np.nan
+
+    grouped = df_observed.assign(spread=spread).groupby(
+        by or GROUP_COLUMNS, observed=True, sort=True
+    )
+
+    return pd.DataFrame(
+        {
+            "arrivals": grouped.size(),
+            "delayed_share": grouped["isDly"].mean(),
+            "scheduled": grouped["spread"].count(),
+            "mean_spread": grouped["spread"].mean(),
+            "median_spread": grouped["spread"].median(),
+            "p90_spread": grouped["spread"].quantile(0.9),
+        }
+    )
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import hashlib
+
+import threading
+
+import time
+
+from collections import OrderedDict
+
+from typing import Any, Awaitable, Callable, Hashable, Optional, Union
+
+from cta._lazy import LazyModule
+
+
+asyncio = LazyModule("asyncio")
+futures = LazyModule("concurrent.futures")
+
+
+class _FetchCancelled(Exception):
+    """The task making the request was cancelled. Not to be raised to users."""
+
+
+class ResponseCache:
+    """Time to live cache of the API responses with bounded size.
+
+    Identical requests which arrive while a request is already in flight wait
+    for its result instead of calling the API again. Threads and asyncio tasks
+    are coalesced separately.
+
+    Args:
+        ttl: Seconds an entry stays fresh. Either a single value for all
+            endpoints or a mapping from endpoint name to seconds. Endpoints
+            missing from the mapping aren't cached.
+        maxsize: Maximum number of entries before the least recently used are
+            evicted.
+        clock: Function returning the current time in seconds.
+
+    Attributes:
+        hits: Number of requests answered from the cache.
+        misses: Number of requests which called the API.
+        coalesced: Number of requests which waited on one already in flight.
+        evictions: Number of entries evicted because of maxsize.
+
+    Examples:
+        Cache arrivals for 10 seconds and locations for 30.
+
+        >>> cache = ResponseCache(ttl={"arrivals": 10, "locations": 30})
+        >>> cta = CTAClient(cache=cache)
+
+    """
+
+    def __init__(
+        self,
+        ttl: Union[float, dict[str, float]] = 10,
+        maxsize: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._in_flight: dict[Hashable, futures.Future] = {}
+        self._async_in_flight: dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl_for(self, endpoint: str) -> float:
+        if isinstance(self.ttl, dict):
+            return self.ttl.get(endpoint, 0)
+
+        return self.ttl
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh value for the key if there is one."""
+        with self._lock:
+            return self._get_fresh(key)
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """Latest value for the key even if it is no longer fresh."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+        return None if entry is None else entry[0]
+
+    def set(self, endpoint: str, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._set(endpoint, key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "size": len(self),
+        }
+
+    def get_or_fetch(self, endpoint: str, key: Hashable, fetch: Callable[[], Any]):
+        """Return the cached value or call fetch once for all waiting threads.
+
+        Args:
+            endpoint: Name of the endpoint used for the ttl.
+            key: Normalized key of the request.
+            fetch: Function calling the API.
+
+        Returns:
+            Value from the cache or fetch.
+
+        """
+        with self._lock:
+            value = self._get_fresh(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            future = self._in_flight.get(key)
+            if future is None:
+                self.misses += 1
+                future = self._in_flight[key] = futures.Future()
+                owner = True
+            else:
+                self.coalesced += 1
+                owner = False
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._set(endpoint, key, value)
+            del self._in_flight[key]
+        future.set_result(value)
+
+        return value
+
+    async def aget_or_fetch(
+        self, endpoint: str, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ):
+        """Async version of get_or_fetch for callers on one event loop.
+
+        Async callers only coalesce with each other and not with threads
+        calling get_or_fetch. If the task making the request is cancelled,
+        the next waiting task makes it instead.
+
+        """
+        while True:
+            with self._lock:
+                value = self._get_fresh(key)
+                if value is not None:
+                    self.hits += 1
+                    return value
+
+                future = self._async_in_flight.get(key)
+                if future is None:
+                    self.misses += 1
+                    loop = asyncio.get_running_loop()
+                    future = self._async_in_flight[key] = loop.create_future()
+                    break
+
+                self.coalesced += 1
+
+            try:
+                return await asyncio.shield(future)
+            except _FetchCancelled:
+                continue
+
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.set_exception(_FetchCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            self.set(endpoint, key, value)
+            future.set_result(value)
+        finally:
+            del self._async_in_flight[key]
+
+        return value
+
+    def _get_fresh(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if self.clock() >= expires_at:
+            return None
+
+        self._entries.move_to_end(key)
+
+        return value
+
+    def _set(self, endpoint: str, key: Hashable, value: Any) -> None:
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (value, self.clock() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class Fingerprints:
+    """Reuse the payload and response of requests whose body didn't change.
+
+    The body of the latest response of each request is hashed. When the next
+    body is identical, the previous payload is returned without decoding and
+    the response built from it is reused with its frame. Only the columns
+    relative to the current time are computed again.
+
+    Args:
+        maxsize: Maximum number of requests before the least recently used are
+            evicted.
+
+    Attributes:
+        unchanged: Number of bodies identical to the previous one.
+        changed: Number of new or changed bodies.
+
+    Examples:
+        Poll a quiet station without parsing the same body again.
+
+        >>> fingerprints = Fingerprints()
+        >>> cta = CTAClient(fingerprints=fingerprints)
+        >>> df_arrivals = cta.arrivals(mapid=40590).to_frame()
+        >>> df_arrivals = cta.arrivals(mapid=40590).to_frame()
+        >>> fingerprints.unchanged
+
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+
+        self.unchanged = 0
+        self.changed = 0
+
+        self._entries: OrderedDict[Hashable, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def digest(content: bytes) -> bytes:
+        return hashlib.blake2b(content, digest_size=16).digest()
+
+    def get(self, key: Hashable, digest: bytes) -> Optional[Any]:
+        """Previous payload of the request if its body had the same digest."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != digest:
+                self.changed += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.unchanged += 1
+
+            return entry[1]
+
+    def set(self, key: Hashable, digest: bytes, payload: Any) -> None:
+        with self._lock:
+            self._entries[key] = [digest, payload, None]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def response(self, key: Hashable, payload: Any, build: Callable[[], Any]) -> Any:
+        """Response of the payload, built only once while the body is unchanged.
+
+        Args:
+            key: Normalized key of the request.
+            payload: Payload returned for the request.
+            build: Function building the response from the payload.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is payload and entry[2] is not None:
+                return entry[2]
+
+        response = build()
+        with self._lock:
+            if entry is not None and entry[1] is payload:
+                entry[2] = response
+
+        return response
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"unchanged": self.unchanged, "changed": self.changed, "size": len(self)}
@@ -1,13 +1,40 @@
-import requests
-
 import os
 
 import warnings
 
-from typing import Optional, Union, Any
+from typing import Awaitable, Iterable, Iterator, Optional, Union, Any
 
+from cta._lazy import LazyModule
+from cta.cache import Fingerprints, ResponseCache
+from cta.decoding import Decoder, default_decoder
+from cta.metrics import Instrumentation, timed
+from cta.ratelimit import RateLimiter, RateLimitExceededError
+from cta.retry import RetryPolicy
 from cta.route import Route
-from cta.responses import ArrivalResponse, LocationResponse, FollowResponse
+from cta.stations import Stations
+from cta.responses import (
+    ArrivalResponse,
+    LocationResponse,
+    FollowResponse,
+    FollowBulkResponse,
+    Response,
+)
+from cta.transport import (
+    AsyncTransport,
+    HTTPStatusError,
+    Transport,
+    TransportError,
+    TransportResponse,
+    RequestsTransport,
+    default_async_transport,
+)
+
+
+asyncio = LazyModule("asyncio")
+futures = LazyModule("concurrent.futures")
+
+
+REQUEST_ERRORS = (ValueError, TransportError, RateLimitExceededError)
 
 
 class TooManyArgsError(Exception):
@@ -44,6 +71,40 @@ class ParamBuilder:
         return value
 
 
+class Request:
+    """Endpoint, url and parameters of a single call to the API.
+
+    Not to be used by itself.
+
+    Args:
+        endpoint: Name of the endpoint. One of arrivals, locations or follow.
+        url: Full url of the endpoint.
+        params: Parameters from the ParamBuilder.
+
+    """
+
+    def __init__(self, endpoint: str, url: str, params: dict[str, Any]):
+        self.endpoint = endpoint
+        self.url = url
+        self.params = params
+
+    @property
+    def key(self) -> tuple:
+        """Hashable key of the request which ignores the api key and order of ids."""
+        params = tuple(
+            sorted(
+                (
+                    name,
+                    tuple(sorted(value, key=str)) if isinstance(value, list) else value,
+                )
+                for name, value in self.params.items()
+                if name != "key"
+            )
+        )
+
+        return self.endpoint, params
+
+
 class NoCredentialsError(KeyError):
     """No credentials provided."""
 
@@ -52,7 +113,225 @@ class RequiredArgMissingError(ValueError):
     """An argument is missing."""
 
 
-class CTAClient:
+class BaseClient:
+    """Shared request building and validation for the CTA clients.
+
+    Not to be used by itself.
+
+    Args:
+        key: Chicago Transit Authority API key
+        stations: Stations used to resolve station names. Loaded on first
+            use if not provided.
+
+    """
+
+    url: str = "http://lapi.transitchicago.com/api"
+
+    def __init__(self, key: Optional[str] = None, stations: Optional[Stations] = None):
+        try:
+            self.key = key or os.environ["CTA_KEY"]
+        except KeyError:
+            msg = "Set the 'CTA_KEY' environment variable or provide key."
+            raise NoCredentialsError(msg)
+
+        self.version: int = 1
+        self.max_number_params = 4
+
+        self.builder = ParamBuilder(key=self.key)
+
+        self._stations = stations
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/{self.version:.1f}"
+
+    @property
+    def stations(self) -> Stations:
+        if self._stations is None:
+            self._stations = Stations()
+
+        return self._stations
+
+    @staticmethod
+    def _has_names(mapid) -> bool:
+        values = mapid if isinstance(mapid, (list, tuple)) else [mapid]
+
+        return any(isinstance(value, str) and not value.isdigit() for value in values)
+
+    def _resolve_mapids(
+        self,
+        mapid: Optional[Union[int, str, list[Union[int, str]]]],
+        route: Optional[Route] = None,
+    ):
+        """Replace station names by their map_ids."""
+        if not self._has_names(mapid):
+            return mapid
+
+        values = mapid if isinstance(mapid, (list, tuple)) else [mapid]
+
+        resolved = []
+        for value in values:
+            if isinstance(value, str) and not value.isdigit():
+                resolved.extend(self.stations.map_ids(value, route=route))
+            else:
+                resolved.append(value)
+
+        return resolved
+
+    def _arrivals_request(
+        self,
+        mapid: Optional[Union[int, list[int]]] = None,
+        stpid: Optional[Union[int, list[int]]] = None,
+        max: Optional[int] = None,
+        route: Optional[Route] = None,
+    ) -> Request:
+        if mapid is None and stpid is None:
+            msg = "Both 'mapid' and 'stpid' cannot be null. Please provide one."
+            raise RequiredArgMissingError(msg)
+
+        names = mapid
+        mapid = self._resolve_mapids(mapid, route=route)
+        if mapid is not names and len(mapid) > self.max_number_params:
+            msg = (
+                f"{names!r} matches {len(mapid)} stations. Narrow it down with "
+                "'route' or use arrivals_bulk for all of them."
+            )
+            raise TooManyArgsError(msg)
+
+        self._check_number_args(mapid, "mapid")
+        self._check_number_args(stpid, "stpid")
+
+        if mapid is not None and stpid is not None:
+            warnings.warn(
+                "Both the 'mapid' and 'stpid' arguments were used. Might have unexpected behavior."
+            )
+
+        url = f"{self.base_url}/ttarrivals.aspx"
+
+        params = self.builder.build(mapid=mapid, stpid=stpid, rt=route, max=max)
+
+        return Request("arrivals", url, params)
+
+    def _check_number_args(self, arg, name: str) -> None:
+        if isinstance(arg, list) and len(arg) > self.max_number_params:
+            msg = f"{name!r} received {len(arg)} arguments. {self.max_number_params} is the maximum."
+            raise TooManyArgsError(msg)
+
+    def _arrivals_chunks(
+        self,
+        mapid: Optional[Union[int, list[int]]] = None,
+        stpid: Optional[Union[int, list[int]]] = None,
+        route: Optional[Route] = None,
+    ) -> Iterator[dict[str, list[int]]]:
+        """Split any number of ids into groups allowed in a single request."""
+        if mapid is None and stpid is None:
+            msg = "Both 'mapid' and 'stpid' cannot be null. Please provide one."
+            raise RequiredArgMissingError(msg)
+
+        if mapid is not None:
+            mapid = self._resolve_mapids(mapid, route=route)
+
+        for name, ids in [("mapid", mapid), ("stpid", stpid)]:
+            if ids is None:
+                continue
+
+            ids = list(dict.fromkeys(ids if isinstance(ids, (list, tuple)) else [ids]))
+            for start in range(0, len(ids), self.max_number_params):
+                yield {name: ids[start : start + self.max_number_params]}
+
+    def _locations_request(self, route: Union[Route, list[Route]]) -> Request:
+        url = f"{self.base_url}/ttpositions.aspx"
+
+        if not isinstance(route, Route) and not isinstance(route, list):
+            raise ValueError(
+                f"'route' must be either Route or list of Route not {type(route)}"
+            )
+
+        params = self.builder.build(rt=route)
+
+        return Request("locations", url, params)
+
+    def _follow_request(self, runnumber: Union[int, str]) -> Request:
+        url = f"{self.base_url}/ttfollow.aspx"
+
+        if not isinstance(runnumber, (str, int)):
+            msg = "Only one 'runnumber' allowed at a time."
+            raise Exception(msg)
+
+        params = self.builder.build(runnumber=runnumber)
+
+        return Request("follow", url, params)
+
+    def _follow_bulk_response(
+        self, runnumbers: list[str], results: list
+    ) -> FollowBulkResponse:
+        """Split the results of many follow requests into responses and errors."""
+        responses = {}
+        errors = {}
+        for runnumber, result in zip(runnumbers, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, REQUEST_ERRORS):
+                    raise result
+
+                errors[runnumber] = result
+            else:
+                responses[runnumber] = result
+
+        return FollowBulkResponse(
+            responses, errors=errors, instrumentation=self.instrumentation
+        )
+
+    def _response(self, cls: type[Response], request: Request, data: dict):
+        if self.fingerprints is None:
+            return cls(data=data, instrumentation=self.instrumentation)
+
+        return self.fingerprints.response(
+            request.key,
+            data,
+            lambda: cls(data=data, instrumentation=self.instrumentation),
+        )
+
+    def _parse_response(self, url: str, response: TransportResponse):
+        if not response.ok:
+            msg = f"The response was not okay for {url!r}. Response was {response.text}"
+            raise HTTPStatusError(msg, status_code=response.status_code)
+
+        return self.decoder.decode(response.content)
+
+    def _decode(self, request: Request, response: TransportResponse):
+        if self.instrumentation is not None and response.elapsed is not None:
+            self.instrumentation.record("server", request.endpoint, response.elapsed)
+
+        if self.fingerprints is None or not response.ok:
+            with timed(self.instrumentation, "decode", request.endpoint):
+                return self._parse_response(request.url, response)
+
+        digest = self.fingerprints.digest(response.content)
+        data = self.fingerprints.get(request.key, digest)
+        if data is not None:
+            if self.instrumentation is not None:
+                self.instrumentation.registry.inc(
+                    "unchanged_total", endpoint=request.endpoint
+                )
+            return data
+
+        with timed(self.instrumentation, "decode", request.endpoint):
+            data = self._parse_response(request.url, response)
+        self.fingerprints.set(request.key, digest, data)
+
+        return data
+
+    def _stale_or_raise(self, request: Request, error: RateLimitExceededError):
+        """Fall back to stale cached data when the rate limiter allows it."""
+        if self.rate_limiter.mode == "cache" and self.cache is not None:
+            data = self.cache.get_stale(request.key)
+            if data is not None:
+                return data
+
+        raise error
+
+
+class CTAClient(BaseClient):
     """Class to work with the different CTA endpoints.
 
     Currently supported endpoints:
@@ -60,37 +339,85 @@ class CTAClient:
     - locations
     - follow
 
+    The client can be used as a context manager in order to close its
+    transport once done.
+
     Args:
         key: Chicago Transit Authority API key
+        transport: Transport used to send the requests. Defaults to a pooled,
+            keep-alive RequestsTransport owned by the client.
+        cache: Optional cache of the responses. Identical requests made while
+            an entry is fresh or in flight share one call to the API.
+        rate_limiter: Optional limit on the requests per second and per day.
+        retry: Optional policy to retry transient failures like timeouts and
+            503 responses.
+        stations: Stations used to resolve station names passed as mapid.
+            Loaded on first use if not provided.
+        instrumentation: Optional metrics and hooks timing each stage of the
+            requests and responses.
+        decoder: Decoder of the JSON bodies. Defaults to the fastest installed
+            of msgspec, orjson and the standard library.
+        fingerprints: Optional hashes of the bodies per request. Unchanged
+            bodies reuse the previous response and its frame.
 
     Attributes:
         version: Version of the api
         builder: ParamBuilder instance to format endpoint kwargs
+        transport: Transport used to send the requests
+        cache: Cache of the responses if provided
+        rate_limiter: Rate limiter if provided
+        retry: Retry policy if provided
 
     Examples:
         Initialize the client.
 
         >>> cta = CTAClient()
 
-    """
+        Close the connections once done.
 
-    url: str = "http://lapi.transitchicago.com/api"
+        >>> with CTAClient() as cta:
+        ...     arrival_response = cta.arrivals(mapid=40590)
 
-    def __init__(self, key: Optional[str] = None):
-        try:
-            self.key = key or os.environ["CTA_KEY"]
-        except KeyError:
-            msg = "Set the 'CTA_KEY' environment variable or provide key."
-            raise NoCredentialsError(msg)
+        Share arrivals for 10 seconds between callers.
 
-        self.version: int = 1
-        self.max_number_params = 4
+        >>> cta = CTAClient(cache=ResponseCache(ttl={"arrivals": 10}))
 
-        self.builder = ParamBuilder(key=self.key)
+    """
 
-    @property
-    def base_url(self) -> str:
-        return f"{self.url}/{self.version:.1f}"
+    def __init__(
+        self,
+        key: Optional[str] = None,
+        transport: Optional[Transport] = None,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        stations: Optional[Stations] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        decoder: Optional[Decoder] = None,
+        fingerprints: Optional[Fingerprints] = None,
+    ):
+        super().__init__(key=key, stations=stations)
+
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.instrumentation = instrumentation
+        self.decoder = decoder or default_decoder()
+        self.fingerprints = fingerprints
+
+        self._owns_transport = transport is None
+        self.transport = transport or RequestsTransport()
+
+    def close(self) -> None:
+        """Close the transport if it was created by the client."""
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def arrivals(
         self,
@@ -102,7 +429,7 @@ class CTAClient:
         """Get the arrivals for station(s), stop(s), and route(s).
 
         Args:
-            mapid: One or more station ids.
+            mapid: One or more station ids or exact station names.
             stpid: One or more stop ids.
             max: total number of responses. Default is all.
             route: Train line for the response.
@@ -117,29 +444,56 @@ class CTAClient:
             >>> damen_blue_line_mapid = 40590
             >>> arrival_response = cta.arrivals(mapid=damen_blue_line_mapid)
 
+            Or with the name of the station.
+
+            >>> arrival_response = cta.arrivals(mapid="Damen", route=Route.BLUE)
+
         """
-        if mapid is None and stpid is None:
-            msg = "Both 'mapid' and 'stpid' cannot be null. Please provide one."
-            raise RequiredArgMissingError(msg)
+        request = self._arrivals_request(mapid=mapid, stpid=stpid, max=max, route=route)
 
-        self._check_number_args(mapid, "mapid")
-        self._check_number_args(stpid, "stpid")
+        return self._response(ArrivalResponse, request, self._send_request(request))
 
-        if mapid is not None and stpid is not None:
-            warnings.warn(
-                "Both the 'mapid' and 'stpid' arguments were used. Might have unexpected behavior."
-            )
+    def arrivals_bulk(
+        self,
+        mapid: Optional[Union[int, list[int]]] = None,
+        stpid: Optional[Union[int, list[int]]] = None,
+        max: Optional[int] = None,
+        route: Optional[Route] = None,
+        max_workers: int = 4,
+    ) -> ArrivalResponse:
+        """Get the arrivals for any number of stations or stops.
 
-        url = f"{self.base_url}/ttarrivals.aspx"
+        The ids are split into requests of at most max_number_params ids which
+        are sent concurrently and merged into a single response.
 
-        params = self.builder.build(mapid=mapid, stpid=stpid, rt=route, max=max)
+        Args:
+            mapid: Any number of station ids or station names.
+            stpid: Any number of stop ids.
+            max: total number of responses per request. Default is all.
+            route: Train line for the response.
+            max_workers: Number of requests sent at once.
 
-        return ArrivalResponse(data=self._send_request(url, params))
+        Returns:
+            ArrivalResponse with the trains of every request.
 
-    def _check_number_args(self, arg, name: str) -> None:
-        if isinstance(arg, list) and len(arg) > self.max_number_params:
-            msg = f"{name!r} received {len(arg)} arguments. {self.max_number_params} is the maximum."
-            raise TooManyArgsError(msg)
+        Example:
+            Get the arrivals for many stations at once.
+
+            >>> arrival_response = cta.arrivals_bulk(mapid=[40590, 40380, 41660, 40170, 40070])
+
+        """
+        chunks = list(self._arrivals_chunks(mapid=mapid, stpid=stpid, route=route))
+
+        def request(chunk: dict[str, list[int]]) -> ArrivalResponse:
+            return self.arrivals(**chunk, max=max, route=route)
+
+        if len(chunks) == 1:
+            return request(chunks[0])
+
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(request, chunks))
+
+        return ArrivalResponse.merge(responses)
 
     def locations(self, route: Union[Route, list[Route]]) -> LocationResponse:
         """Get the location of trains for route(s).
@@ -152,16 +506,9 @@ class CTAClient:
             LocationResponse
 
         """
-        url = f"{self.base_url}/ttpositions.aspx"
+        request = self._locations_request(route=route)
 
-        if not isinstance(route, Route) and not isinstance(route, list):
-            raise ValueError(
-                f"'route' must be either Route or list of Route not {type(route)}"
-            )
-
-        params = self.builder.build(rt=route)
-
-        return LocationResponse(data=self._send_request(url, params))
+        return self._response(LocationResponse, request, self._send_request(request))
 
     def follow(self, runnumber: Union[int, str]) -> FollowResponse:
         """Follow a given train by its runnumber.
@@ -173,21 +520,298 @@ class CTAClient:
             FollowResponse
 
         """
-        url = f"{self.base_url}/ttfollow.aspx"
+        request = self._follow_request(runnumber=runnumber)
 
-        if not isinstance(runnumber, (str, int)):
-            msg = "Only one 'runnumber' allowed at a time."
-            raise Exception(msg)
+        return self._response(FollowResponse, request, self._send_request(request))
 
-        params = self.builder.build(runnumber=runnumber)
+    def follow_bulk(
+        self, runnumbers: Iterable[Union[int, str]], max_workers: int = 4
+    ) -> FollowBulkResponse:
+        """Follow many trains at once.
 
-        return FollowResponse(data=self._send_request(url, params))
+        Trains which can't be followed, like the ones the API answers with an
+        error code for or the ones over the rate limit, are skipped and their
+        errors kept in the response.
 
-    def _send_request(self, url: str, params: dict[str, Any]):
-        response = requests.get(url, params=params)
+        Args:
+            runnumbers: Any number of runnumbers.
+            max_workers: Number of requests sent at once.
 
-        if not response.ok:
-            msg = f"The response was not okay for {url!r}. Response was {response.text}"
-            raise Exception(msg)
+        Returns:
+            FollowBulkResponse with the predictions of every followed train
+            tagged by runnumber.
+
+        Example:
+            Follow every train coming into Damen.
+
+            >>> df_arrivals = cta.arrivals(mapid=40590).to_frame()
+            >>> follow_response = cta.follow_bulk(df_arrivals["rn"])
+            >>> df_follow = follow_response.to_frame()
+            >>> follow_response.errors
+
+        """
+        runnumbers = list(dict.fromkeys(str(runnumber) for runnumber in runnumbers))
+
+        def request(runnumber: str) -> Union[FollowResponse, Exception]:
+            try:
+                return self.follow(runnumber=runnumber)
+            except REQUEST_ERRORS as e:
+                return e
+
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(request, runnumbers))
+
+        return self._follow_bulk_response(runnumbers, results)
+
+    def _send_request(self, request: Request):
+        with timed(self.instrumentation, "request", request.endpoint):
+            try:
+                if self.cache is None:
+                    return self._fetch(request)
+
+                return self.cache.get_or_fetch(
+                    request.endpoint, request.key, lambda: self._fetch(request)
+                )
+            except RateLimitExceededError as e:
+                return self._stale_or_raise(request, e)
+
+    def _fetch(self, request: Request):
+        if self.retry is None:
+            return self._attempt(request)
+
+        return self.retry.call(lambda: self._attempt(request))
+
+    def _attempt(self, request: Request):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        with timed(self.instrumentation, "transport", request.endpoint):
+            response = self.transport.get(request.url, params=request.params)
+
+        return self._decode(request, response)
+
+
+async def gather_bounded(
+    aws: Iterable[Awaitable], limit: int, return_exceptions: bool = False
+) -> list:
+    """Like asyncio.gather but with at most limit awaitables running at once.
+
+    Args:
+        aws: Awaitables to run.
+        limit: Maximum number of awaitables running concurrently.
+        return_exceptions: Return exceptions in the results instead of raising.
+
+    Returns:
+        Results in the same order as aws.
+
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(
+        *(run(aw) for aw in aws), return_exceptions=return_exceptions
+    )
+
+
+class AsyncCTAClient(BaseClient):
+    """Asyncio version of the CTAClient.
+
+    Methods share the signatures of the CTAClient and return the same
+    response objects.
+
+    Args:
+        key: Chicago Transit Authority API key
+        transport: Async transport used to send the requests. Defaults to
+            aiohttp if installed, otherwise the pooled RequestsTransport run
+            in threads.
+        max_concurrency: Maximum number of requests in flight for gather.
+        cache: Optional cache of the responses. Can be shared with a CTAClient.
+        rate_limiter: Optional limit on the requests per second and per day.
+            Can be shared with a CTAClient.
+        retry: Optional policy to retry transient failures.
+        stations: Stations used to resolve station names passed as mapid.
+        instrumentation: Optional metrics and hooks timing each stage.
+        decoder: Decoder of the JSON bodies.
+        fingerprints: Optional hashes of the bodies per request.
+
+    Examples:
+        Refresh many stations in roughly the time of one request.
+
+        >>> async with AsyncCTAClient() as cta:
+        ...     responses = await cta.gather(
+        ...         cta.arrivals(mapid=mapid) for mapid in [40590, 40380, 41660]
+        ...     )
+
+    """
+
+    def __init__(
+        self,
+        key: Optional[str] = None,
+        transport: Optional[AsyncTransport] = None,
+        max_concurrency: int = 10,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        stations: Optional[Stations] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        decoder: Optional[Decoder] = None,
+        fingerprints: Optional[Fingerprints] = None,
+    ):
+        super().__init__(key=key, stations=stations)
+
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.instrumentation = instrumentation
+        self.decoder = decoder or default_decoder()
+        self.fingerprints = fingerprints
+
+        self.max_concurrency = max_concurrency
+
+        self._owns_transport = transport is None
+        self.transport = transport or default_async_transport(
+            pool_maxsize=max_concurrency
+        )
+
+    async def close(self) -> None:
+        """Close the transport if it was created by the client."""
+        if self._owns_transport:
+            await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _load_stations(self, mapid) -> None:
+        """Load the stations in a thread before the first station name."""
+        if self._stations is None and self._has_names(mapid):
+            self._stations = await asyncio.to_thread(Stations)
+
+    async def arrivals(
+        self,
+        mapid: Optional[Union[int, list[int]]] = None,
+        stpid: Optional[Union[int, list[int]]] = None,
+        max: Optional[int] = None,
+        route: Optional[Route] = None,
+    ) -> ArrivalResponse:
+        """Get the arrivals for station(s), stop(s), and route(s).
+
+        See CTAClient.arrivals for the arguments.
+
+        """
+        await self._load_stations(mapid)
+        request = self._arrivals_request(mapid=mapid, stpid=stpid, max=max, route=route)
+
+        return self._response(
+            ArrivalResponse, request, await self._send_request(request)
+        )
+
+    async def arrivals_bulk(
+        self,
+        mapid: Optional[Union[int, list[int]]] = None,
+        stpid: Optional[Union[int, list[int]]] = None,
+        max: Optional[int] = None,
+        route: Optional[Route] = None,
+    ) -> ArrivalResponse:
+        """Get the arrivals for any number of stations or stops.
+
+        See CTAClient.arrivals_bulk for the arguments. Requests are bounded by
+        max_concurrency.
+
+        """
+        await self._load_stations(mapid)
+        responses = await self.gather(
+            self.arrivals(**chunk, max=max, route=route)
+            for chunk in self._arrivals_chunks(mapid=mapid, stpid=stpid, route=route)
+        )
+
+        return ArrivalResponse.merge(responses)
+
+    async def locations(self, route: Union[Route, list[Route]]) -> LocationResponse:
+        """Get the location of trains for route(s).
+
+        See CTAClient.locations for the arguments.
+
+        """
+        request = self._locations_request(route=route)
+
+        return self._response(
+            LocationResponse, request, await self._send_request(request)
+        )
+
+    async def follow(self, runnumber: Union[int, str]) -> FollowResponse:
+        """Follow a given train by its runnumber.
+
+        See CTAClient.follow for the arguments.
+
+        """
+        request = self._follow_request(runnumber=runnumber)
+
+        return self._response(
+            FollowResponse, request, await self._send_request(request)
+        )
+
+    async def follow_bulk(
+        self, runnumbers: Iterable[Union[int, str]]
+    ) -> FollowBulkResponse:
+        """Follow many trains with at most max_concurrency requests in flight.
+
+        See CTAClient.follow_bulk for the arguments.
+
+        """
+        runnumbers = list(dict.fromkeys(str(runnumber) for runnumber in runnumbers))
+        results = await self.gather(
+            (self.follow(runnumber=runnumber) for runnumber in runnumbers),
+            return_exceptions=True,
+        )
+
+        return self._follow_bulk_response(runnumbers, results)
+
+    async def gather(
+        self, aws: Iterable[Awaitable], return_exceptions: bool = False
+    ) -> list:
+        """Run many requests with at most max_concurrency in flight.
+
+        Args:
+            aws: Awaitables like the ones returned by arrivals.
+            return_exceptions: Return exceptions in the results instead of raising.
+
+        Returns:
+            Results in the same order as aws.
+
+        """
+        return await gather_bounded(
+            aws, limit=self.max_concurrency, return_exceptions=return_exceptions
+        )
+
+    async def _send_request(self, request: Request):
+        with timed(self.instrumentation, "request", request.endpoint):
+            try:
+                if self.cache is None:
+                    return await self._fetch(request)
+
+                return await self.cache.aget_or_fetch(
+                    request.endpoint, request.key, lambda: self._fetch(request)
+                )
+            except RateLimitExceededError as e:
+                return self._stale_or_raise(request, e)
+
+    async def _fetch(self, request: Request):
+        if self.retry is None:
+            return await self._attempt(request)
+
+        return await self.retry.acall(lambda: self._attempt(request))
+
+    async def _attempt(self, request: Request):
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire()
+
+        with timed(self.instrumentation, "transport", request.endpoint):
+            response = await self.transport.get(request.url, params=request.params)
 
-        return response.json()
+        return self._decode(request, response)
@@ -0,0 +1,155 @@
+"""Decoders of the JSON bodies of the API.
+
+The fastest installed library is used by default: msgspec, then orjson and
+finally the standard library. With msgspec, the payloads can also be decoded
+against the schema of the endpoints which skips unknown fields.
+
+"""
+
+import json
+
+from typing import Any, Optional, TypedDict, Union
+
+
+Value = Optional[str]
+
+ETA = TypedDict(
+    "ETA",
+    {
+        "staId": Value,
+        "stpId": Value,
+        "staNm": Value,
+        "stpDe": Value,
+        "rn": Value,
+        "rt": Value,
+        "destSt": Value,
+        "destNm": Value,
+        "trDr": Value,
+        "prdt": Value,
+        "arrT": Value,
+        "isApp": Value,
+        "isSch": Value,
+        "isDly": Value,
+        "isFlt": Value,
+        "flags": Value,
+        "lat": Value,
+        "lon": Value,
+        "heading": Value,
+    },
+    total=False,
+)
+
+Train = TypedDict(
+    "Train",
+    {
+        "rn": Value,
+        "destSt": Value,
+        "destNm": Value,
+        "trDr": Value,
+        "nextStaId": Value,
+        "nextStpId": Value,
+        "nextStaNm": Value,
+        "prdt": Value,
+        "arrT": Value,
+        "isApp": Value,
+        "isDly": Value,
+        "flags": Value,
+        "lat": Value,
+        "lon": Value,
+        "heading": Value,
+    },
+    total=False,
+)
+
+RouteTrains = TypedDict(
+    "RouteTrains",
+    {"@name": str, "train": Union[list[Train], Train]},
+    total=False,
+)
+
+Position = TypedDict("Position", {"lat": Value, "lon": Value, "heading": Value})
+
+Ctatt = TypedDict(
+    "Ctatt",
+    {
+        "tmst": Value,
+        "errCd": Value,
+        "errNm": Value,
+        "eta": list[ETA],
+        "route": list[RouteTrains],
+        "position": Position,
+    },
+    total=False,
+)
+
+
+class Payload(TypedDict):
+    """Schema of the bodies of the arrivals, follow and locations endpoints."""
+
+    ctatt: Ctatt
+
+
+class Decoder:
+    """Decode the body of a response into the payload dictionary.
+
+    Uses the standard library. Subclasses use faster libraries.
+
+    """
+
+    name = "json"
+
+    def decode(self, content: bytes) -> Any:
+        return json.loads(content)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+
+class OrjsonDecoder(Decoder):
+    """Decoder using orjson. Requires the orjson package."""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._loads = orjson.loads
+
+    def decode(self, content: bytes) -> Any:
+        return self._loads(content)
+
+
+class MsgspecDecoder(Decoder):
+    """Decoder using msgspec. Requires the msgspec package.
+
+    Args:
+        typed: Decode against the schema of the endpoints. Unknown fields are
+            skipped and a msgspec.ValidationError is raised for values of
+            unexpected types.
+
+    """
+
+    name = "msgspec"
+
+    def __init__(self, typed: bool = False):
+        import msgspec
+
+        self.typed = typed
+        self._decoder = msgspec.json.Decoder(Payload if typed else Any)
+
+    def decode(self, content: bytes) -> Any:
+        return self._decoder.decode(content)
+
+    def __repr__(self) -> str:
+        return f"MsgspecDecoder(typed={self.typed})"
+
+
+def default_decoder() -> Decoder:
+    """Fastest decoder whose library is installed."""
+    for cls in [MsgspecDecoder, OrjsonDecoder]:
+        try:
+            return cls()
+        except ImportError:
+            continue
+
+    return Decoder()
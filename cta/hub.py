@@ -0,0 +1,496 @@
+"""Share one feed of the endpoints between the processes of a host.
+
+A Hub polls the endpoints with a single client and publishes each new
+snapshot over a Unix socket as two lines of JSON: a header with the topic and
+endpoint, then the payload of the API. Subscribers rebuild the same responses
+as the client returns along with the changes since their previous snapshot. Run the hub as a daemon with:
+
+    python -m cta.hub --socket /tmp/cta.sock --route blue red --mapid 40590
+
+"""
+
+import argparse
+
+import json
+
+import socket
+
+import socketserver
+
+import sys
+
+import threading
+
+from pathlib import Path
+
+from typing import Any, Iterator, Optional, Union
+
+from cta.client import REQUEST_ERRORS
+from cta.decoding import Decoder, default_decoder
+from cta.poller import ChangeEvent, Key, diff
+from cta.records import Arrival
+from cta.responses import (
+    ArrivalResponse,
+    ETAResponse,
+    FollowResponse,
+    LocationResponse,
+    Response,
+)
+from cta.route import Route
+
+
+METHODS = {"arrivals", "arrivals_bulk", "follow", "follow_bulk", "locations"}
+
+RESPONSE_TYPES: dict[str, type[Response]] = {
+    "arrivals": ArrivalResponse,
+    "follow": FollowResponse,
+    "locations": LocationResponse,
+}
+
+
+class HubClosedError(Exception):
+    """The hub closed the connection."""
+
+
+class Topic:
+    """Request of the client which the hub polls and publishes under a name.
+
+    Args:
+        name: Name the subscribers ask for.
+        method: Method of the client like "arrivals_bulk" or "locations".
+        params: Arguments of the method.
+
+    Examples:
+        The Blue Line trains and the arrivals at two stations.
+
+        >>> Topic("blue", "locations", route=Route.BLUE)
+        >>> Topic("loop", "arrivals_bulk", mapid=[40380, 41660])
+
+    """
+
+    __slots__ = ("name", "method", "params")
+
+    def __init__(self, name: str, method: str, **params: Any):
+        if method not in METHODS:
+            raise ValueError(f"The method must be one of {sorted(METHODS)}.")
+
+        self.name = name
+        self.method = method
+        self.params = params
+
+    def fetch(self, client) -> Response:
+        return getattr(client, self.method)(**self.params)
+
+    def __repr__(self) -> str:
+        return (
+            f"Topic(name={self.name!r}, method={self.method!r}, params={self.params!r})"
+        )
+
+
+class _Subscription:
+    """Connection of a subscriber. Not to be used by itself."""
+
+    def __init__(self, connection: socket.socket, topics: Optional[list[str]]):
+        self.connection = connection
+        self.topics = None if topics is None else set(topics)
+        self._lock = threading.Lock()
+
+    def wants(self, topic: str) -> bool:
+        return self.topics is None or topic in self.topics
+
+    def send(self, frame: bytes) -> bool:
+        """Write a frame. False if the subscriber is gone or too slow."""
+        with self._lock:
+            try:
+                self.connection.sendall(frame)
+            except OSError:
+                return False
+
+        return True
+
+    def close(self) -> None:
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        hub = self.server.hub
+        self.request.settimeout(hub.send_timeout)
+
+        try:
+            request = json.loads(self.request.makefile("rb").readline() or b"{}")
+        except (OSError, ValueError):
+            return
+
+        subscription = _Subscription(self.request, request.get("topics"))
+        hub._subscribe(subscription)
+        try:
+            while True:
+                try:
+                    if not self.request.recv(1024):
+                        break
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+        finally:
+            hub._unsubscribe(subscription)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class Hub:
+    """Poll the topics with one client and publish them to local subscribers.
+
+    A snapshot is only published when its payload changed other than its
+    timestamp. Each snapshot is encoded once and the same frame is written to
+    every subscriber of its topic. New subscribers first get the latest
+    snapshot of their topics. Subscribers which can't keep up for
+    send_timeout seconds are disconnected.
+
+    Args:
+        client: CTAClient used for the requests.
+        path: Path of the Unix socket.
+        topics: Requests to poll.
+        interval: Seconds between the start of two polls.
+        send_timeout: Seconds to wait for a subscriber to read a frame.
+
+    Examples:
+        Serve the Blue Line trains to the processes of the host.
+
+        >>> hub = Hub(CTAClient(), "/tmp/cta.sock", [Topic("blue", "locations", route=Route.BLUE)])
+        >>> hub.serve_forever()
+
+    """
+
+    def __init__(
+        self,
+        client,
+        path: Union[str, Path],
+        topics: list[Topic],
+        interval: float = 30,
+        send_timeout: float = 5,
+    ):
+        self.client = client
+        self.path = Path(path)
+        self.topics = {topic.name: topic for topic in topics}
+        self.interval = interval
+        self.send_timeout = send_timeout
+
+        self.frames: dict[str, bytes] = {}
+        self.errors: dict[str, Exception] = {}
+        self.polls = 0
+        self.published = 0
+
+        self._payloads: dict[str, dict] = {}
+        self._subscriptions: list[_Subscription] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def poll(self) -> list[str]:
+        """Fetch every topic once and publish the ones which changed.
+
+        Errors of a topic are kept in errors and don't stop the others.
+
+        Returns:
+            Names of the published topics.
+
+        """
+        published = []
+        for name, topic in self.topics.items():
+            try:
+                response = topic.fetch(self.client)
+            except REQUEST_ERRORS as error:
+                self.errors[name] = error
+                continue
+
+            self.errors.pop(name, None)
+            if self.publish(name, response):
+                published.append(name)
+
+        self.polls += 1
+
+        return published
+
+    def publish(self, name: str, response: Response) -> bool:
+        """Send a response to the subscribers of a topic if it changed."""
+        payload = {
+            key: value for key, value in response.data["ctatt"].items() if key != "tmst"
+        }
+        if self._payloads.get(name) == payload:
+            return False
+
+        header = {"topic": name, "endpoint": response.endpoint}
+        frame = b"%s\n%s\n" % (
+            json.dumps(header).encode(),
+            json.dumps(response.data).encode(),
+        )
+
+        with self._lock:
+            self._payloads[name] = payload
+            self.frames[name] = frame
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            if subscription.wants(name) and not subscription.send(frame):
+                self._unsubscribe(subscription)
+                subscription.close()
+
+        self.published += 1
+
+        return True
+
+    def _subscribe(self, subscription: _Subscription) -> None:
+        with self._lock:
+            frames = [
+                frame for name, frame in self.frames.items() if subscription.wants(name)
+            ]
+            self._subscriptions.append(subscription)
+            # Snapshots published from now on wait for the latest ones to be sent
+            subscription._lock.acquire()
+
+        try:
+            subscription.connection.sendall(b"".join(frames))
+        except OSError:
+            self._unsubscribe(subscription)
+            subscription.close()
+        finally:
+            subscription._lock.release()
+
+    def _unsubscribe(self, subscription: _Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def start(self) -> None:
+        """Listen for subscribers in a background thread."""
+        if self.path.exists():
+            self.path.unlink()
+
+        self._server = _Server(str(self.path), _Handler)
+        self._server.hub = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="cta-hub", daemon=True
+        )
+        self._thread.start()
+
+    def serve_forever(self, max_polls: Optional[int] = None) -> None:
+        """Listen for subscribers and poll until closed or max_polls."""
+        if self._server is None:
+            self.start()
+
+        while not self._stop.is_set():
+            self.poll()
+            if max_polls is not None and self.polls >= max_polls:
+                break
+
+            self._stop.wait(self.interval)
+
+    def close(self) -> None:
+        """Stop polling, disconnect the subscribers and remove the socket."""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            subscription.close()
+
+        if self.path.exists():
+            self.path.unlink()
+
+    def __enter__(self) -> "Hub":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class HubMessage:
+    """Snapshot of a topic received from the hub.
+
+    Args:
+        topic: Name of the topic.
+        response: Same response as the client returns for the request.
+        events: Changes of the predictions since the previous snapshot of the
+            topic. Empty for the locations endpoint.
+
+    """
+
+    __slots__ = ("topic", "response", "events")
+
+    def __init__(self, topic: str, response: Response, events: list[ChangeEvent]):
+        self.topic = topic
+        self.response = response
+        self.events = events
+
+    def __repr__(self) -> str:
+        return (
+            f"HubMessage(topic={self.topic!r}, response={type(self.response).__name__}, "
+            f"events={len(self.events)})"
+        )
+
+
+class Subscriber:
+    """Receive the snapshots published by a Hub.
+
+    Args:
+        path: Path of the Unix socket of the hub.
+        topics: Names of the topics to receive. All of them by default.
+        decoder: Decoder of the payloads. The fastest installed one by
+            default. The headers are always decoded as plain JSON.
+        timeout: Seconds to wait for a snapshot. None to wait forever.
+
+    Examples:
+        Use the shared feed instead of a client.
+
+        >>> with Subscriber("/tmp/cta.sock", topics=["blue"]) as subscriber:
+        ...     df_trains = subscriber.snapshot("blue").to_frame()
+        ...     for message in subscriber:
+        ...         print(message.topic, len(message.response.to_records()))
+
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        topics: Optional[list[str]] = None,
+        decoder: Optional[Decoder] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.decoder = decoder or default_decoder()
+        self.latest: dict[str, Response] = {}
+        self._predictions: dict[str, dict[Key, Arrival]] = {}
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(str(path))
+        self._socket.sendall(json.dumps({"topics": topics}).encode() + b"\n")
+        self._file = self._socket.makefile("rb")
+
+    def receive(self) -> HubMessage:
+        """Wait for the next snapshot of the topics."""
+        header = self._file.readline()
+        payload = self._file.readline()
+        if not payload:
+            raise HubClosedError("The hub closed the connection.")
+
+        header = json.loads(header)
+        topic = header["topic"]
+        response = RESPONSE_TYPES[header["endpoint"]](
+            data=self.decoder.decode(payload)
+        )
+
+        events = []
+        if isinstance(response, ETAResponse):
+            current = {
+                (arrival.rn, arrival.staId): arrival
+                for arrival in response.iter_records()
+            }
+            events = diff(self._predictions.get(topic, {}), current)
+            self._predictions[topic] = current
+
+        self.latest[topic] = response
+
+        return HubMessage(topic, response, events)
+
+    def snapshot(self, topic: str) -> Response:
+        """Latest response of a topic, waiting for the first one."""
+        while topic not in self.latest:
+            self.receive()
+
+        return self.latest[topic]
+
+    def __iter__(self) -> Iterator[HubMessage]:
+        while True:
+            try:
+                yield self.receive()
+            except HubClosedError:
+                return
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> "Subscriber":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def parse_route(value: str) -> Route:
+    """Route from its name like "green" or its code like "g"."""
+    value = value.lower()
+    for route in Route:
+        if value in (route.name.lower(), route.value):
+            return route
+
+    names = ", ".join(route.name.lower() for route in Route)
+    raise argparse.ArgumentTypeError(f"{value!r} isn't one of {names}.")
+
+
+def build_topics(routes: list[Route], mapids: list[int]) -> list[Topic]:
+    """A locations topic per route and one arrivals topic for all stations."""
+    topics = [Topic(route.name.lower(), "locations", route=route) for route in routes]
+    if mapids:
+        topics.append(Topic("arrivals", "arrivals_bulk", mapid=mapids))
+
+    return topics
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", type=Path, required=True, help="Unix socket.")
+    parser.add_argument(
+        "--route",
+        nargs="*",
+        default=[],
+        type=parse_route,
+        help=(
+            "Routes to publish as locations: "
+            + ", ".join(route.name.lower() for route in Route)
+            + "."
+        ),
+    )
+    parser.add_argument(
+        "--mapid",
+        nargs="*",
+        default=[],
+        type=int,
+        help="Stations to publish as the arrivals topic.",
+    )
+    parser.add_argument("--interval", type=float, default=30, help="Seconds.")
+    args = parser.parse_args(argv)
+
+    from cta.client import CTAClient
+
+    topics = build_topics(args.route, args.mapid)
+    if not topics:
+        parser.error("Give at least one route or mapid.")
+
+    with Hub(CTAClient(), args.socket, topics, interval=args.interval) as hub:
+        try:
+            hub.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""Counters and latency histograms of the requests and responses.
+
+Instrumentation is off unless an Instrumentation is passed to the client.
+Without one, the hot paths only check for None.
+
+"""
+
+import threading
+
+import time
+
+from bisect import bisect_left
+
+from contextlib import nullcontext
+
+from typing import Callable, ContextManager, Optional
+
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+Labels = tuple[tuple[str, str], ...]
+Hook = Callable[[str, str, float, Optional[BaseException]], None]
+
+
+class Histogram:
+    """Counts of the observed values per upper bound of their bucket.
+
+    Args:
+        buckets: Sorted upper bounds of the buckets. A last bucket catches
+            the values above them.
+
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Number of values at most each bound, ending with infinity."""
+        bounds = [*self.buckets, float("inf")]
+        total = 0
+        cumulative = []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            cumulative.append((bound, total))
+
+        return cumulative
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile."""
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+
+        return float("inf")
+
+
+class MetricsRegistry:
+    """Named counters and histograms with labels, shared between threads.
+
+    Args:
+        buckets: Upper bounds in seconds of the histogram buckets.
+
+    Examples:
+        Count events and export them for Prometheus.
+
+        >>> registry = MetricsRegistry()
+        >>> registry.inc("requests_total", endpoint="arrivals")
+        >>> print(registry.to_prometheus())
+
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters: dict[str, dict[Labels, float]] = {}
+        self.histograms: dict[str, dict[Labels, Histogram]] = {}
+        self.descriptions: dict[str, str] = {}
+
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, description: str) -> None:
+        self.descriptions[name] = description
+
+    @staticmethod
+    def _labels(labels: dict[str, str]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Current value of a counter. 0 if never incremented."""
+        return self.counters.get(name, {}).get(self._labels(labels), 0)
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self.histograms.get(name, {}).get(self._labels(labels))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_prometheus(self, prefix: str = "cta_") -> str:
+        """All the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.extend(self._header(prefix + name, name, "counter"))
+                for labels, value in series.items():
+                    lines.append(f"{prefix}{name}{_format_labels(labels)} {value:g}")
+
+            for name, series in sorted(self.histograms.items()):
+                lines.extend(self._header(prefix + name, name, "histogram"))
+                for labels, histogram in series.items():
+                    for bound, total in histogram.cumulative():
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        bucket_labels = _format_labels((*labels, ("le", le)))
+                        lines.append(f"{prefix}{name}_bucket{bucket_labels} {total}")
+                    lines.append(
+                        f"{prefix}{name}_sum{_format_labels(labels)} {histogram.sum:g}"
+                    )
+                    lines.append(
+                        f"{prefix}{name}_count{_format_labels(labels)} {histogram.count}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+    def _header(self, full_name: str, name: str, type: str) -> list[str]:
+        header = []
+        if name in self.descriptions:
+            header.append(f"# HELP {full_name} {self.descriptions[name]}")
+        header.append(f"# TYPE {full_name} {type}")
+
+        return header
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Stage:
+    """Time a block of code as a stage of an endpoint. Not to be used by itself."""
+
+    __slots__ = ("instrumentation", "stage", "endpoint", "started")
+
+    def __init__(self, instrumentation: "Instrumentation", stage: str, endpoint: str):
+        self.instrumentation = instrumentation
+        self.stage = stage
+        self.endpoint = endpoint
+
+    def __enter__(self) -> "Stage":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        seconds = time.perf_counter() - self.started
+        self.instrumentation.record(self.stage, self.endpoint, seconds, error=exc)
+
+
+class Instrumentation:
+    """Metrics and hooks for the stages of the requests and responses.
+
+    The stages are request (the whole call including the cache), transport
+    (sending the request and reading the body), server (time until the
+    response headers when the transport knows it), decode (JSON), check_input
+    and to_frame. Each one is observed in the stage_seconds histogram and
+    errors are counted in errors_total.
+
+    Args:
+        registry: Registry of the metrics. A new one by default.
+        hooks: Callables taking the stage, endpoint, seconds and the error
+            raised if any, called after each stage.
+
+    Examples:
+        Find out where the time of a refresh goes.
+
+        >>> instrumentation = Instrumentation()
+        >>> cta = CTAClient(instrumentation=instrumentation)
+        >>> df_arrivals = cta.arrivals(mapid=40590).to_frame()
+        >>> print(instrumentation.registry.to_prometheus())
+
+    """
+
+    def __init__(
+        self,
+        registry: Optional[MetricsRegistry] = None,
+        hooks: Optional[list[Hook]] = None,
+    ):
+        self.registry = registry or MetricsRegistry()
+        self.hooks: list[Hook] = list(hooks or [])
+
+        self.registry.describe(
+            "stage_seconds", "Seconds spent in each stage of the endpoints."
+        )
+        self.registry.describe("requests_total", "Requests made per endpoint.")
+        self.registry.describe("errors_total", "Errors raised per endpoint and stage.")
+        self.registry.describe(
+            "unchanged_total", "Bodies identical to the previous one of the request."
+        )
+
+    def add_hook(self, hook: Hook) -> None:
+        self.hooks.append(hook)
+
+    def stage(self, stage: str, endpoint: str) -> Stage:
+        """Context manager timing a stage."""
+        return Stage(self, stage, endpoint)
+
+    def record(
+        self,
+        stage: str,
+        endpoint: str,
+        seconds: float,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        self.registry.observe("stage_seconds", seconds, endpoint=endpoint, stage=stage)
+        if stage == "request":
+            self.registry.inc("requests_total", endpoint=endpoint)
+        if error is not None:
+            self.registry.inc(
+                "errors_total",
+                endpoint=endpoint,
+                stage=stage,
+                error=type(error).__name__,
+            )
+
+        for hook in self.hooks:
+            hook(stage, endpoint, seconds, error)
+
+
+_DISABLED = nullcontext()
+
+
+def timed(
+    instrumentation: Optional[Instrumentation], stage: str, endpoint: str
+) -> ContextManager:
+    """Time the stage if instrumentation is enabled, otherwise do nothing."""
+    if instrumentation is None:
+        return _DISABLED
+
+    return instrumentation.stage(stage, endpoint)
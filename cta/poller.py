@@ -0,0 +1,227 @@
+import time
+
+from enum import Enum
+
+from typing import AsyncIterator, Callable, Iterator, Optional, Union
+
+from cta._lazy import LazyModule
+from cta.client import REQUEST_ERRORS
+from cta.records import Arrival
+from cta.route import Route
+
+
+asyncio = LazyModule("asyncio")
+
+
+Key = tuple[str, int]
+
+
+class EventType(Enum):
+    """Kinds of changes between two polls of the arrivals."""
+
+    NEW = "new"
+    UPDATED = "updated"
+    DEPARTED = "departed"
+    DELAY_CHANGED = "delay_changed"
+
+
+class ChangeEvent:
+    """Change of a train prediction at a station between two polls.
+
+    Args:
+        type: Kind of change.
+        arrival: Latest prediction. The last seen one for departed trains.
+        previous: Prediction of the previous poll. None for new trains.
+
+    """
+
+    __slots__ = ("type", "arrival", "previous")
+
+    def __init__(
+        self, type: EventType, arrival: Arrival, previous: Optional[Arrival] = None
+    ):
+        self.type = type
+        self.arrival = arrival
+        self.previous = previous
+
+    @property
+    def rn(self) -> str:
+        return self.arrival.rn
+
+    @property
+    def staId(self) -> int:
+        return self.arrival.staId
+
+    @property
+    def key(self) -> Key:
+        return (self.arrival.rn, self.arrival.staId)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ChangeEvent):
+            return NotImplemented
+
+        return (self.type, self.arrival, self.previous) == (
+            other.type,
+            other.arrival,
+            other.previous,
+        )
+
+    def __repr__(self) -> str:
+        return f"ChangeEvent(type={self.type}, key={self.key!r})"
+
+
+def diff(
+    previous: dict[Key, Arrival], current: dict[Key, Arrival]
+) -> list[ChangeEvent]:
+    """Changes between two snapshots of predictions keyed by rn and staId.
+
+    Args:
+        previous: Predictions of the last poll.
+        current: Predictions of the new poll.
+
+    Returns:
+        Events in the order of the current snapshot followed by the departed
+        trains.
+
+    """
+    events = []
+    for key, arrival in current.items():
+        before = previous.get(key)
+        if before is None:
+            events.append(ChangeEvent(EventType.NEW, arrival))
+            continue
+
+        if before.isDly != arrival.isDly:
+            events.append(ChangeEvent(EventType.DELAY_CHANGED, arrival, before))
+
+        if before.arrT != arrival.arrT or before.isApp != arrival.isApp:
+            events.append(ChangeEvent(EventType.UPDATED, arrival, before))
+
+    for key, before in previous.items():
+        if key not in current:
+            events.append(ChangeEvent(EventType.DEPARTED, before, before))
+
+    return events
+
+
+class Poller:
+    """Poll the arrivals of stations and yield only what changed.
+
+    The predictions are keyed by the run number and station. Each poll is
+    compared to the previous one so consumers only handle the new runs,
+    updated arrival times, departed trains and flipped delay flags.
+
+    Works with a CTAClient by iterating and with an AsyncCTAClient by async
+    iterating. Failed polls, like timeouts or API errors, are passed to
+    on_error and the iteration keeps polling with the last known state.
+
+    Args:
+        client: CTAClient or AsyncCTAClient used for the requests.
+        mapid: Station ids or names to poll. Any number of them.
+        stpid: Stop ids to poll. Any number of them.
+        route: Only poll the trains of this route.
+        interval: Seconds between the start of two polls.
+        max_polls: Stop after this many polls, including the failed ones.
+            None to poll forever.
+        on_error: Called with the error of each failed poll.
+
+    Examples:
+        Print the changes at Damen every 30 seconds.
+
+        >>> cta = CTAClient()
+        >>> for event in Poller(cta, mapid=40590, interval=30):
+        ...     print(event.type, event.rn, event.arrival.arrT)
+
+        Same with the asyncio client.
+
+        >>> async for event in Poller(AsyncCTAClient(), mapid=40590):
+        ...     print(event.type, event.rn)
+
+    """
+
+    def __init__(
+        self,
+        client,
+        mapid: Optional[Union[int, str, list[Union[int, str]]]] = None,
+        stpid: Optional[Union[int, list[int]]] = None,
+        route: Optional[Route] = None,
+        interval: float = 30,
+        max_polls: Optional[int] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        self.client = client
+        self.mapid = mapid
+        self.stpid = stpid
+        self.route = route
+        self.interval = interval
+        self.max_polls = max_polls
+        self.on_error = on_error
+
+        self.state: dict[Key, Arrival] = {}
+        self.polls = 0
+        self.errors = 0
+
+    def _update(self, arrivals: list[Arrival]) -> list[ChangeEvent]:
+        current = {(arrival.rn, arrival.staId): arrival for arrival in arrivals}
+        events = diff(self.state, current)
+        self.state = current
+        self.polls += 1
+
+        return events
+
+    def poll(self) -> list[ChangeEvent]:
+        """Fetch the arrivals once and return the changes since the last poll."""
+        response = self.client.arrivals_bulk(
+            mapid=self.mapid, stpid=self.stpid, route=self.route
+        )
+
+        return self._update(response.to_records())
+
+    async def apoll(self) -> list[ChangeEvent]:
+        """Async version of poll."""
+        response = await self.client.arrivals_bulk(
+            mapid=self.mapid, stpid=self.stpid, route=self.route
+        )
+
+        return self._update(response.to_records())
+
+    def _failed(self, error: Exception) -> list[ChangeEvent]:
+        self.polls += 1
+        self.errors += 1
+        if self.on_error is not None:
+            self.on_error(error)
+
+        return []
+
+    def _done(self) -> bool:
+        return self.max_polls is not None and self.polls >= self.max_polls
+
+    def _wait(self, started: float) -> float:
+        return max(self.interval - (time.monotonic() - started), 0)
+
+    def __iter__(self) -> Iterator[ChangeEvent]:
+        while not self._done():
+            started = time.monotonic()
+            try:
+                events = self.poll()
+            except REQUEST_ERRORS as e:
+                events = self._failed(e)
+
+            yield from events
+
+            if not self._done():
+                time.sleep(self._wait(started))
+
+    async def __aiter__(self) -> AsyncIterator[ChangeEvent]:
+        while not self._done():
+            started = time.monotonic()
+            try:
+                events = await self.apoll()
+            except REQUEST_ERRORS as e:
+                events = self._failed(e)
+
+            for event in events:
+                yield event
+
+            if not self._done():
+                await asyncio.sleep(self._wait(started))
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import threading
+
+import time
+
+from datetime import datetime, timedelta
+
+from pathlib import Path
+
+from typing import Callable, Optional, Union
+
+from cta._lazy import LazyModule
+
+
+asyncio = LazyModule("asyncio")
+sqlite3 = LazyModule("sqlite3")
+zoneinfo = LazyModule("zoneinfo")
+
+
+class RateLimitExceededError(Exception):
+    """No request can be made right now."""
+
+
+class QuotaExhaustedError(RateLimitExceededError):
+    """The daily transaction budget is used up."""
+
+
+class MemoryCounter:
+    """Daily transaction counter shared by the threads of a process."""
+
+    def __init__(self):
+        self._counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def used(self, day: str) -> int:
+        with self._lock:
+            return self._counts.get(day, 0)
+
+    def try_consume(self, day: str, limit: int) -> bool:
+        """Count one transaction unless the limit would be exceeded."""
+        with self._lock:
+            count = self._counts.get(day, 0)
+            if count >= limit:
+                return False
+
+            self._counts = {day: count + 1}
+
+            return True
+
+
+class SQLiteCounter:
+    """Daily transaction counter shared by all processes using the same file.
+
+    Args:
+        path: Location of the SQLite database. Created if missing.
+        timeout: Seconds to wait for other processes holding the lock.
+
+    """
+
+    def __init__(self, path: Union[str, Path], timeout: float = 5):
+        self.path = Path(path)
+        self.timeout = timeout
+
+        connection = self._connect()
+        try:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS usage (day TEXT PRIMARY KEY, count INTEGER NOT NULL)"
+            )
+        finally:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    def used(self, day: str) -> int:
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT count FROM usage WHERE day = ?", (day,)
+            ).fetchone()
+        finally:
+            connection.close()
+
+        return 0 if row is None else row[0]
+
+    def try_consume(self, day: str, limit: int) -> bool:
+        """Count one transaction unless the limit would be exceeded."""
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT count FROM usage WHERE day = ?", (day,)
+            ).fetchone()
+            count = 0 if row is None else row[0]
+            if count >= limit:
+                connection.execute("ROLLBACK")
+                return False
+
+            connection.execute(
+                "INSERT OR REPLACE INTO usage (day, count) VALUES (?, ?)",
+                (day, count + 1),
+            )
+            connection.execute("DELETE FROM usage WHERE day != ?", (day,))
+            connection.execute("COMMIT")
+
+            return True
+        finally:
+            connection.close()
+
+
+Counter = Union[MemoryCounter, SQLiteCounter]
+
+
+class RateLimiter:
+    """Token bucket rate limiter with a daily transaction budget.
+
+    The bucket limits the requests per second within the process while the
+    budget is tracked with a counter which can be shared between processes.
+
+    Args:
+        rate: Requests per second. None for no per second limit.
+        burst: Maximum number of requests made at once.
+        daily_budget: Transactions allowed per day for the key.
+        mode: What to do without a token. Either "block" to wait for one,
+            "shed" to raise RateLimitExceededError or "cache" to fall back to
+            stale data of the client cache before raising.
+        counter: Counter of the daily transactions. Use a SQLiteCounter to
+            share the budget between processes.
+        timezone: Timezone in which the daily budget resets.
+
+    Examples:
+        Two requests per second shared by every process on the host.
+
+        >>> limiter = RateLimiter(rate=2, counter=SQLiteCounter("/tmp/cta-usage.db"))
+        >>> cta = CTAClient(rate_limiter=limiter)
+        >>> limiter.remaining()
+
+    """
+
+    modes = ("block", "shed", "cache")
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        daily_budget: int = 100_000,
+        mode: str = "block",
+        counter: Optional[Counter] = None,
+        timezone: str = "America/Chicago",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if mode not in self.modes:
+            msg = f"'mode' must be one of {self.modes} not {mode!r}"
+            raise ValueError(msg)
+
+        self.rate = rate
+        self.burst = burst
+        self.daily_budget = daily_budget
+        self.mode = mode
+        self.counter = counter or MemoryCounter()
+        self.timezone = zoneinfo.ZoneInfo(timezone)
+        self.clock = clock
+
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a token for a request, blocking in the block mode."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Async version of acquire.
+
+        Counters other than the MemoryCounter are used from a thread so their
+        disk access doesn't block the event loop.
+
+        """
+        if isinstance(self.counter, MemoryCounter):
+            wait = self._reserve()
+        else:
+            wait = await asyncio.to_thread(self._reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it."""
+        wait = 0.0
+        if self.rate is not None:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens < 1 and self.mode != "block":
+                    msg = f"Rate of {self.rate} requests per second exceeded."
+                    raise RateLimitExceededError(msg)
+
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = -self._tokens / self.rate
+
+        if not self.counter.try_consume(self.today(), self.daily_budget):
+            if self.rate is not None:
+                with self._lock:
+                    self._tokens = min(self.burst, self._tokens + 1)
+
+            msg = f"The daily budget of {self.daily_budget} transactions is used up."
+            raise QuotaExhaustedError(msg)
+
+        return wait
+
+    def today(self) -> str:
+        return datetime.now(self.timezone).date().isoformat()
+
+    def used(self) -> int:
+        """Transactions made today."""
+        return self.counter.used(self.today())
+
+    def remaining(self) -> int:
+        """Transactions left in today's budget."""
+        return max(self.daily_budget - self.used(), 0)
+
+    def seconds_until_reset(self) -> float:
+        now = datetime.now(self.timezone)
+        midnight = datetime.combine(
+            now.date() + timedelta(days=1), datetime.min.time(), tzinfo=self.timezone
+        )
+
+        return (midnight - now).total_seconds()
+
+    def sustainable_rate(self) -> float:
+        """Requests per second which spread the remaining budget until reset."""
+        return self.remaining() / max(self.seconds_until_reset(), 1)
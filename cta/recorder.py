@@ -0,0 +1,362 @@
+"""Archive of the responses in columnar files for later analysis.
+
+Records are appended to Parquet files partitioned by endpoint, day and route
+like `root/locations/date=2022-05-15/route=blue/part-....parquet` and read
+back lazily for a time range.
+
+"""
+
+from __future__ import annotations
+
+import itertools
+
+import os
+
+import threading
+
+import time
+
+from datetime import date, datetime
+
+from pathlib import Path
+
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+from cta._lazy import LazyModule
+from cta.records import (
+    Arrival,
+    Record,
+    TrainPosition,
+    parse_bool,
+    parse_datetime,
+    parse_float,
+    parse_int,
+)
+from cta.responses import Response
+
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+else:
+    pa = LazyModule("pyarrow", extra="arrow")
+    pq = LazyModule("pyarrow.parquet", extra="arrow")
+    ds = LazyModule("pyarrow.dataset", extra="arrow")
+    pd = LazyModule("pandas", extra="pandas")
+
+
+RECORD_TYPES = {
+    "arrivals": Arrival,
+    "follow": Arrival,
+    "locations": TrainPosition,
+}
+
+CATEGORY_FIELDS = {"rt", "staNm", "stpDe", "destNm", "nextStaNm", "train"}
+
+
+def schema_for(record_type: type[Record]) -> pa.Schema:
+    """Compact Arrow schema of the records with the recorded_at column."""
+    types = {
+        parse_int: pa.int32(),
+        parse_float: pa.float64(),
+        parse_bool: pa.bool_(),
+        parse_datetime: pa.timestamp("s"),
+    }
+
+    fields = [pa.field("recorded_at", pa.timestamp("s"))]
+    for name in record_type.__slots__:
+        parse = dict(record_type.fields).get(name)
+        if name in CATEGORY_FIELDS:
+            type_ = pa.dictionary(pa.int16(), pa.string())
+        else:
+            type_ = types.get(parse, pa.string())
+        fields.append(pa.field(name, type_))
+
+    return pa.schema(fields)
+
+
+def route_of(record: Record) -> str:
+    route = getattr(record, "train", None) or getattr(record, "rt", None)
+
+    return str(route).lower() if route else "unknown"
+
+
+class Recorder:
+    """Append the trains of responses to partitioned Parquet files.
+
+    Records are buffered in memory and written in batches, either once
+    flush_rows are buffered or every flush_interval seconds from a background
+    thread. Each flush adds new files so the archive is append only and
+    files are only visible once complete.
+
+    Requires the arrow extra.
+
+    Args:
+        root: Directory of the archive.
+        flush_rows: Number of buffered rows which triggers a flush.
+        flush_interval: Seconds between two background flushes. None to only
+            flush on flush_rows and close.
+
+    Examples:
+        Archive the locations of all trains every minute.
+
+        >>> with Recorder("archive") as recorder:
+        ...     while True:
+        ...         recorder.record(cta.locations(route=list(Route)))
+        ...         time.sleep(60)
+
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        flush_rows: int = 10_000,
+        flush_interval: Optional[float] = 60,
+    ):
+        self.root = Path(root)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+
+        self.rows_written = 0
+        self.files_written = 0
+
+        self._buffers: dict[tuple[str, str, str], list[dict]] = {}
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._error: Optional[BaseException] = None
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if flush_interval is not None:
+            self._thread = threading.Thread(
+                target=self._flush_periodically, name="cta-recorder", daemon=True
+            )
+            self._thread.start()
+
+    def record(self, response: Response, recorded_at: Optional[datetime] = None) -> int:
+        """Buffer the trains of a response.
+
+        Args:
+            response: Response of the arrivals, follow or locations endpoint.
+            recorded_at: Time of the response. Defaults to its timestamp.
+
+        Returns:
+            Number of trains buffered.
+
+        """
+        self._raise_error()
+
+        endpoint = response.endpoint
+        if recorded_at is None:
+            recorded_at = parse_datetime(response.data["ctatt"].get("tmst"))
+        recorded_at = recorded_at or datetime.now()
+        day = recorded_at.date().isoformat()
+
+        n_rows = 0
+        with self._lock:
+            for record in response.iter_records():
+                row = record.to_dict()
+                row["recorded_at"] = recorded_at
+                key = (endpoint, day, route_of(record))
+                self._buffers.setdefault(key, []).append(row)
+                n_rows += 1
+
+            self._buffered += n_rows
+            full = self._buffered >= self.flush_rows
+
+        if full:
+            self.flush()
+
+        return n_rows
+
+    def flush(self) -> None:
+        """Write the buffered rows to new files."""
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+            self._buffered = 0
+
+        with self._write_lock:
+            pending = list(buffers.items())
+            while pending:
+                (endpoint, day, route), rows = pending[0]
+                try:
+                    self._write(endpoint, day, route, rows)
+                except Exception:
+                    self._restore(pending)
+                    raise
+                pending.pop(0)
+
+    def _restore(self, pending: list[tuple[tuple[str, str, str], list[dict]]]) -> None:
+        """Put back the rows which could not be written."""
+        with self._lock:
+            for key, rows in pending:
+                self._buffers[key] = rows + self._buffers.get(key, [])
+                self._buffered += len(rows)
+
+    def _write(self, endpoint: str, day: str, route: str, rows: list[dict]) -> None:
+        schema = schema_for(RECORD_TYPES[endpoint])
+        table = pa.Table.from_pylist(rows, schema=schema)
+
+        directory = self.root / endpoint / f"date={day}" / f"route={route}"
+        directory.mkdir(parents=True, exist_ok=True)
+
+        name = f"part-{time.time_ns()}-{os.getpid()}-{next(self._sequence)}.parquet"
+        tmp_file = directory / f".{name}.tmp"
+        pq.write_table(table, tmp_file, compression="zstd")
+        os.replace(tmp_file, directory / name)
+
+        self.rows_written += len(rows)
+        self.files_written += 1
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self._error = e
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self) -> None:
+        """Stop the background thread and write what is left."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+        self.flush()
+        self._raise_error()
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class ArchiveReader:
+    """Lazily read the archive of a Recorder.
+
+    Only the files of the days in the time range are opened and rows are
+    streamed in batches.
+
+    Args:
+        root: Directory of the archive.
+
+    Examples:
+        Locations of the blue line trains during the morning rush.
+
+        >>> reader = ArchiveReader("archive")
+        >>> df = reader.read(
+        ...     "locations",
+        ...     start=datetime(2022, 5, 16, 7),
+        ...     end=datetime(2022, 5, 16, 9),
+        ...     routes=["blue"],
+        ... )
+
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    def dataset(self, endpoint: str) -> ds.Dataset:
+        partition_schema = pa.schema(
+            [pa.field("date", pa.string()), pa.field("route", pa.string())]
+        )
+        schema = pa.unify_schemas(
+            [schema_for(RECORD_TYPES[endpoint]), partition_schema]
+        )
+
+        return ds.dataset(
+            self.root / endpoint,
+            schema=schema,
+            format="parquet",
+            partitioning=ds.partitioning(partition_schema, flavor="hive"),
+        )
+
+    def _filter(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        routes: Optional[list[str]],
+    ):
+        conditions = []
+        if start is not None:
+            conditions.append(ds.field("date") >= _day(start))
+            conditions.append(
+                ds.field("recorded_at") >= pa.scalar(start, pa.timestamp("s"))
+            )
+        if end is not None:
+            conditions.append(ds.field("date") <= _day(end))
+            conditions.append(
+                ds.field("recorded_at") < pa.scalar(end, pa.timestamp("s"))
+            )
+        if routes is not None:
+            conditions.append(
+                ds.field("route").isin([route.lower() for route in routes])
+            )
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        return expression
+
+    def iter_batches(
+        self,
+        endpoint: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        routes: Optional[list[str]] = None,
+        columns: Optional[list[str]] = None,
+    ) -> Iterator[pa.RecordBatch]:
+        """Stream the rows recorded in [start, end) as Arrow record batches.
+
+        Args:
+            endpoint: One of arrivals, follow or locations.
+            start: First time included. None for the start of the archive.
+            end: First time excluded. None for the end of the archive.
+            routes: Only read these routes like "blue".
+            columns: Only read these columns.
+
+        """
+        if not (self.root / endpoint).exists():
+            return
+
+        columns = columns or schema_for(RECORD_TYPES[endpoint]).names
+        yield from self.dataset(endpoint).to_batches(
+            columns=columns, filter=self._filter(start, end, routes)
+        )
+
+    def read(
+        self,
+        endpoint: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        routes: Optional[list[str]] = None,
+        columns: Optional[list[str]] = None,
+    ) -> pd.DataFrame:
+        """Rows recorded in [start, end) as a DataFrame. See iter_batches."""
+        schema = schema_for(RECORD_TYPES[endpoint])
+        columns = columns or schema.names
+        if not (self.root / endpoint).exists():
+            return schema.empty_table().select(columns).to_pandas()
+
+        table = self.dataset(endpoint).to_table(
+            columns=columns, filter=self._filter(start, end, routes)
+        )
+
+        return table.to_pandas()
+
+
+def _day(value: Union[date, datetime]) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+
+    return value.isoformat()
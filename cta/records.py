@@ -0,0 +1,192 @@
+from datetime import datetime
+
+from typing import Any, Callable, Optional
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    if value is None:
+        return None
+
+    return datetime.fromisoformat(value)
+
+
+def parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_bool(value: Optional[str]) -> bool:
+    return value == "1"
+
+
+def parse_str(value: Any) -> Any:
+    return value
+
+
+class Record:
+    """Compact train record parsed from the API payload.
+
+    Attributes have the names of the payload fields and of the to_frame
+    columns. Records are equal when all their fields are and are hashed on
+    their identity fields so they can be kept in sets or used as keys. Don't
+    change those fields while a record is in a set. Not to be used by itself.
+
+    """
+
+    __slots__ = ()
+
+    fields: tuple[tuple[str, Callable[[Any], Any]], ...] = ()
+    identity: tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        record = cls.__new__(cls)
+        for name, parse in cls.fields:
+            setattr(record, name, parse(data.get(name)))
+
+        return record
+
+    def to_dict(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def mins_til_arrival(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now()
+
+        return (self.arrT - now).total_seconds() / 60
+
+    def mins_since_prediction(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now()
+
+        return (now - self.prdt).total_seconds() / 60
+
+    def __eq__(self, other) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+
+        return self.to_dict() == other.to_dict()
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.identity))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+
+        return f"{type(self).__name__}({fields})"
+
+
+class Arrival(Record):
+    """Prediction of a train arriving at a station.
+
+    Returned for the arrivals and follow endpoints. The follow endpoint
+    doesn't include the position of the train so lat, lon and heading are
+    None.
+
+    """
+
+    __slots__ = (
+        "staId",
+        "stpId",
+        "staNm",
+        "stpDe",
+        "rn",
+        "rt",
+        "destSt",
+        "destNm",
+        "trDr",
+        "prdt",
+        "arrT",
+        "isApp",
+        "isSch",
+        "isDly",
+        "isFlt",
+        "flags",
+        "lat",
+        "lon",
+        "heading",
+    )
+
+    fields = (
+        ("staId", parse_int),
+        ("stpId", parse_int),
+        ("staNm", parse_str),
+        ("stpDe", parse_str),
+        ("rn", parse_str),
+        ("rt", parse_str),
+        ("destSt", parse_int),
+        ("destNm", parse_str),
+        ("trDr", parse_int),
+        ("prdt", parse_datetime),
+        ("arrT", parse_datetime),
+        ("isApp", parse_bool),
+        ("isSch", parse_bool),
+        ("isDly", parse_bool),
+        ("isFlt", parse_bool),
+        ("flags", parse_str),
+        ("lat", parse_float),
+        ("lon", parse_float),
+        ("heading", parse_int),
+    )
+    identity = ("rn", "staId", "arrT")
+
+
+class TrainPosition(Record):
+    """Position of a train and its next stop from the locations endpoint.
+
+    The train attribute is the route name like the column of
+    LocationResponse.to_frame.
+
+    """
+
+    __slots__ = (
+        "rn",
+        "destSt",
+        "destNm",
+        "trDr",
+        "nextStaId",
+        "nextStpId",
+        "nextStaNm",
+        "prdt",
+        "arrT",
+        "isApp",
+        "isDly",
+        "flags",
+        "lat",
+        "lon",
+        "heading",
+        "train",
+    )
+
+    fields = (
+        ("rn", parse_str),
+        ("destSt", parse_int),
+        ("destNm", parse_str),
+        ("trDr", parse_int),
+        ("nextStaId", parse_int),
+        ("nextStpId", parse_int),
+        ("nextStaNm", parse_str),
+        ("prdt", parse_datetime),
+        ("arrT", parse_datetime),
+        ("isApp", parse_bool),
+        ("isDly", parse_bool),
+        ("flags", parse_str),
+        ("lat", parse_float),
+        ("lon", parse_float),
+        ("heading", parse_int),
+    )
+    identity = ("rn", "prdt")
+
+    @classmethod
+    def from_dict(cls, data: dict, train: Optional[str] = None):
+        record = super().from_dict(data)
+        record.train = train
+
+        return record
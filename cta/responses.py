@@ -1,48 +1,133 @@
-import pandas as pd
+from __future__ import annotations
 
-from typing import Union
+from typing import TYPE_CHECKING, Iterator, Optional, Union
 
 from abc import ABC, abstractmethod
 
+from cta._lazy import LazyModule
+from cta.metrics import Instrumentation, timed
+from cta.records import Arrival, Record, TrainPosition
+
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = LazyModule("numpy", extra="pandas")
+    pd = LazyModule("pandas", extra="pandas")
+
 
 class NoTrainsError(Exception):
     """Exception if no values are returned"""
 
 
 class Trains:
-    """Class to process train level data."""
+    """Class to process train level data.
+
+    The records are transposed into columns once and each column is converted
+    to a compact dtype before building the DataFrame. The columns relative to
+    the current time are added on top of the base frame.
+
+    """
+
+    datetime_format = "%Y-%m-%dT%H:%M:%S"
+    datetime_columns = ["prdt", "arrT"]
+    int_columns = [
+        "staId",
+        "stpId",
+        "destSt",
+        "trDr",
+        "nextStaId",
+        "nextStpId",
+        "heading",
+    ]
+    float_columns = ["lat", "lon"]
+    bool_columns = ["isApp", "isSch", "isDly", "isFlt"]
+    category_columns = ["rt", "staNm", "stpDe", "destNm", "nextStaNm"]
 
     def __init__(self, data: list[dict]):
         self.data = data
 
     def to_frame(self):
-        df_trains = pd.DataFrame.from_records(self.data)
+        return self.add_convenient_columns(self.base_frame())
+
+    def base_frame(self) -> pd.DataFrame:
+        """The trains without the columns depending on the current time."""
+        columns = self._to_columns(self.data)
+
+        return pd.DataFrame(
+            {name: self._convert(name, values) for name, values in columns.items()}
+        )
+
+    def _to_columns(self, records: list[dict]) -> dict[str, list]:
+        names = dict.fromkeys(name for record in records for name in record)
+
+        return {name: [record.get(name) for record in records] for name in names}
 
-        for col in ["prdt", "arrT"]:
-            df_trains[col] = pd.to_datetime(df_trains[col])
+    def _convert(self, name: str, values: list):
+        if name in self.datetime_columns:
+            return pd.to_datetime(values, format=self.datetime_format)
 
-        return self._create_convenient_columns(df_trains)
+        if name in self.int_columns:
+            try:
+                return np.array(values, dtype=np.int32)
+            except (TypeError, ValueError):
+                numeric = pd.to_numeric(pd.Series(values), errors="coerce")
+                return pd.array(numeric, dtype="Int32")
 
-    def _create_convenient_columns(self, df_trains: pd.DataFrame) -> pd.DataFrame:
-        now = pd.Timestamp("now")
-        df_trains["mins_til_arrival"] = (
-            df_trains["arrT"] - now
-        ).dt.total_seconds() / 60
+        if name in self.float_columns:
+            return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy()
 
-        df_trains["mins_since_prediction"] = (
-            now - df_trains["prdt"]
-        ).dt.total_seconds() / 60
+        if name in self.bool_columns:
+            return np.array(values, dtype=object) == "1"
 
-        return df_trains
+        if name in self.category_columns:
+            return pd.Categorical(values)
+
+        return values
+
+    @staticmethod
+    def add_convenient_columns(df_trains: pd.DataFrame, **columns) -> pd.DataFrame:
+        """New frame with the minutes relative to now and then the given columns.
+
+        The frame of the trains is left untouched so it can be reused.
+
+        """
+        now = pd.Timestamp("now").to_datetime64()
+        minute = np.timedelta64(1, "m")
+        convenient = pd.DataFrame(
+            {
+                "mins_til_arrival": (df_trains["arrT"].to_numpy() - now) / minute,
+                "mins_since_prediction": (now - df_trains["prdt"].to_numpy()) / minute,
+                **columns,
+            },
+            index=df_trains.index,
+        )
+
+        return pd.concat([df_trains, convenient], axis=1)
 
 
 class Response(ABC):
-    """Abstract class for a response for the CTA endpoints."""
+    """Abstract class for a response for the CTA endpoints.
+
+    The frame of the trains is built once per response. Later calls of
+    to_frame only copy it and update the columns relative to the current time.
+
+    Args:
+        data: Decoded payload of the endpoint.
+        instrumentation: Optional metrics of the parsing stages.
 
-    def __init__(self, data: dict):
+    """
+
+    endpoint: str = ""
+
+    def __init__(self, data: dict, instrumentation: Optional[Instrumentation] = None):
         self.data = data
+        self.instrumentation = instrumentation
+        self._frame: Optional[pd.DataFrame] = None
 
-        self._check_input()
+        with timed(instrumentation, "check_input", self.endpoint):
+            self._check_input()
 
     def _check_input(self):
         body = self.data["ctatt"]
@@ -50,45 +135,158 @@ class Response(ABC):
             msg = f"Recieved code {body['errCd']} with message: {body['errNm']!r}"
             raise ValueError(msg)
 
-    @abstractmethod
     def to_frame(self) -> pd.DataFrame:
         """Translate the response into DataFrame object."""
+        if self._frame is None:
+            with timed(self.instrumentation, "to_frame", self.endpoint):
+                self._frame = self._base_frame()
+
+        return Trains.add_convenient_columns(self._frame, **self._trailing_columns())
+
+    @abstractmethod
+    def _base_frame(self) -> pd.DataFrame:
+        """The trains without the columns depending on the current time."""
+
+    def _trailing_columns(self) -> dict:
+        """Columns after the ones depending on the current time."""
+        return {}
+
+    @abstractmethod
+    def iter_records(self) -> Iterator[Record]:
+        """Iterate over the trains as compact records without pandas."""
+
+    def to_records(self) -> list[Record]:
+        """All the trains as compact records. Empty if there are no trains."""
+        return list(self.iter_records())
 
 
 class ETAResponse(Response):
     """Common functionality between endpoint data."""
 
-    def to_frame(self) -> pd.DataFrame:
+    def _base_frame(self) -> pd.DataFrame:
         payload = self.data["ctatt"]
         if "eta" not in payload:
             raise NoTrainsError("No trains were found in the response payload.")
 
-        return Trains(payload["eta"]).to_frame()
+        return Trains(payload["eta"]).base_frame()
+
+    def iter_records(self) -> Iterator[Arrival]:
+        for eta in self.data["ctatt"].get("eta", []):
+            yield Arrival.from_dict(eta)
+
+    @classmethod
+    def merge(cls, responses: list[ETAResponse]) -> ETAResponse:
+        """Combine the trains of many responses into a single response.
+
+        Args:
+            responses: Responses from separate requests of the endpoint.
+
+        Returns:
+            Response with all the trains and the latest timestamp.
+
+        """
+        payloads = [response.data["ctatt"] for response in responses]
+        etas = [eta for payload in payloads for eta in payload.get("eta", [])]
+        instrumentation = responses[0].instrumentation if responses else None
+
+        return cls(data=merged_payload(payloads, etas), instrumentation=instrumentation)
+
+
+def merged_payload(payloads: list[dict], etas: list[dict]) -> dict:
+    merged = {
+        "tmst": max(
+            (payload["tmst"] for payload in payloads if payload.get("tmst")),
+            default=None,
+        ),
+        "errCd": "0",
+        "errNm": None,
+    }
+    if etas:
+        merged["eta"] = etas
+
+    return {"ctatt": merged}
 
 
 class ArrivalResponse(ETAResponse):
     """Response from arrivals endpoint."""
 
+    endpoint = "arrivals"
+
 
 class FollowResponse(ETAResponse):
     """Response from follow endpoint."""
 
+    endpoint = "follow"
+
+
+class FollowBulkResponse(FollowResponse):
+    """Combined response from following many trains.
+
+    The trains which could be followed are combined and each prediction is
+    tagged with the run number it was requested for. The errors of the other
+    trains are kept instead of raised.
+
+    Args:
+        responses: Response of each run number which was followed.
+        errors: Error raised for each run number which couldn't be followed.
+        instrumentation: Optional metrics of the parsing stages.
+
+    """
+
+    def __init__(
+        self,
+        responses: dict[str, FollowResponse],
+        errors: Optional[dict[str, Exception]] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
+        self.responses = responses
+        self.errors = errors or {}
+
+        payloads = [response.data["ctatt"] for response in responses.values()]
+        etas = [
+            {**eta, "rn": runnumber}
+            for runnumber, response in responses.items()
+            for eta in response.data["ctatt"].get("eta", [])
+        ]
+
+        super().__init__(
+            data=merged_payload(payloads, etas), instrumentation=instrumentation
+        )
+
 
 class LocationResponse(Response):
     """Response from location endpoint."""
 
-    def to_frame(self) -> pd.DataFrame:
-        dfs = [
-            Trains(data=self._ensure_list(route["train"]))
-            .to_frame()
-            .assign(train=route["@name"])
-            for route in self.data["ctatt"]["route"]
-            if "train" in route
-        ]
-        if not dfs:
+    endpoint = "locations"
+
+    def _base_frame(self) -> pd.DataFrame:
+        trains = []
+        names = []
+        for name, train in self._iter_trains():
+            trains.append(train)
+            names.append(name)
+
+        if not trains:
             raise NoTrainsError("No trains were found in the response payload.")
 
-        return pd.concat(dfs, ignore_index=True)
+        self._names = pd.Categorical(names)
+
+        return Trains(data=trains).base_frame()
+
+    def _trailing_columns(self) -> dict:
+        return {"train": self._names}
+
+    def iter_records(self) -> Iterator[TrainPosition]:
+        for name, train in self._iter_trains():
+            yield TrainPosition.from_dict(train, train=name)
+
+    def _iter_trains(self) -> Iterator[tuple[str, dict]]:
+        for route in self.data["ctatt"]["route"]:
+            if "train" not in route:
+                continue
+
+            for train in self._ensure_list(route["train"]):
+                yield route["@name"], train
 
     def _ensure_list(self, value: Union[dict, list]) -> list:
         """Case that there is only one train currently"""
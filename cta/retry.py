@@ -0,0 +1,195 @@
+import random
+
+import threading
+
+import time
+
+from collections import deque
+
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from cta._lazy import LazyModule
+from cta.transport import (
+    HTTPStatusError,
+    TransportConnectionError,
+    TransportTimeoutError,
+)
+
+
+asyncio = LazyModule("asyncio")
+
+
+class RetryStats:
+    """Counters and latencies of the calls made through a RetryPolicy.
+
+    Args:
+        max_latencies: Number of recent call latencies to keep.
+
+    Attributes:
+        calls: Number of calls made.
+        attempts: Number of attempts over all calls.
+        retries: Number of attempts after the first.
+        failures: Number of calls which failed after every attempt.
+        latencies: Seconds taken by the recent calls including the retries.
+
+    """
+
+    def __init__(self, max_latencies: int = 1000):
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.latencies: deque[float] = deque(maxlen=max_latencies)
+
+        self._lock = threading.Lock()
+
+    def record(self, attempts: int, latency: float, failed: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self.attempts += attempts
+            self.retries += attempts - 1
+            self.failures += failed
+            self.latencies.append(latency)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Latency in seconds of the q-th percentile of the recent calls."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+
+        if not latencies:
+            return None
+
+        index = min(int(q / 100 * len(latencies)), len(latencies) - 1)
+
+        return latencies[index]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "p50": self.latency_percentile(50),
+            "p99": self.latency_percentile(99),
+        }
+
+
+class RetryPolicy:
+    """Retry transient failures with exponential backoff and jitter.
+
+    Timeouts, connection errors and the retryable status codes are retried.
+    Any other error is raised right away. Once out of attempts or time, the
+    last error is raised.
+
+    Args:
+        max_attempts: Maximum number of attempts per call including the first.
+        backoff: Seconds to wait before the first retry. Doubled for every
+            following retry.
+        max_backoff: Maximum seconds to wait between attempts.
+        jitter: Wait a random duration up to the backoff to spread the retries
+            of many clients.
+        retry_statuses: HTTP status codes which are retried.
+        deadline: Maximum total seconds for a call including the waits. It
+            is checked before each retry, so no retry is started when its
+            wait would end past the deadline. An attempt already in
+            progress isn't interrupted and is only bounded by the timeout
+            of the transport.
+
+    Attributes:
+        stats: RetryStats of the calls made.
+
+    Examples:
+        Try up to 5 times within 20 seconds.
+
+        >>> cta = CTAClient(retry=RetryPolicy(max_attempts=5, deadline=20))
+        >>> cta.retry.stats.to_dict()
+
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 10,
+        jitter: bool = True,
+        retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+        deadline: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_attempts < 1:
+            raise ValueError("'max_attempts' must be at least 1.")
+
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.deadline = deadline
+        self.clock = clock
+
+        self.stats = RetryStats()
+
+    def is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, HTTPStatusError):
+            return error.status_code in self.retry_statuses
+
+        return isinstance(error, (TransportTimeoutError, TransportConnectionError))
+
+    def backoff_for(self, attempt: int) -> float:
+        """Seconds to wait after the given failed attempt."""
+        backoff = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            backoff = random.uniform(0, backoff)
+
+        return backoff
+
+    def _next_wait(self, error: Exception, attempt: int, start: float) -> float:
+        """Seconds to wait before the next attempt or raise the error."""
+        if attempt >= self.max_attempts or not self.is_retryable(error):
+            raise error
+
+        wait = self.backoff_for(attempt)
+        if self.deadline is not None and self.clock() - start + wait > self.deadline:
+            raise error
+
+        return wait
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        """Call func until it succeeds or the policy gives up."""
+        start = self.clock()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = func()
+            except Exception as e:
+                try:
+                    wait = self._next_wait(e, attempt, start)
+                except Exception:
+                    self.stats.record(attempt, self.clock() - start, failed=True)
+                    raise
+
+                time.sleep(wait)
+            else:
+                self.stats.record(attempt, self.clock() - start, failed=False)
+                return result
+
+    async def acall(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Async version of call."""
+        start = self.clock()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await func()
+            except Exception as e:
+                try:
+                    wait = self._next_wait(e, attempt, start)
+                except Exception:
+                    self.stats.record(attempt, self.clock() - start, failed=True)
+                    raise
+
+                await asyncio.sleep(wait)
+            else:
+                self.stats.record(attempt, self.clock() - start, failed=False)
+                return result
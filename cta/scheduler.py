@@ -0,0 +1,324 @@
+import time
+
+from datetime import datetime
+
+from typing import Callable, Iterator, Optional
+
+from cta._lazy import LazyModule
+from cta.client import REQUEST_ERRORS
+from cta.records import Arrival, parse_datetime
+from cta.responses import ArrivalResponse
+
+
+asyncio = LazyModule("asyncio")
+
+
+class StationSchedule:
+    """Polling state of a single station.
+
+    Attributes:
+        mapid: Id of the station.
+        last_polled: Clock time of the last poll. None if never polled.
+        interval: Seconds wanted between two polls.
+        soonest: Minutes until the next train arrives. None without trains.
+        prdt: Latest prediction time seen for the station.
+        fresh: Whether the last poll returned a newer prediction.
+
+    """
+
+    __slots__ = ("mapid", "last_polled", "interval", "soonest", "prdt", "fresh")
+
+    def __init__(self, mapid: int, interval: float):
+        self.mapid = mapid
+        self.last_polled: Optional[float] = None
+        self.interval = interval
+        self.soonest: Optional[float] = None
+        self.prdt: Optional[datetime] = None
+        self.fresh = True
+
+    def lateness(self, now: float) -> float:
+        """Seconds since the last poll relative to the interval. Due from 1."""
+        if self.last_polled is None:
+            return float("inf")
+
+        return (now - self.last_polled) / self.interval
+
+    def __repr__(self) -> str:
+        return (
+            f"StationSchedule(mapid={self.mapid!r}, interval={self.interval:.1f}, "
+            f"soonest={self.soonest!r})"
+        )
+
+
+class PollScheduler:
+    """Poll the arrivals of stations as often as their trains need.
+
+    Each station gets an interval from the minutes until its next train
+    arrives: stations with a train about to arrive are polled every
+    min_interval while quiet stations are only polled every max_interval.
+    The interval is stretched when a poll returned no newer prediction
+    (prdt) than the previous one.
+
+    Requests are made at most rate times per second. Each one asks for the
+    up to 4 due stations which are the most late relative to their interval.
+    When a request fails, its stations are pushed back by stale_backoff, the
+    error is passed to on_error and the scheduler keeps running.
+
+    Args:
+        client: CTAClient or AsyncCTAClient used for the requests.
+        mapids: Station ids to poll.
+        rate: Requests per second to spend. Use
+            RateLimiter.sustainable_rate to spread a daily budget.
+        min_interval: Shortest seconds between two polls of a station.
+        max_interval: Longest seconds between two polls of a station.
+        proximity: Fraction of the time until the next arrival to wait.
+        stale_backoff: Factor of the interval when no newer prediction came
+            or the request failed.
+        clock: Function returning the current time in seconds.
+        on_error: Called with the error of each failed request.
+
+    Examples:
+        Keep 20 stations fresh within one request every 2 seconds.
+
+        >>> scheduler = PollScheduler(cta, mapids=mapids, rate=0.5)
+        >>> for mapids, arrival_response in scheduler.run():
+        ...     print(mapids, len(arrival_response.to_records()))
+
+    """
+
+    def __init__(
+        self,
+        client,
+        mapids: list[int],
+        rate: float = 1,
+        min_interval: float = 15,
+        max_interval: float = 300,
+        proximity: float = 0.5,
+        stale_backoff: float = 2,
+        clock: Callable[[], float] = time.monotonic,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        if rate <= 0:
+            msg = f"'rate' must be positive not {rate!r}"
+            raise ValueError(msg)
+
+        self.client = client
+        self.rate = rate
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.proximity = proximity
+        self.stale_backoff = stale_backoff
+        self.clock = clock
+        self.on_error = on_error
+
+        self.stations = {
+            int(mapid): StationSchedule(int(mapid), interval=min_interval)
+            for mapid in mapids
+        }
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def batch_size(self) -> int:
+        return self.client.max_number_params
+
+    def interval_for(self, station: StationSchedule) -> float:
+        """Seconds to wait before polling the station again."""
+        if station.soonest is None:
+            interval = self.max_interval
+        else:
+            interval = station.soonest * 60 * self.proximity
+
+        if not station.fresh:
+            interval *= self.stale_backoff
+
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def due(self, now: Optional[float] = None) -> list[int]:
+        """Due stations from the most to the least late."""
+        now = self.clock() if now is None else now
+        late = [
+            (station.lateness(now), mapid)
+            for mapid, station in self.stations.items()
+            if station.lateness(now) >= 1
+        ]
+        late.sort(key=lambda item: item[0], reverse=True)
+
+        return [mapid for _, mapid in late]
+
+    def next_batch(self, now: Optional[float] = None) -> list[int]:
+        """Stations to ask for in the next request. Empty if none are due."""
+        return self.due(now)[: self.batch_size]
+
+    def seconds_until_due(self, now: Optional[float] = None) -> float:
+        """Seconds until the next station is due."""
+        now = self.clock() if now is None else now
+        waits = [
+            (
+                station.last_polled + station.interval - now
+                if station.last_polled is not None
+                else 0
+            )
+            for station in self.stations.values()
+        ]
+
+        return max(min(waits, default=self.max_interval), 0)
+
+    def update(
+        self,
+        mapids: list[int],
+        arrivals: list[Arrival],
+        now: Optional[float] = None,
+        at: Optional[datetime] = None,
+    ) -> None:
+        """Reschedule the polled stations from their arrivals.
+
+        Args:
+            mapids: Stations of the request.
+            arrivals: Predictions returned for them.
+            now: Clock time of the request.
+            at: Time of the response to compute the minutes until arrival.
+
+        """
+        now = self.clock() if now is None else now
+        at = at or datetime.now()
+
+        by_station: dict[int, list[Arrival]] = {mapid: [] for mapid in mapids}
+        for arrival in arrivals:
+            if arrival.staId in by_station:
+                by_station[arrival.staId].append(arrival)
+
+        for mapid, station_arrivals in by_station.items():
+            station = self.stations[mapid]
+            station.last_polled = now
+
+            minutes = [
+                max(arrival.mins_til_arrival(at), 0)
+                for arrival in station_arrivals
+                if arrival.arrT is not None
+            ]
+            station.soonest = min(minutes, default=None)
+
+            prdt = max(
+                (a.prdt for a in station_arrivals if a.prdt is not None), default=None
+            )
+            station.fresh = station.prdt is None or (
+                prdt is not None and prdt > station.prdt
+            )
+            station.prdt = prdt or station.prdt
+
+            station.interval = self.interval_for(station)
+
+    def failed(self, mapids: list[int], now: Optional[float] = None) -> None:
+        """Push back the stations of a failed request."""
+        now = self.clock() if now is None else now
+        for mapid in mapids:
+            station = self.stations[mapid]
+            station.last_polled = now
+            station.interval = min(
+                max(station.interval * self.stale_backoff, self.min_interval),
+                self.max_interval,
+            )
+
+        self.requests += 1
+        self.errors += 1
+
+    def _response_time(self, response: ArrivalResponse) -> datetime:
+        tmst = response.data["ctatt"].get("tmst")
+
+        return parse_datetime(tmst) if tmst else datetime.now()
+
+    def step(self) -> Optional[tuple[list[int], ArrivalResponse]]:
+        """Request the next batch of due stations if any.
+
+        The stations of a failed request are pushed back before its error is
+        raised.
+
+        """
+        now = self.clock()
+        mapids = self.next_batch(now)
+        if not mapids:
+            return None
+
+        try:
+            response = self.client.arrivals(mapid=mapids)
+        except REQUEST_ERRORS:
+            self.failed(mapids, now=now)
+            raise
+
+        self.update(
+            mapids, response.to_records(), now=now, at=self._response_time(response)
+        )
+        self.requests += 1
+
+        return mapids, response
+
+    async def astep(self) -> Optional[tuple[list[int], ArrivalResponse]]:
+        """Async version of step."""
+        now = self.clock()
+        mapids = self.next_batch(now)
+        if not mapids:
+            return None
+
+        try:
+            response = await self.client.arrivals(mapid=mapids)
+        except REQUEST_ERRORS:
+            self.failed(mapids, now=now)
+            raise
+
+        self.update(
+            mapids, response.to_records(), now=now, at=self._response_time(response)
+        )
+        self.requests += 1
+
+        return mapids, response
+
+    def _report(self, error: Exception) -> None:
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def _wait(self, started: float) -> float:
+        return max(1 / self.rate - (self.clock() - started), self.seconds_until_due())
+
+    def run(
+        self, max_requests: Optional[int] = None
+    ) -> Iterator[tuple[list[int], ArrivalResponse]]:
+        """Poll forever, yielding the stations and response of each request.
+
+        Args:
+            max_requests: Stop after this many requests. None to run forever.
+
+        """
+        while max_requests is None or self.requests < max_requests:
+            started = self.clock()
+            try:
+                result = self.step()
+            except REQUEST_ERRORS as e:
+                result = None
+                self._report(e)
+
+            if result is not None:
+                yield result
+
+            if max_requests is not None and self.requests >= max_requests:
+                break
+
+            time.sleep(self._wait(started))
+
+    async def arun(self, max_requests: Optional[int] = None):
+        """Async version of run."""
+        while max_requests is None or self.requests < max_requests:
+            started = self.clock()
+            try:
+                result = await self.astep()
+            except REQUEST_ERRORS as e:
+                result = None
+                self._report(e)
+
+            if result is not None:
+                yield result
+
+            if max_requests is not None and self.requests >= max_requests:
+                break
+
+            await asyncio.sleep(self._wait(started))
@@ -0,0 +1,135 @@
+from bisect import bisect_left
+
+from typing import Hashable, Iterable, Optional
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+class StationIndex:
+    """Search index over the station names built once for many lookups.
+
+    Names are normalized and indexed by their n-grams so a substring search
+    only checks the few names sharing the n-grams of the query. Rows are kept
+    as bitmaps (python ints) so filtering by route is a single and.
+
+    Args:
+        names: Name of the station of each row.
+        groups: Bitmap of the rows in each group like a route.
+        max_n: Longest n-gram indexed.
+
+    Examples:
+        Search rows by name and route.
+
+        >>> index = StationIndex(["Damen", "Damen", "Clark/Lake"], groups={"blue": 0b011})
+        >>> index.search("dam", group="blue")
+        [0, 1]
+
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        groups: Optional[dict[Hashable, int]] = None,
+        max_n: int = 3,
+    ):
+        self.max_n = max_n
+        self.groups = groups or {}
+
+        masks: dict[str, int] = {}
+        n_rows = 0
+        for row, name in enumerate(names):
+            key = normalize(name)
+            masks[key] = masks.get(key, 0) | 1 << row
+            n_rows += 1
+
+        self.n_rows = n_rows
+        self.names = sorted(masks)
+        self.masks = [masks[name] for name in self.names]
+        self.positions = {name: position for position, name in enumerate(self.names)}
+
+        self.ngrams: dict[str, set[int]] = {}
+        for position, name in enumerate(self.names):
+            for gram in self._grams(name):
+                self.ngrams.setdefault(gram, set()).add(position)
+
+    def _grams(self, name: str) -> set[str]:
+        return {
+            name[start : start + n]
+            for n in range(1, self.max_n + 1)
+            for start in range(len(name) - n + 1)
+        }
+
+    def _candidates(self, query: str) -> Iterable[int]:
+        n = min(len(query), self.max_n)
+        postings = [
+            self.ngrams.get(query[start : start + n], set())
+            for start in range(len(query) - n + 1)
+        ]
+        postings.sort(key=len)
+
+        return set.intersection(*postings)
+
+    def mask(self, query: str, prefix: bool = False, exact: bool = False) -> int:
+        """Bitmap of the rows whose name contains, starts with or is the query."""
+        query = normalize(query)
+        if exact:
+            position = self.positions.get(query)
+            return 0 if position is None else self.masks[position]
+
+        if not query:
+            return (1 << self.n_rows) - 1
+
+        if prefix:
+            start = bisect_left(self.names, query)
+            end = bisect_left(self.names, query + "\U0010ffff")
+            positions = range(start, end)
+        else:
+            positions = [
+                position
+                for position in self._candidates(query)
+                if query in self.names[position]
+            ]
+
+        mask = 0
+        for position in positions:
+            mask |= self.masks[position]
+
+        return mask
+
+    def search(
+        self,
+        query: str,
+        group: Optional[Hashable] = None,
+        prefix: bool = False,
+        exact: bool = False,
+    ) -> list[int]:
+        """Rows whose name contains the query.
+
+        Args:
+            query: Part of the name. Case and repeated spaces are ignored.
+            group: Only keep the rows of this group.
+            prefix: Only match names starting with the query.
+            exact: Only match names equal to the query.
+
+        Returns:
+            Sorted row positions.
+
+        """
+        mask = self.mask(query, prefix=prefix, exact=exact)
+        if group is not None:
+            mask &= self.groups.get(group, 0)
+
+        return rows_of(mask)
+
+
+def rows_of(mask: int) -> list[int]:
+    """Positions of the bits set in the mask."""
+    rows = []
+    while mask:
+        low = mask & -mask
+        rows.append(low.bit_length() - 1)
+        mask ^= low
+
+    return rows
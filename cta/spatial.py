@@ -0,0 +1,261 @@
+import heapq
+
+import math
+
+from typing import Iterable, Iterator, Optional, Union
+
+from cta.records import TrainPosition
+from cta.route import Route
+
+
+EARTH_RADIUS = 6_371_000
+CHICAGO_LATITUDE = 41.88
+
+Cell = tuple[int, int]
+Routes = Optional[Union[Route, str, list[Union[Route, str]]]]
+
+
+def route_names(route: Routes) -> Optional[list[str]]:
+    """Names of the routes as in the locations response. None for all."""
+    if route is None:
+        return None
+
+    routes = route if isinstance(route, (list, tuple, set)) else [route]
+
+    return [r.value if isinstance(r, Route) else str(r).lower() for r in routes]
+
+
+class TrainIndex:
+    """Grid index over the positions of the trains for nearby queries.
+
+    Positions are projected to meters around a reference latitude and
+    bucketed into square cells with one grid per route. Each snapshot only
+    moves the trains which changed cell and drops the ones which are gone.
+    Distances are equirectangular which is accurate to a few meters at the
+    scale of the city.
+
+    Args:
+        cell_size: Side of a cell in meters.
+        latitude: Reference latitude of the projection.
+
+    Examples:
+        Keep the index up to date and find the trains near a point.
+
+        >>> index = TrainIndex()
+        >>> index.update(cta.locations(route=list(Route)).iter_records())
+        >>> index.nearest(41.8837, -87.6278, k=3, route=Route.BLUE)
+
+    """
+
+    def __init__(self, cell_size: float = 500, latitude: float = CHICAGO_LATITUDE):
+        self.cell_size = cell_size
+        self.latitude = latitude
+        self._lon_scale = math.cos(math.radians(latitude))
+
+        self.trains: dict[str, TrainPosition] = {}
+        self._points: dict[str, tuple[float, float]] = {}
+        self._cells: dict[str, tuple[str, Cell]] = {}
+        self._grids: dict[str, dict[Cell, set[str]]] = {}
+        self._bounds: Optional[tuple[int, int, int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.trains)
+
+    def __contains__(self, rn: str) -> bool:
+        return rn in self.trains
+
+    def project(self, lat: float, lon: float) -> tuple[float, float]:
+        """Position in meters east and north of the origin."""
+        x = math.radians(lon) * self._lon_scale * EARTH_RADIUS
+        y = math.radians(lat) * EARTH_RADIUS
+
+        return x, y
+
+    def _cell(self, x: float, y: float) -> Cell:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def update(self, positions: Iterable[TrainPosition]) -> None:
+        """Replace the trains by a new snapshot of the positions.
+
+        Trains without a position or missing from the snapshot are removed.
+
+        Args:
+            positions: Records of a LocationResponse.
+
+        """
+        seen = set()
+        for position in positions:
+            if position.lat is None or position.lon is None:
+                continue
+
+            rn = position.rn
+            seen.add(rn)
+            self.add(position)
+
+        for rn in [rn for rn in self.trains if rn not in seen]:
+            self.remove(rn)
+
+    def add(self, position: TrainPosition) -> None:
+        """Add or move a single train."""
+        rn = position.rn
+        route = position.train or ""
+        point = self.project(position.lat, position.lon)
+        cell = self._cell(*point)
+
+        previous = self._cells.get(rn)
+        if previous != (route, cell):
+            if previous is not None:
+                self._discard(rn, *previous)
+            self._grids.setdefault(route, {}).setdefault(cell, set()).add(rn)
+            self._cells[rn] = (route, cell)
+            self._bounds = None
+
+        self.trains[rn] = position
+        self._points[rn] = point
+
+    def remove(self, rn: str) -> None:
+        """Remove a train if indexed."""
+        previous = self._cells.pop(rn, None)
+        if previous is not None:
+            self._discard(rn, *previous)
+            self._bounds = None
+
+        self.trains.pop(rn, None)
+        self._points.pop(rn, None)
+
+    def _discard(self, rn: str, route: str, cell: Cell) -> None:
+        grid = self._grids[route]
+        members = grid[cell]
+        members.discard(rn)
+        if not members:
+            del grid[cell]
+            if not grid:
+                del self._grids[route]
+
+    def _grids_for(self, route: Routes) -> list[dict[Cell, set[str]]]:
+        names = route_names(route)
+        if names is None:
+            return list(self._grids.values())
+
+        return [self._grids[name] for name in names if name in self._grids]
+
+    def _max_radius(self, center: Cell) -> int:
+        """Ring around the center which contains every occupied cell."""
+        if self._bounds is None:
+            xs = [cell[0] for route, cell in self._cells.values()]
+            ys = [cell[1] for route, cell in self._cells.values()]
+            self._bounds = (min(xs), min(ys), max(xs), max(ys))
+
+        x_min, y_min, x_max, y_max = self._bounds
+
+        return max(
+            abs(center[0] - x_min),
+            abs(center[0] - x_max),
+            abs(center[1] - y_min),
+            abs(center[1] - y_max),
+        )
+
+    def _ring(self, center: Cell, radius: int) -> Iterator[Cell]:
+        cx, cy = center
+        if radius == 0:
+            yield center
+            return
+
+        for dx in range(-radius, radius + 1):
+            yield (cx + dx, cy - radius)
+            yield (cx + dx, cy + radius)
+        for dy in range(-radius + 1, radius):
+            yield (cx - radius, cy + dy)
+            yield (cx + radius, cy + dy)
+
+    def _distance(self, point: tuple[float, float], rn: str) -> float:
+        x, y = self._points[rn]
+
+        return math.hypot(x - point[0], y - point[1])
+
+    def nearest(
+        self, lat: float, lon: float, k: int = 1, route: Routes = None
+    ) -> list[tuple[float, TrainPosition]]:
+        """The k trains closest to a point.
+
+        Args:
+            lat: Latitude of the point.
+            lon: Longitude of the point.
+            k: Number of trains.
+            route: Only trains of these routes like Route.BLUE or "blue".
+
+        Returns:
+            Distance in meters and position of the trains, closest first.
+
+        """
+        grids = self._grids_for(route)
+        if not grids or k <= 0:
+            return []
+
+        point = self.project(lat, lon)
+        center = self._cell(*point)
+        max_radius = self._max_radius(center)
+
+        best: list[tuple[float, str]] = []
+        for radius in range(max_radius + 1):
+            for cell in self._ring(center, radius):
+                for grid in grids:
+                    for rn in grid.get(cell, ()):
+                        item = (-self._distance(point, rn), rn)
+                        if len(best) < k:
+                            heapq.heappush(best, item)
+                        elif item > best[0]:
+                            heapq.heapreplace(best, item)
+
+            if len(best) == k and -best[0][0] <= radius * self.cell_size:
+                break
+
+        return [
+            (-distance, self.trains[rn]) for distance, rn in sorted(best, reverse=True)
+        ]
+
+    def within(
+        self, lat: float, lon: float, radius: float, route: Routes = None
+    ) -> list[tuple[float, TrainPosition]]:
+        """The trains within a distance of a point.
+
+        Args:
+            lat: Latitude of the point.
+            lon: Longitude of the point.
+            radius: Distance in meters.
+            route: Only trains of these routes like Route.BLUE or "blue".
+
+        Returns:
+            Distance in meters and position of the trains, closest first.
+
+        """
+        point = self.project(lat, lon)
+        x_min, y_min = self._cell(point[0] - radius, point[1] - radius)
+        x_max, y_max = self._cell(point[0] + radius, point[1] + radius)
+
+        n_cells = (x_max - x_min + 1) * (y_max - y_min + 1)
+
+        found = []
+        for grid in self._grids_for(route):
+            if n_cells > len(grid):
+                cells = [
+                    cell
+                    for cell in grid
+                    if x_min <= cell[0] <= x_max and y_min <= cell[1] <= y_max
+                ]
+            else:
+                cells = [
+                    (x, y)
+                    for x in range(x_min, x_max + 1)
+                    for y in range(y_min, y_max + 1)
+                ]
+
+            for cell in cells:
+                for rn in grid.get(cell, ()):
+                    distance = self._distance(point, rn)
+                    if distance <= radius:
+                        found.append((distance, rn))
+
+        found.sort()
+
+        return [(distance, self.trains[rn]) for distance, rn in found]
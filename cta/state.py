@@ -0,0 +1,322 @@
+"""Latest state of the network built from the responses of the endpoints.
+
+Responses are ingested as they come in and the latest position and
+predictions of each train are kept in memory along with a short history of
+positions so the common questions don't need another request.
+
+"""
+
+import heapq
+
+from collections import deque
+
+from datetime import datetime, timedelta
+
+from typing import Optional
+
+from cta.records import Arrival, TrainPosition, parse_datetime, parse_float, parse_int
+from cta.responses import FollowBulkResponse, FollowResponse, Response
+
+
+class Sample:
+    """Position of a train at a point in time."""
+
+    __slots__ = ("time", "lat", "lon", "heading")
+
+    def __init__(
+        self,
+        time: datetime,
+        lat: float,
+        lon: float,
+        heading: Optional[int] = None,
+    ):
+        self.time = time
+        self.lat = lat
+        self.lon = lon
+        self.heading = heading
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sample):
+            return NotImplemented
+
+        return (self.time, self.lat, self.lon, self.heading) == (
+            other.time,
+            other.lat,
+            other.lon,
+            other.heading,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Sample(time={self.time!r}, lat={self.lat!r}, lon={self.lon!r}, "
+            f"heading={self.heading!r})"
+        )
+
+
+class NetworkState:
+    """In memory state of the trains from the ingested responses.
+
+    Keeps the latest position of each run number with a bounded history of
+    its positions, and the latest predictions per run number and per station.
+    Predictions are dropped once their arrival time has passed and trains once
+    they haven't been seen for max_age.
+
+    The time of the state is the timestamp of the latest response which is the
+    default for the queries. That way, replayed or archived responses are
+    queried as if they were live.
+
+    Args:
+        history: Number of positions kept per train.
+        max_age: Time after which a train which isn't seen anymore is dropped.
+
+    Examples:
+        Keep the state up to date and query it without more requests.
+
+        >>> state = NetworkState()
+        >>> state.ingest(cta.locations(route=list(Route)))
+        >>> state.ingest(cta.arrivals(mapid=40590))
+        >>> state.arrivals_at(40590, n=3)
+        >>> state.history("123", minutes=10)
+
+    """
+
+    def __init__(self, history: int = 120, max_age: timedelta = timedelta(minutes=30)):
+        self.history_size = history
+        self.max_age = max_age
+        self.now: Optional[datetime] = None
+
+        self.trains: dict[str, TrainPosition] = {}
+        self._history: dict[str, deque[Sample]] = {}
+        self._last_seen: dict[str, datetime] = {}
+        self._seen: list[tuple[datetime, str]] = []
+
+        self._by_run: dict[str, dict[int, Arrival]] = {}
+        self._by_station: dict[int, dict[str, Arrival]] = {}
+        self._expiry: list[tuple[datetime, int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def __contains__(self, rn: str) -> bool:
+        return rn in self._last_seen
+
+    def ingest(self, response: Response, now: Optional[datetime] = None) -> int:
+        """Update the state with a response.
+
+        Args:
+            response: Response of the arrivals, follow or locations endpoint.
+            now: Time of the response. Defaults to its timestamp.
+
+        Returns:
+            Number of trains or predictions ingested.
+
+        """
+        if now is None:
+            now = parse_datetime(response.data["ctatt"].get("tmst"))
+        now = now or datetime.now()
+        if self.now is None or now > self.now:
+            self.now = now
+
+        if isinstance(response, FollowBulkResponse):
+            n_records = sum(
+                self._ingest_follow(runnumber, follow, now)
+                for runnumber, follow in response.responses.items()
+            )
+        elif isinstance(response, FollowResponse):
+            n_records = self._ingest_follow(None, response, now)
+        elif response.endpoint == "locations":
+            n_records = self._ingest_locations(response, now)
+        else:
+            n_records = self._ingest_arrivals(response, now)
+
+        self.prune(self.now)
+
+        return n_records
+
+    def _ingest_locations(self, response: Response, now: datetime) -> int:
+        n_records = 0
+        for position in response.iter_records():
+            self.trains[position.rn] = position
+            self._add_sample(
+                position.rn,
+                position.prdt or now,
+                position.lat,
+                position.lon,
+                position.heading,
+            )
+            n_records += 1
+
+        return n_records
+
+    def _ingest_arrivals(self, response: Response, now: datetime) -> int:
+        n_records = 0
+        for arrival in response.iter_records():
+            self._add_prediction(arrival)
+            self._add_sample(
+                arrival.rn,
+                arrival.prdt or now,
+                arrival.lat,
+                arrival.lon,
+                arrival.heading,
+            )
+            n_records += 1
+
+        return n_records
+
+    def _ingest_follow(
+        self, rn: Optional[str], response: FollowResponse, now: datetime
+    ) -> int:
+        """The follow endpoint lists all the upcoming stops of a single train."""
+        arrivals = response.to_records()
+        rn = rn or next((arrival.rn for arrival in arrivals), None)
+        if rn is None:
+            return 0
+
+        for staId in list(self._by_run.get(rn, {})):
+            self._remove_prediction(rn, staId)
+
+        for arrival in arrivals:
+            arrival.rn = rn
+            self._add_prediction(arrival)
+
+        position = response.data["ctatt"].get("position") or {}
+        time = arrivals[0].prdt if arrivals and arrivals[0].prdt else now
+        self._add_sample(
+            rn,
+            time,
+            parse_float(position.get("lat")),
+            parse_float(position.get("lon")),
+            parse_int(position.get("heading")),
+        )
+
+        return len(arrivals)
+
+    def _add_sample(
+        self,
+        rn: str,
+        time: datetime,
+        lat: Optional[float],
+        lon: Optional[float],
+        heading: Optional[int],
+    ) -> None:
+        last_seen = self._last_seen.get(rn)
+        if last_seen is None or time > last_seen:
+            self._last_seen[rn] = time
+            heapq.heappush(self._seen, (time, rn))
+
+        if lat is None or lon is None:
+            return
+
+        samples = self._history.get(rn)
+        if samples is None:
+            samples = self._history[rn] = deque(maxlen=self.history_size)
+        if samples and samples[-1].time >= time:
+            return
+
+        samples.append(Sample(time, lat, lon, heading))
+
+    def _add_prediction(self, arrival: Arrival) -> None:
+        if arrival.arrT is None or arrival.staId is None:
+            return
+
+        station = self._by_station.setdefault(arrival.staId, {})
+        previous = station.get(arrival.rn)
+
+        self._by_run.setdefault(arrival.rn, {})[arrival.staId] = arrival
+        station[arrival.rn] = arrival
+        if previous is None or previous.arrT != arrival.arrT:
+            heapq.heappush(self._expiry, (arrival.arrT, arrival.staId, arrival.rn))
+
+    def _remove_prediction(self, rn: str, staId: int) -> None:
+        run = self._by_run.get(rn, {})
+        run.pop(staId, None)
+        if not run:
+            self._by_run.pop(rn, None)
+
+        station = self._by_station.get(staId, {})
+        station.pop(rn, None)
+        if not station:
+            self._by_station.pop(staId, None)
+
+    def prune(self, now: datetime) -> None:
+        """Drop the passed predictions and the trains not seen for max_age."""
+        while self._expiry and self._expiry[0][0] < now:
+            arrT, staId, rn = heapq.heappop(self._expiry)
+            arrival = self._by_station.get(staId, {}).get(rn)
+            if arrival is not None and arrival.arrT == arrT:
+                self._remove_prediction(rn, staId)
+
+        cutoff = now - self.max_age
+        while self._seen and self._seen[0][0] < cutoff:
+            seen, rn = heapq.heappop(self._seen)
+            if self._last_seen.get(rn) == seen:
+                del self._last_seen[rn]
+                self.trains.pop(rn, None)
+                self._history.pop(rn, None)
+
+    def position(self, rn: str) -> Optional[Sample]:
+        """Latest known position of a train."""
+        samples = self._history.get(rn)
+
+        return samples[-1] if samples else None
+
+    def history(
+        self, rn: str, minutes: Optional[float] = None, now: Optional[datetime] = None
+    ) -> list[Sample]:
+        """Recent positions of a train, oldest first.
+
+        Args:
+            rn: Run number of the train.
+            minutes: Only the positions of the last minutes. All kept ones
+                by default.
+            now: Time the minutes are counted from. Defaults to the time of
+                the state.
+
+        """
+        samples = self._history.get(rn)
+        if not samples:
+            return []
+
+        if minutes is None:
+            return list(samples)
+
+        cutoff = (now or self.now) - timedelta(minutes=minutes)
+        recent = []
+        for sample in reversed(samples):
+            if sample.time < cutoff:
+                break
+            recent.append(sample)
+
+        return recent[::-1]
+
+    def predictions(self, rn: str) -> list[Arrival]:
+        """Upcoming stops of a train, soonest first."""
+        arrivals = self._by_run.get(rn, {}).values()
+
+        return sorted(arrivals, key=lambda arrival: arrival.arrT)
+
+    def arrivals_at(
+        self, staId: int, n: Optional[int] = None, now: Optional[datetime] = None
+    ) -> list[Arrival]:
+        """Next trains arriving at a station, soonest first.
+
+        Args:
+            staId: Map id of the station.
+            n: Number of arrivals. All of them by default.
+            now: Only arrivals from this time. Defaults to the time of the state.
+
+        """
+        now = now or self.now
+        arrivals = [
+            arrival
+            for arrival in self._by_station.get(int(staId), {}).values()
+            if now is None or arrival.arrT >= now
+        ]
+
+        def by_time(arrival):
+            return arrival.arrT
+
+        if n is None:
+            return sorted(arrivals, key=by_time)
+
+        return heapq.nsmallest(n, arrivals, key=by_time)
@@ -1,27 +1,423 @@
-import pandas as pd
+from __future__ import annotations
 
-from typing import Optional
+import io
+
+import json
+
+import os
+
+import time
+
+import warnings
+
+from typing import TYPE_CHECKING, Iterable, Optional, Union
 
 from pathlib import Path
 
+from cta._lazy import LazyModule
+from cta.records import Record
 from cta.route import Route
+from cta.search import StationIndex
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = LazyModule("pandas", extra="pandas")
+
+requests = LazyModule("requests")
+
+
+ROUTE_COLUMNS = {
+    Route.RED: ["red"],
+    Route.BLUE: ["blue"],
+    Route.BROWN: ["brn"],
+    Route.GREEN: ["g"],
+    Route.ORANGE: ["o"],
+    Route.PURPLE: ["p", "pexp"],
+    Route.PINK: ["pnk"],
+    Route.YELLOW: ["y"],
+}
 
 
 class WrongFileTypeError(Exception):
     pass
 
 
+class StationNotFoundError(KeyError):
+    """No station matches the name or id."""
+
+
+class StationsUnavailableError(Exception):
+    """The stations can't be downloaded and there is no local copy."""
+
+
+class InvalidStationsError(ValueError):
+    """The downloaded stations can't be converted to a table."""
+
+
+def default_cache_dir() -> Path:
+    if "CTA_CACHE_DIR" in os.environ:
+        return Path(os.environ["CTA_CACHE_DIR"])
+
+    cache_home = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+
+    return Path(cache_home) / "python-cta"
+
+
+class StationsCache:
+    """Local copy of the stations dataset shared by the processes of a host.
+
+    The raw JSON and its ETag are kept next to an Arrow (Feather) copy when
+    pyarrow is installed. Reading the Arrow copy skips parsing the JSON but
+    each process still builds its own DataFrame from it.
+
+    Args:
+        cache_dir: Directory of the files. Defaults to the CTA_CACHE_DIR
+            environment variable or the user cache directory.
+        max_age: Seconds before the copy is checked against the data portal.
+        timeout: Seconds to wait for the data portal.
+
+    """
+
+    name: str = "stations"
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        max_age: float = 7 * 24 * 60 * 60,
+        timeout: float = 10,
+    ):
+        self.cache_dir = (
+            Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        )
+        self.max_age = max_age
+        self.timeout = timeout
+
+    @property
+    def json_file(self) -> Path:
+        return self.cache_dir / f"{self.name}.json"
+
+    @property
+    def arrow_file(self) -> Path:
+        return self.cache_dir / f"{self.name}.arrow"
+
+    @property
+    def meta_file(self) -> Path:
+        return self.cache_dir / f"{self.name}.meta.json"
+
+    def exists(self) -> bool:
+        return self.json_file.exists()
+
+    def metadata(self) -> dict:
+        try:
+            return json.loads(self.meta_file.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def age(self) -> float:
+        """Seconds since the copy was last downloaded or validated."""
+        return time.time() - self.metadata().get("validated_at", 0)
+
+    def is_fresh(self) -> bool:
+        return self.exists() and self.age() < self.max_age
+
+    def load(self, url: str, offline: bool = False) -> pd.DataFrame:
+        """Stations from the local copy, refreshing it first when too old.
+
+        Args:
+            url: Url of the dataset on the data portal.
+            offline: Never download. Use the local copy whatever its age.
+
+        Returns:
+            DataFrame of the stations.
+
+        """
+        if offline:
+            if not self.exists():
+                msg = f"No local copy of the stations in {self.cache_dir}."
+                raise StationsUnavailableError(msg)
+        elif not self.is_fresh():
+            try:
+                self.refresh(url)
+            except (requests.RequestException, OSError, InvalidStationsError) as e:
+                if not self.exists():
+                    msg = f"Couldn't download the stations from {url!r}."
+                    raise StationsUnavailableError(msg) from e
+
+                warnings.warn(f"Using stale stations. Download failed with {e!r}")
+
+        return self.read()
+
+    def refresh(self, url: str) -> None:
+        """Download the dataset unless the ETag shows the copy is current."""
+        headers = {}
+        etag = self.metadata().get("etag")
+        if etag is not None and self.exists():
+            headers["If-None-Match"] = etag
+
+        response = requests.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            self._write_metadata(etag)
+            return
+
+        response.raise_for_status()
+        self.write(response.content, etag=response.headers.get("ETag"))
+
+    def write(self, content: bytes, etag: Optional[str] = None) -> None:
+        """Replace the copy. It is left untouched if the content is malformed."""
+        errors: tuple[type[Exception], ...] = (ValueError, TypeError)
+        if has_pyarrow():
+            import pyarrow
+
+            errors += (pyarrow.ArrowException,)
+
+        try:
+            data = pd.read_json(io.BytesIO(content))
+            arrow = None
+            if has_pyarrow():
+                sink = io.BytesIO()
+                data.to_feather(sink)
+                arrow = sink.getvalue()
+        except errors as e:
+            raise InvalidStationsError(f"Malformed stations dataset: {e}") from e
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._replace(self.json_file, content)
+        if arrow is not None:
+            self._replace(self.arrow_file, arrow)
+
+        self._write_metadata(etag)
+
+    def read(self) -> pd.DataFrame:
+        if has_pyarrow() and self.arrow_file.exists():
+            return read_snapshot(self.arrow_file)
+
+        return read_snapshot(self.json_file)
+
+    def clear(self) -> None:
+        for file in [self.json_file, self.arrow_file, self.meta_file]:
+            file.unlink(missing_ok=True)
+
+    def _write_metadata(self, etag: Optional[str]) -> None:
+        metadata = {"etag": etag, "validated_at": time.time()}
+        self._replace(self.meta_file, json.dumps(metadata).encode())
+
+    def _replace(self, file: Path, content: bytes) -> None:
+        """Write atomically so other processes never read a partial file."""
+        tmp_file = file.with_name(f".{file.name}.{os.getpid()}.tmp")
+        tmp_file.write_bytes(content)
+        os.replace(tmp_file, file)
+
+
+def has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def read_snapshot(file: Union[str, Path]) -> pd.DataFrame:
+    """Read a copy of the stations in JSON or Arrow (Feather) format."""
+    file = Path(file)
+    if file.suffix == ".json":
+        return pd.read_json(file)
+
+    if file.suffix in {".arrow", ".feather"}:
+        from pyarrow import feather
+
+        return feather.read_table(file, memory_map=True).to_pandas()
+
+    msg = f"Stations snapshot must be .json, .arrow or .feather not {file.suffix!r}"
+    raise WrongFileTypeError(msg)
+
+
 class Stations:
     """Station information for the CTA stations and stops.
 
-    Data source found in the API documentation.
+    Data source found in the API documentation. The dataset is kept in a
+    local cache and only downloaded again once older than max_age.
+
+    Args:
+        snapshot: Local copy of the stations in JSON or Arrow format to use
+            instead of the data portal.
+        cache: Local cache of the dataset. Defaults to a StationsCache in the
+            user cache directory.
+        offline: Never download and only use the local cache.
+
+    Examples:
+        Load from the cache, downloading at most once a week.
+
+        >>> stations = Stations()
+
+        Load from a copy shipped with an application.
+
+        >>> stations = Stations(snapshot="stations.arrow")
 
     """
 
     url: str = "https://data.cityofchicago.org/resource/8pix-ypme.json"
 
-    def __init__(self):
-        self.data = pd.read_json(self.url)
+    def __init__(
+        self,
+        snapshot: Optional[Union[str, Path]] = None,
+        cache: Optional[StationsCache] = None,
+        offline: bool = False,
+    ):
+        self.cache = None
+        if snapshot is not None:
+            self.data = read_snapshot(snapshot)
+        else:
+            self.cache = cache or StationsCache()
+            self.data = self.cache.load(self.url, offline=offline)
+
+        self.index = self._build_index()
+        self._lookup_data = self.data[self.columns]
+        self._build_id_maps()
+
+    def _build_index(self) -> StationIndex:
+        groups = {}
+        for route, columns in ROUTE_COLUMNS.items():
+            served = self.data.reindex(columns=columns, fill_value=False).any(axis=1)
+            groups[route] = sum(1 << int(row) for row in served.to_numpy().nonzero()[0])
+
+        return StationIndex(self.data["station_name"], groups=groups)
+
+    def _build_id_maps(self) -> None:
+        self.stops: dict[int, dict] = {}
+        self.stations: dict[int, dict] = {}
+        for record in self.data.to_dict("records"):
+            routes = [
+                route
+                for route, columns in ROUTE_COLUMNS.items()
+                if any(record.get(column) for column in columns)
+            ]
+            stop = {name: record[name] for name in self.columns}
+            stop["ada"] = bool(record.get("ada"))
+            stop["routes"] = routes
+            self.stops[stop["stop_id"]] = stop
+
+            station = self.stations.setdefault(
+                stop["map_id"],
+                {
+                    "map_id": stop["map_id"],
+                    "station_name": stop["station_name"],
+                    "station_descriptive_name": stop["station_descriptive_name"],
+                    "ada": False,
+                    "routes": [],
+                    "stop_ids": [],
+                },
+            )
+            station["ada"] = station["ada"] or stop["ada"]
+            station["routes"].extend(r for r in routes if r not in station["routes"])
+            station["stop_ids"].append(stop["stop_id"])
+
+        self._stop_metadata = self.data.set_index("stop_id")[self.enrich_columns]
+
+    @property
+    def enrich_columns(self) -> list:
+        """Columns added by enrich."""
+        return [
+            "stop_name",
+            "direction_id",
+            "station_name",
+            "station_descriptive_name",
+            "ada",
+        ]
+
+    def station(self, map_id: int) -> dict:
+        """Station information for a map_id (staId in the responses)."""
+        try:
+            return self.stations[int(map_id)]
+        except KeyError:
+            raise StationNotFoundError(f"No station with map_id {map_id!r}")
+
+    def stop(self, stop_id: int) -> dict:
+        """Stop information for a stop_id (stpId in the responses)."""
+        try:
+            return self.stops[int(stop_id)]
+        except KeyError:
+            raise StationNotFoundError(f"No stop with stop_id {stop_id!r}")
+
+    def stop_ids(self, map_id: int, route: Optional[Route] = None) -> list[int]:
+        """Stops of a station, optionally only the ones served by a route."""
+        stop_ids = self.station(map_id)["stop_ids"]
+        if route is None:
+            return list(stop_ids)
+
+        return [
+            stop_id for stop_id in stop_ids if route in self.stops[stop_id]["routes"]
+        ]
+
+    def map_ids(self, name: str, route: Optional[Route] = None) -> list[int]:
+        """Ids of the stations with exactly this name. Case is ignored.
+
+        Args:
+            name: name of the station like "Damen".
+            route: the specific train line.
+
+        Returns:
+            map_ids of the matching stations.
+
+        """
+        rows = self.index.search(name, group=route, exact=True)
+        if not rows:
+            names = self._lookup_data["station_name"].to_numpy()
+            similar = sorted(set(names[self.index.search(name, group=route)]))
+            msg = f"No station named {name!r}. Similar names: {similar}"
+            raise StationNotFoundError(msg)
+
+        map_ids = self._lookup_data["map_id"].to_numpy()[rows]
+
+        return list(dict.fromkeys(int(map_id) for map_id in map_ids))
+
+    def enrich(
+        self, df: pd.DataFrame, on: Optional[str] = None, columns: Optional[list] = None
+    ) -> pd.DataFrame:
+        """Add the stop and station information to a frame of the responses.
+
+        Args:
+            df: Frame from ArrivalResponse, FollowResponse or LocationResponse.
+            on: Column with the stop ids. Defaults to stpId or nextStpId.
+            columns: Columns to add. Defaults to enrich_columns.
+
+        Returns:
+            Frame with the added columns.
+
+        Example:
+            Add the stop names to the arrivals.
+
+            >>> df_arrivals = stations.enrich(cta.arrivals(mapid=40590).to_frame())
+
+        """
+        if on is None:
+            on = next((col for col in ["stpId", "nextStpId"] if col in df), None)
+            if on is None:
+                raise ValueError("No stop id column found. Set 'on'.")
+
+        metadata = self._stop_metadata
+        if columns is not None:
+            metadata = metadata[columns]
+
+        return df.join(metadata, on=on)
+
+    def enrich_records(self, records: Iterable[Record]) -> list[dict]:
+        """Records as dictionaries with the stop and station information."""
+        enriched = []
+        for record in records:
+            stop_id = getattr(record, "stpId", None) or getattr(
+                record, "nextStpId", None
+            )
+            stop = self.stops.get(stop_id, {})
+            enriched.append(
+                {
+                    **record.to_dict(),
+                    **{name: stop.get(name) for name in self.enrich_columns},
+                }
+            )
+
+        return enriched
 
     @property
     def columns(self) -> list:
@@ -35,19 +431,47 @@ class Stations:
             "map_id",
         ]
 
-    def lookup(self, name: str, route: Optional[Route] = None) -> pd.DataFrame:
+    def lookup(
+        self, name: str, route: Optional[Route] = None, prefix: bool = False
+    ) -> pd.DataFrame:
         """Helper function to search for stations ids.
 
         Args:
-            name: name of stations to lookup.
+            name: name of stations to lookup. Case is ignored.
             route: the specific train line.
+            prefix: only match station names starting with name.
 
         Returns:
             dataframe of the station information.
 
         """
-        idx = self.data["station_name"].str.lower().str.contains(name.lower())
-        if route is not None:
-            idx = idx & self.data[route.value]
+        rows = self.index.search(name, group=route, prefix=prefix)
+
+        return self._lookup_data.take(rows).reset_index(drop=True)
+
+    def lookup_many(
+        self, names: list[str], route: Optional[Route] = None, prefix: bool = False
+    ) -> pd.DataFrame:
+        """Search for many stations at once.
+
+        Args:
+            names: names of stations to lookup.
+            route: the specific train line.
+            prefix: only match station names starting with the names.
+
+        Returns:
+            dataframe of the station information with the matching name in
+            the query column.
+
+        """
+        rows = []
+        queries = []
+        for name in names:
+            name_rows = self.index.search(name, group=route, prefix=prefix)
+            rows.extend(name_rows)
+            queries.extend([name] * len(name_rows))
+
+        df_stations = self._lookup_data.take(rows).reset_index(drop=True)
+        df_stations.insert(0, "query", queries)
 
-        return self.data.loc[idx, self.columns].reset_index(drop=True)
+        return df_stations
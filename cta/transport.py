@@ -0,0 +1,559 @@
+from __future__ import annotations
+
+import gzip
+
+import json
+
+import threading
+
+import time
+
+from abc import ABC, abstractmethod
+
+from collections import deque
+
+from pathlib import Path
+
+from typing import IO, Any, Callable, Optional, Union
+
+from cta._lazy import LazyModule
+
+
+asyncio = LazyModule("asyncio")
+requests = LazyModule("requests")
+
+Timeout = Union[float, tuple[float, float]]
+
+
+class TransportError(Exception):
+    """Error while sending a request to the API."""
+
+
+class TransportTimeoutError(TransportError):
+    """The API didn't answer in time."""
+
+
+class TransportConnectionError(TransportError):
+    """The connection to the API failed or was reset."""
+
+
+class HTTPStatusError(TransportError):
+    """The API answered with an error status code.
+
+    Args:
+        msg: Error message.
+        status_code: HTTP status code of the response.
+
+    """
+
+    def __init__(self, msg: str, status_code: int):
+        super().__init__(msg)
+        self.status_code = status_code
+
+
+class TransportResponse:
+    """Minimal response returned by every transport.
+
+    Args:
+        status_code: HTTP status code of the response.
+        content: Raw body of the response.
+        url: Url which was requested.
+        elapsed: Seconds until the response headers arrived if known.
+
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        content: bytes,
+        url: str = "",
+        elapsed: Optional[float] = None,
+    ):
+        self.status_code = status_code
+        self.content = content
+        self.url = url
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class Transport(ABC):
+    """Abstract class for sending requests to the CTA endpoints.
+
+    Transports can be used as context managers in order to release their
+    resources once done.
+
+    """
+
+    @abstractmethod
+    def get(self, url: str, params: dict[str, Any]) -> TransportResponse:
+        """Send a GET request to the url with the given query parameters."""
+
+    def close(self) -> None:
+        """Release any resources held by the transport."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class RequestsTransport(Transport):
+    """Pooled, keep-alive transport built on a requests.Session.
+
+    Connections to the API host are kept open between calls so that repeated
+    polling doesn't pay for a new TCP connection each time.
+
+    Args:
+        pool_connections: Number of host connection pools to cache.
+        pool_maxsize: Maximum number of connections kept alive per host.
+        timeout: Seconds to wait for the server. Either a single value or a
+            (connect, read) tuple.
+        session: Optional preconfigured session to use instead.
+
+    Examples:
+        Share one pooled transport for the lifetime of the client.
+
+        >>> with CTAClient(transport=RequestsTransport(pool_maxsize=20)) as cta:
+        ...     arrival_response = cta.arrivals(mapid=40590)
+
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 1,
+        pool_maxsize: int = 10,
+        timeout: Optional[Timeout] = (3.05, 10),
+        session: Optional[requests.Session] = None,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+
+        self.session = session or self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
+
+    def get(self, url: str, params: dict[str, Any]) -> TransportResponse:
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        except requests.Timeout as e:
+            raise TransportTimeoutError(f"Request to {url!r} timed out.") from e
+        except requests.ConnectionError as e:
+            raise TransportConnectionError(f"Connection to {url!r} failed.") from e
+
+        return TransportResponse(
+            status_code=response.status_code,
+            content=response.content,
+            url=response.url,
+            elapsed=response.elapsed.total_seconds(),
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+
+Handler = Callable[[str, dict[str, Any]], Union[dict, TransportResponse]]
+
+
+class StubTransport(Transport):
+    """Transport which answers from a local handler instead of the network.
+
+    Useful for tests and benchmarks.
+
+    Args:
+        handler: Callable taking the url and params of the request. Returns
+            either the JSON payload or a TransportResponse.
+
+    Attributes:
+        calls: All (url, params) pairs which were requested.
+
+    Examples:
+        Always return the same payload.
+
+        >>> payload = {"ctatt": {"errCd": "0", "eta": []}}
+        >>> cta = CTAClient(key="abc", transport=StubTransport(lambda url, params: payload))
+
+    """
+
+    def __init__(self, handler: Handler):
+        self.handler = handler
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+
+    def get(self, url: str, params: dict[str, Any]) -> TransportResponse:
+        self.calls.append((url, params))
+        response = self.handler(url, params)
+        if isinstance(response, TransportResponse):
+            return response
+
+        return TransportResponse(
+            status_code=200, content=json.dumps(response).encode(), url=url
+        )
+
+
+class AsyncTransport(ABC):
+    """Abstract class for sending requests to the CTA endpoints with asyncio."""
+
+    @abstractmethod
+    async def get(self, url: str, params: dict[str, Any]) -> TransportResponse:
+        """Send a GET request to the url with the given query parameters."""
+
+    async def close(self) -> None:
+        """Release any resources held by the transport."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class ThreadedAsyncTransport(AsyncTransport):
+    """Run a blocking transport in worker threads.
+
+    Args:
+        transport: Transport to run. Its connection pool should be at least
+            as large as the number of concurrent requests.
+
+    """
+
+    def __init__(self, transport: Transport):
+        self.transport = transport
+
+    async def get(self, url: str, params: dict[str, Any]) -> TransportResponse:
+        return await asyncio.to_thread(self.transport.get, url, params)
+
+    async def close(self) -> None:
+        self.transport.close()
+
+
+class AIOHTTPTransport(AsyncTransport):
+    """Pooled, keep-alive transport built on an aiohttp.ClientSession.
+
+    Requires the aiohttp package. The session is created on first use so the
+    transport can be constructed outside of a running event loop.
+
+    Args:
+        pool_maxsize: Maximum number of open connections.
+        timeout: Total seconds to wait for the server.
+
+    """
+
+    def __init__(self, pool_maxsize: int = 10, timeout: Optional[float] = 10):
+        try:
+            import aiohttp
+        except ImportError:
+            msg = "The aiohttp package is required for the AIOHTTPTransport."
+            raise ImportError(msg)
+
+        self._aiohttp = aiohttp
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            aiohttp = self._aiohttp
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_maxsize),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+        return self._session
+
+    async def get(self, url: str, params: dict[str, Any]) -> TransportResponse:
+        try:
+            async with self.session.get(url, params=flatten_params(params)) as response:
+                content = await response.read()
+        except asyncio.TimeoutError as e:
+            raise TransportTimeoutError(f"Request to {url!r} timed out.") from e
+        except self._aiohttp.ClientError as e:
+            raise TransportConnectionError(f"Connection to {url!r} failed.") from e
+
+        return TransportResponse(
+            status_code=response.status, content=content, url=str(response.url)
+        )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncStubTransport(AsyncTransport):
+    """Async version of the StubTransport.
+
+    Args:
+        handler: Callable taking the url and params of the request. Returns
+            either the JSON payload or a TransportResponse.
+        delay: Seconds to sleep before answering to mimic network latency.
+
+    """
+
+    def __init__(self, handler: Handler, delay: float = 0):
+        self.stub = StubTransport(handler)
+        self.delay = delay
+
+    @property
+    def calls(self) -> list[tuple[str, dict[str, Any]]]:
+        return self.stub.calls
+
+    async def get(self, url: str, params: dict[str, Any]) -> TransportResponse:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        return self.stub.get(url, params)
+
+
+class TrafficLog:
+    """Log of the requests and responses of a transport, one JSON per line.
+
+    Each line has the url, params without the API key, status code, latency
+    and body of a request. Paths ending with .gz are compressed.
+
+    Args:
+        path: Location of the log.
+
+    """
+
+    errors = {
+        "timeout": TransportTimeoutError,
+        "connection": TransportConnectionError,
+    }
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def _open(self, mode: str) -> IO[str]:
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+
+        return open(self.path, mode, encoding="utf-8")
+
+    def writer(self) -> IO[str]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        return self._open("a")
+
+    def read(self) -> list[dict[str, Any]]:
+        with self._open("r") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    @staticmethod
+    def entry_key(url: str, params: dict[str, Any]) -> str:
+        params = {key: value for key, value in params.items() if key != "key"}
+
+        return json.dumps([url, params], sort_keys=True, default=str)
+
+
+class RecordingTransport(Transport):
+    """Send requests through another transport and log the traffic.
+
+    The log can be served back with the ReplayTransport to benchmark and test
+    without the network.
+
+    Args:
+        transport: Transport sending the requests.
+        path: Location of the JSONL log. Appended to if it exists.
+
+    Examples:
+        Record an afternoon of polling.
+
+        >>> transport = RecordingTransport(RequestsTransport(), "traffic.jsonl.gz")
+        >>> with CTAClient(transport=transport) as cta:
+        ...     arrival_response = cta.arrivals(mapid=40590)
+
+    """
+
+    def __init__(self, transport: Transport, path: Union[str, Path]):
+        self.transport = transport
+        self.log = TrafficLog(path)
+
+        self._file = self.log.writer()
+        self._lock = threading.Lock()
+
+    def get(self, url: str, params: dict[str, Any]) -> TransportResponse:
+        started = time.monotonic()
+        entry = {
+            "url": url,
+            "params": {key: value for key, value in params.items() if key != "key"},
+        }
+        try:
+            response = self.transport.get(url, params)
+        except TransportError as e:
+            error = next(
+                (name for name, cls in TrafficLog.errors.items() if isinstance(e, cls)),
+                "connection",
+            )
+            self._write({**entry, "latency": self._since(started), "error": error})
+            raise
+
+        self._write(
+            {
+                **entry,
+                "latency": self._since(started),
+                "status_code": response.status_code,
+                "body": response.text,
+            }
+        )
+
+        return response
+
+    @staticmethod
+    def _since(started: float) -> float:
+        return round(time.monotonic() - started, 6)
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(",", ":"), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """Answer requests from a log of the RecordingTransport.
+
+    Requests are matched on the url and params, ignoring the API key, and
+    the recorded responses of a request are returned in their original order.
+
+    Args:
+        path: Location of the JSONL log.
+        speed: How much faster than recorded to answer. 1 to wait the
+            original latency and None to answer right away.
+        loop: Start over once the responses of a request are used up instead
+            of raising a TransportError.
+
+    Examples:
+        Benchmark a service at ten times the original speed.
+
+        >>> transport = ReplayTransport("traffic.jsonl.gz", speed=10, loop=True)
+        >>> cta = CTAClient(key="abc", transport=transport)
+
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        speed: Optional[float] = 1,
+        loop: bool = False,
+    ):
+        if speed is not None and speed <= 0:
+            msg = f"'speed' must be positive or None not {speed!r}"
+            raise ValueError(msg)
+
+        self.speed = speed
+        self.loop = loop
+        self.entries = TrafficLog(path).read()
+
+        self._queues: dict[str, deque[dict[str, Any]]] = {}
+        for entry in self.entries:
+            key = TrafficLog.entry_key(entry["url"], entry["params"])
+            self._queues.setdefault(key, deque()).append(entry)
+
+        self._lock = threading.Lock()
+        self.replayed = 0
+
+    def next_entry(self, url: str, params: dict[str, Any]) -> dict[str, Any]:
+        """Take the next recorded entry of the request."""
+        key = TrafficLog.entry_key(url, params)
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                msg = f"No recorded response for {url!r} with params {params!r}."
+                raise TransportError(msg)
+
+            entry = queue.popleft()
+            if self.loop:
+                queue.append(entry)
+            self.replayed += 1
+
+        return entry
+
+    def delay(self, entry: dict[str, Any]) -> float:
+        """Seconds to wait before answering with the entry."""
+        if self.speed is None:
+            return 0
+
+        return entry.get("latency", 0) / self.speed
+
+    def respond(self, entry: dict[str, Any], url: str) -> TransportResponse:
+        if "error" in entry:
+            cls = TrafficLog.errors.get(entry["error"], TransportConnectionError)
+            raise cls(f"Recorded {entry['error']} error for {url!r}.")
+
+        return TransportResponse(
+            status_code=entry["status_code"],
+            content=entry["body"].encode("utf-8"),
+            url=url,
+        )
+
+    def get(self, url: str, params: dict[str, Any]) -> TransportResponse:
+        entry = self.next_entry(url, params)
+        wait = self.delay(entry)
+        if wait > 0:
+            time.sleep(wait)
+
+        return self.respond(entry, url)
+
+
+class AsyncReplayTransport(AsyncTransport):
+    """Async version of the ReplayTransport."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        speed: Optional[float] = 1,
+        loop: bool = False,
+    ):
+        self.replay = ReplayTransport(path, speed=speed, loop=loop)
+
+    async def get(self, url: str, params: dict[str, Any]) -> TransportResponse:
+        entry = self.replay.next_entry(url, params)
+        wait = self.replay.delay(entry)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        return self.replay.respond(entry, url)
+
+
+def flatten_params(params: dict[str, Any]) -> list[tuple[str, str]]:
+    """Expand list values into repeated query parameters."""
+    flat = []
+    for key, value in params.items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        flat.extend((key, str(el)) for el in values)
+
+    return flat
+
+
+def default_async_transport(pool_maxsize: int = 10) -> AsyncTransport:
+    """Use aiohttp if installed otherwise requests in worker threads."""
+    try:
+        return AIOHTTPTransport(pool_maxsize=pool_maxsize)
+    except ImportError:
+        return ThreadedAsyncTransport(RequestsTransport(pool_maxsize=pool_maxsize))
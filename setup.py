@@ -27,6 +27,13 @@ setup(
         "Typing :: Typed", 
     ],
     packages=["cta"],
-    install_requires=["requests", "pandas"],
+    install_requires=["requests"],
+    extras_require={
+        "pandas": ["pandas"],
+        "async": ["aiohttp"],
+        "arrow": ["pandas", "pyarrow"],
+        "fast": ["msgspec"],
+        "all": ["pandas", "aiohttp", "pyarrow", "msgspec"],
+    },
     test_require=["pytest", "pytest-mock"],
 )
@@ -0,0 +1,172 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from cta.analytics import (
+    bunching,
+    gaps,
+    headways,
+    observed_arrivals,
+    schedule_spread,
+)
+from cta.responses import ArrivalResponse, LocationResponse
+
+from pathlib import Path
+import json
+
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+
+
+def eta(rn, arrT, prdt, staId="40590", trDr="1", isSch="0", isDly="0"):
+    return {
+        "staId": staId,
+        "rn": rn,
+        "rt": "Blue",
+        "trDr": trDr,
+        "prdt": f"2022-05-15T{prdt}",
+        "arrT": f"2022-05-15T{arrT}",
+        "isSch": isSch,
+        "isDly": isDly,
+    }
+
+
+def frame(etas):
+    return ArrivalResponse(data={"ctatt": {"errCd": "0", "eta": etas}}).to_frame()
+
+
+@pytest.fixture
+def df_snapshots():
+    """Two trains predicted over three snapshots, the first one twice a day."""
+    return frame(
+        [
+            eta("101", "10:05:00", "10:00:00", isSch="1"),
+            eta("101", "10:06:00", "10:01:00", isDly="1"),
+            eta("101", "10:06:30", "10:02:00"),
+            eta("102", "10:09:00", "10:00:00"),
+            eta("102", "10:08:00", "10:02:00"),
+            eta("101", "11:30:00", "11:20:00"),
+            eta("201", "10:07:00", "10:00:00", trDr="5"),
+        ]
+    )
+
+
+def test_observed_arrivals(df_snapshots):
+    df_observed = observed_arrivals(df_snapshots)
+
+    assert len(df_observed) == 4
+    df_observed = df_observed.set_index(["rn", "arrT"])
+
+    first_trip = df_observed.loc[("101", pd.Timestamp("2022-05-15T10:06:30"))]
+    assert first_trip["prdt"] == pd.Timestamp("2022-05-15T10:02:00")
+    assert first_trip["scheduled_arrT"] == pd.Timestamp("2022-05-15T10:05:00")
+    assert first_trip["isDly"]
+    assert not first_trip["isSch"]
+    assert first_trip["predictions"] == 3
+
+    second_trip = df_observed.loc[("101", pd.Timestamp("2022-05-15T11:30:00"))]
+    assert pd.isna(second_trip["scheduled_arrT"])
+    assert not second_trip["isDly"]
+    assert second_trip["predictions"] == 1
+
+
+def test_observed_arrivals_without_trip_split(df_snapshots):
+    df_observed = observed_arrivals(df_snapshots, trip_gap=120)
+
+    assert len(df_observed) == 3
+
+
+def test_headways(df_snapshots):
+    df_headways = headways(df_snapshots)
+
+    inbound = df_headways.loc[df_headways["trDr"] == 1]
+    assert inbound["rn"].tolist() == ["101", "102", "101"]
+    assert inbound["previous_rn"].tolist()[1:] == ["101", "102"]
+    np.testing.assert_allclose(inbound["headway"], [np.nan, 1.5, 82])
+    np.testing.assert_allclose(
+        inbound["headway_ratio"], [np.nan, 1.5 / 41.75, 82 / 41.75]
+    )
+
+    outbound = df_headways.loc[df_headways["trDr"] == 5]
+    assert outbound["headway"].isna().all()
+
+
+def test_bunching_and_gaps(df_snapshots):
+    df_headways = headways(df_snapshots)
+
+    assert bunching(df_headways)["rn"].tolist() == ["102"]
+    assert gaps(df_headways, factor=1.5)["rn"].tolist() == ["101"]
+    assert gaps(df_headways, factor=2).empty
+
+
+def test_headways_of_locations():
+    with open(TEST_DATA_DIR / "locations_response.json") as f:
+        df_locations = LocationResponse(data=json.load(f)).to_frame()
+
+    df_headways = headways(df_locations)
+
+    assert len(df_headways) == len(df_locations)
+    assert set(df_headways["staId"]) == set(df_locations["nextStaId"])
+    assert set(df_headways["route"]) == {"blue"}
+
+
+def test_headways_empty():
+    df_trains = frame([eta("101", "10:05:00", "10:00:00")]).iloc[:0]
+
+    df_headways = headways(df_trains)
+
+    assert df_headways.empty
+    assert "headway" in df_headways.columns
+
+
+def test_schedule_spread(df_snapshots):
+    df_spread = schedule_spread(df_snapshots)
+
+    inbound = df_spread.loc[("Blue", 1, 40590)]
+    assert inbound["arrivals"] == 3
+    assert inbound["delayed_share"] == pytest.approx(1 / 3)
+    assert inbound["scheduled"] == 1
+    assert inbound["mean_spread"] == pytest.approx(1.5)
+
+
+def test_schedule_spread_needs_schedule_column():
+    df_trains = frame([eta("101", "10:05:00", "10:00:00")]).drop(columns="isSch")
+
+    with pytest.raises(ValueError):
+        schedule_spread(df_trains)
+
+
+def test_headways_match_groupby():
+    rng = np.random.default_rng(0)
+    n_trips, n_snapshots = 300, 4
+
+    trips = np.repeat(np.arange(n_trips), n_snapshots)
+    snapshots = np.tile(np.arange(n_snapshots), n_trips)
+    scheduled = pd.Timestamp("2022-05-15T04:00") + pd.to_timedelta(trips * 3, unit="m")
+    delays = pd.to_timedelta(rng.integers(0, 2, len(trips)), unit="m")
+    df_trains = pd.DataFrame(
+        {
+            "rt": "Blue",
+            "trDr": rng.choice([1, 5], n_trips)[trips],
+            "staId": rng.choice([40590, 40380, 41660], n_trips)[trips],
+            "rn": (100 + trips % 11).astype(str),
+            "arrT": scheduled + delays,
+            "prdt": scheduled - pd.to_timedelta(10 - snapshots, unit="m"),
+            "trip": trips,
+        }
+    ).sample(frac=1, random_state=0)
+
+    df_headways = headways(df_trains)
+
+    df_expected = (
+        df_trains.sort_values("prdt")
+        .groupby("trip")
+        .last()
+        .sort_values(["trDr", "staId", "arrT"])
+    )
+    df_expected["headway"] = (
+        df_expected.groupby(["trDr", "staId"])["arrT"].diff().dt.total_seconds() / 60
+    )
+    assert df_headways["rn"].tolist() == df_expected["rn"].tolist()
+    np.testing.assert_allclose(df_headways["headway"], df_expected["headway"])
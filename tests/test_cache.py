@@ -0,0 +1,203 @@
+import pytest
+
+from cta.cache import Fingerprints, ResponseCache
+
+import asyncio
+import threading
+import time
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_ttl_expires(clock):
+    cache = ResponseCache(ttl=10, clock=clock)
+    cache.set("arrivals", "key", 1)
+
+    assert cache.get("key") == 1
+
+    clock.now = 10
+    assert cache.get("key") is None
+
+
+@pytest.mark.parametrize(
+    "ttl, endpoint, expected",
+    [
+        (5, "arrivals", 5),
+        ({"arrivals": 5}, "arrivals", 5),
+        ({"arrivals": 5}, "follow", 0),
+    ],
+)
+def test_ttl_per_endpoint(ttl, endpoint, expected):
+    assert ResponseCache(ttl=ttl).ttl_for(endpoint) == expected
+
+
+def test_endpoint_without_ttl_is_not_cached():
+    cache = ResponseCache(ttl={"arrivals": 5})
+    cache.set("follow", "key", 1)
+
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache = ResponseCache(ttl=10, maxsize=2)
+    cache.set("arrivals", "a", 1)
+    cache.set("arrivals", "b", 2)
+    cache.get("a")
+    cache.set("arrivals", "c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+
+def test_get_or_fetch_counts(clock):
+    cache = ResponseCache(ttl=10, clock=clock)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    for _ in range(3):
+        assert cache.get_or_fetch("arrivals", "key", fetch) == {"value": 1}
+
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_get_or_fetch_coalesces_threads():
+    cache = ResponseCache(ttl=10)
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    owner = threading.Thread(
+        target=lambda: results.append(cache.get_or_fetch("arrivals", "key", fetch))
+    )
+    owner.start()
+    started.wait()
+    waiters = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_fetch("arrivals", "key", fetch))
+        )
+        for _ in range(5)
+    ]
+    for thread in waiters:
+        thread.start()
+    for thread in [owner, *waiters]:
+        thread.join()
+
+    assert results == ["value"] * 6
+    assert len(calls) == 1
+    assert cache.misses == 1
+    assert cache.coalesced + cache.hits == 5
+
+
+def test_get_or_fetch_propagates_errors():
+    cache = ResponseCache(ttl=10)
+
+    def fetch():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_fetch("arrivals", "key", fetch)
+
+    assert cache.get_or_fetch("arrivals", "key", lambda: 1) == 1
+
+
+def test_aget_or_fetch_coalesces():
+    cache = ResponseCache(ttl=10)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.aget_or_fetch("arrivals", "key", fetch) for _ in range(5))
+        )
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert len(calls) == 1
+    assert cache.coalesced == 4
+
+
+def test_aget_or_fetch_owner_cancelled():
+    cache = ResponseCache(ttl=10)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        owner = asyncio.create_task(cache.aget_or_fetch("arrivals", "key", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.aget_or_fetch("arrivals", "key", fetch))
+        await asyncio.sleep(0)
+        owner.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+
+        return await waiter
+
+    assert asyncio.run(run()) == "value"
+    assert len(calls) == 2
+
+
+def test_fingerprints_match_identical_bodies():
+    fingerprints = Fingerprints()
+    digest = fingerprints.digest(b'{"ctatt": {}}')
+    payload = {"ctatt": {}}
+
+    assert fingerprints.get("key", digest) is None
+    fingerprints.set("key", digest, payload)
+
+    assert fingerprints.get("key", digest) is payload
+    assert fingerprints.get("key", fingerprints.digest(b"{}")) is None
+    assert fingerprints.get("other", digest) is None
+    assert fingerprints.stats() == {"unchanged": 1, "changed": 3, "size": 1}
+
+
+def test_fingerprints_build_response_once():
+    fingerprints = Fingerprints()
+    payload = {"ctatt": {}}
+    fingerprints.set("key", b"digest", payload)
+
+    first = fingerprints.response("key", payload, object)
+    second = fingerprints.response("key", payload, object)
+
+    assert second is first
+    assert fingerprints.response("key", {"ctatt": {}}, object) is not first
+    assert fingerprints.response("other", payload, object) is not first
+
+
+def test_fingerprints_eviction():
+    fingerprints = Fingerprints(maxsize=2)
+    for key in range(3):
+        fingerprints.set(key, b"digest", {})
+
+    assert len(fingerprints) == 2
+    assert fingerprints.get(0, b"digest") is None
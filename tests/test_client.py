@@ -5,14 +5,30 @@ import pandas as pd
 from cta.client import (
     ParamBuilder,
     CTAClient,
+    AsyncCTAClient,
     RequiredArgMissingError,
     TooManyArgsError,
 )
 from cta import Route
+from cta.cache import Fingerprints, ResponseCache
+from cta.metrics import Instrumentation
+from cta.ratelimit import RateLimiter, QuotaExhaustedError
+from cta.retry import RetryPolicy
+from cta.stations import Stations, StationNotFoundError
 from cta.responses import FollowResponse, ArrivalResponse, LocationResponse
+from cta.transport import (
+    AsyncStubTransport,
+    AsyncTransport,
+    HTTPStatusError,
+    StubTransport,
+    TransportResponse,
+    flatten_params,
+)
 
 from pathlib import Path
+import asyncio
 import json
+import threading
 
 
 TEST_DATA_DIR = Path(__file__).parent / "data"
@@ -57,36 +73,25 @@ def load_test_data(file_name: str) -> dict:
         return json.load(f)
 
 
-def mocked_requests_get(endpoint, *args, **kwargs):
-    class MockResponse:
-        def __init__(self, json_data, status_code):
-            self.json_data = json_data
-            self.status_code = status_code
-
-        def json(self):
-            return self.json_data
-
-        @property
-        def ok(self):
-            return self.status_code == 200
-
-    if "arrivals" in endpoint:
+def stub_handler(url, params):
+    if "arrivals" in url:
         file_name = "arrivals_response.json"
-    elif "positions" in endpoint:
+    elif "positions" in url:
         file_name = "locations_response.json"
-    elif "follow" in endpoint:
+    elif "follow" in url:
         file_name = "follow_response.json"
 
-    data = load_test_data(file_name=file_name)
-
-    return MockResponse(data, 200)
+    return load_test_data(file_name=file_name)
 
 
 @pytest.fixture
-def cta_client(mocker):
-    mocker.patch("requests.get", side_effect=mocked_requests_get)
+def stub_transport():
+    return StubTransport(stub_handler)
 
-    return CTAClient(key=FAKE_KEY)
+
+@pytest.fixture
+def cta_client(stub_transport):
+    return CTAClient(key=FAKE_KEY, transport=stub_transport)
 
 
 def test_attributes(cta_client):
@@ -194,3 +199,390 @@ def test_follow(cta_client):
     ]
     for col in cols:
         assert col in df_follow
+
+
+def test_client_sends_through_transport(cta_client, stub_transport):
+    cta_client.arrivals(mapid=[1, 2])
+
+    url, params = stub_transport.calls[0]
+    assert url == "http://lapi.transitchicago.com/api/1.0/ttarrivals.aspx"
+    assert params["mapid"] == [1, 2]
+    assert params["key"] == FAKE_KEY
+
+
+def test_client_raises_on_bad_status():
+    transport = StubTransport(lambda url, params: TransportResponse(500, b"oops"))
+    cta_client = CTAClient(key=FAKE_KEY, transport=transport)
+
+    with pytest.raises(HTTPStatusError, match="oops"):
+        cta_client.arrivals(mapid=1)
+
+
+def test_client_only_closes_owned_transport(mocker, stub_transport):
+    close = mocker.spy(stub_transport, "close")
+    with CTAClient(key=FAKE_KEY, transport=stub_transport):
+        pass
+
+    close.assert_not_called()
+
+    with CTAClient(key=FAKE_KEY) as cta_client:
+        close = mocker.spy(cta_client.transport, "close")
+
+    close.assert_called_once()
+
+
+@pytest.fixture
+def async_cta_client():
+    return AsyncCTAClient(key=FAKE_KEY, transport=AsyncStubTransport(stub_handler))
+
+
+@pytest.mark.parametrize(
+    "method, kwargs, cls, n_trains",
+    [
+        ("arrivals", {"mapid": 1}, ArrivalResponse, 4),
+        ("locations", {"route": Route.BLUE}, LocationResponse, 10),
+        ("follow", {"runnumber": 106}, FollowResponse, 6),
+    ],
+)
+def test_async_client(async_cta_client, method, kwargs, cls, n_trains):
+    response = asyncio.run(getattr(async_cta_client, method)(**kwargs))
+
+    assert isinstance(response, cls)
+    assert len(response.to_frame()) == n_trains
+
+
+@pytest.mark.parametrize(
+    "kwargs, error_type",
+    [
+        ({}, RequiredArgMissingError),
+        ({"mapid": [1, 2, 3, 4, 5]}, TooManyArgsError),
+    ],
+)
+def test_async_arrivals_throws_error(async_cta_client, kwargs, error_type):
+    with pytest.raises(error_type):
+        asyncio.run(async_cta_client.arrivals(**kwargs))
+
+
+class CountingTransport(AsyncTransport):
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get(self, url, params):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+        return TransportResponse(200, b'{"ctatt": {"errCd": "0"}}')
+
+
+def test_async_gather_is_bounded():
+    transport = CountingTransport()
+    cta_client = AsyncCTAClient(key=FAKE_KEY, transport=transport, max_concurrency=3)
+
+    async def refresh():
+        return await cta_client.gather(
+            cta_client.arrivals(mapid=mapid) for mapid in range(10)
+        )
+
+    responses = asyncio.run(refresh())
+
+    assert len(responses) == 10
+    assert transport.max_in_flight == 3
+
+
+def test_flatten_params():
+    params = {"key": "abc", "mapid": [1, 2]}
+
+    assert flatten_params(params) == [("key", "abc"), ("mapid", "1"), ("mapid", "2")]
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({"mapid": 1}, [{"mapid": [1]}]),
+        ({"mapid": [1, 2, 3, 4]}, [{"mapid": [1, 2, 3, 4]}]),
+        (
+            {"mapid": list(range(10))},
+            [{"mapid": [0, 1, 2, 3]}, {"mapid": [4, 5, 6, 7]}, {"mapid": [8, 9]}],
+        ),
+        ({"mapid": [1, 1, 2, 2]}, [{"mapid": [1, 2]}]),
+        (
+            {"mapid": [1, 2], "stpid": [3, 4, 5, 6, 7]},
+            [{"mapid": [1, 2]}, {"stpid": [3, 4, 5, 6]}, {"stpid": [7]}],
+        ),
+    ],
+)
+def test_arrivals_chunks(cta_client, kwargs, expected):
+    assert list(cta_client._arrivals_chunks(**kwargs)) == expected
+
+
+def test_arrivals_bulk(cta_client, stub_transport):
+    arrivals_response = cta_client.arrivals_bulk(mapid=list(range(10)))
+
+    assert len(stub_transport.calls) == 3
+    assert isinstance(arrivals_response, ArrivalResponse)
+    assert len(arrivals_response.to_frame()) == 3 * 4
+
+
+def test_arrivals_bulk_requires_ids(cta_client):
+    with pytest.raises(RequiredArgMissingError):
+        cta_client.arrivals_bulk()
+
+
+def test_async_arrivals_bulk(async_cta_client):
+    arrivals_response = asyncio.run(
+        async_cta_client.arrivals_bulk(stpid=[1, 2, 3, 4, 5])
+    )
+
+    assert len(async_cta_client.transport.calls) == 2
+    assert len(arrivals_response.to_frame()) == 2 * 4
+
+
+def test_client_cache(stub_transport):
+    cta_client = CTAClient(
+        key=FAKE_KEY, transport=stub_transport, cache=ResponseCache(ttl={"arrivals": 10})
+    )
+
+    cta_client.arrivals(mapid=[1, 2])
+    cta_client.arrivals(mapid=[2, 1])
+    cta_client.follow(runnumber=106)
+    cta_client.follow(runnumber=106)
+
+    assert len(stub_transport.calls) == 3
+    assert cta_client.cache.hits == 1
+
+
+def test_request_key_ignores_api_key(cta_client):
+    other_client = CTAClient(key="other", transport=cta_client.transport)
+
+    assert (
+        cta_client._arrivals_request(mapid=[1, 2]).key
+        == other_client._arrivals_request(mapid=[2, 1]).key
+    )
+    assert (
+        cta_client._arrivals_request(mapid=[1]).key
+        != cta_client._arrivals_request(stpid=[1]).key
+    )
+
+
+def test_client_rate_limiter_budget(stub_transport):
+    cta_client = CTAClient(
+        key=FAKE_KEY, transport=stub_transport, rate_limiter=RateLimiter(daily_budget=1)
+    )
+
+    cta_client.arrivals(mapid=1)
+    with pytest.raises(QuotaExhaustedError):
+        cta_client.arrivals(mapid=1)
+
+    assert len(stub_transport.calls) == 1
+
+
+def test_client_rate_limiter_falls_back_to_stale_cache(stub_transport):
+    cache = ResponseCache(ttl=10)
+    cta_client = CTAClient(
+        key=FAKE_KEY,
+        transport=stub_transport,
+        cache=cache,
+        rate_limiter=RateLimiter(daily_budget=1, mode="cache"),
+    )
+
+    first = cta_client.arrivals(mapid=1)
+    cache.clock = lambda: float("inf")
+    second = cta_client.arrivals(mapid=1)
+
+    assert second.data == first.data
+    assert len(stub_transport.calls) == 1
+    with pytest.raises(QuotaExhaustedError):
+        cta_client.arrivals(mapid=2)
+
+
+def test_client_retries_unavailable(mocker):
+    mocker.patch("time.sleep")
+    statuses = [503, 503, 200]
+
+    def handler(url, params):
+        status_code = statuses.pop(0)
+        if status_code != 200:
+            return TransportResponse(status_code, b"unavailable")
+
+        return stub_handler(url, params)
+
+    cta_client = CTAClient(
+        key=FAKE_KEY, transport=StubTransport(handler), retry=RetryPolicy(max_attempts=3)
+    )
+
+    arrivals_response = cta_client.arrivals(mapid=1)
+
+    assert len(arrivals_response.to_frame()) == 4
+    assert cta_client.retry.stats.retries == 2
+
+
+def test_arrivals_with_station_name(stub_transport):
+    stations = Stations(snapshot=TEST_DATA_DIR / "stations.json")
+    cta_client = CTAClient(key=FAKE_KEY, transport=stub_transport, stations=stations)
+
+    cta_client.arrivals(mapid="18TH", route=Route.PINK)
+
+    _, params = stub_transport.calls[0]
+    assert params["mapid"] == [40830]
+
+
+def test_arrivals_unknown_station_name(stub_transport):
+    stations = Stations(snapshot=TEST_DATA_DIR / "stations.json")
+    cta_client = CTAClient(key=FAKE_KEY, transport=stub_transport, stations=stations)
+
+    with pytest.raises(StationNotFoundError):
+        cta_client.arrivals(mapid="Damen")
+
+
+def test_async_arrivals_loads_stations_in_a_thread(mocker, async_cta_client):
+    threads = []
+
+    def load_stations():
+        threads.append(threading.get_ident())
+        return Stations(snapshot=TEST_DATA_DIR / "stations.json")
+
+    mocker.patch("cta.client.Stations", side_effect=load_stations)
+
+    asyncio.run(async_cta_client.arrivals(mapid="18TH", route=Route.PINK))
+    asyncio.run(async_cta_client.arrivals_bulk(mapid=["18TH"], route=Route.PINK))
+
+    _, params = async_cta_client.transport.calls[-1]
+    assert params["mapid"] == [40830]
+    assert len(threads) == 1
+    assert threading.get_ident() not in threads
+
+
+def test_arrivals_station_name_with_many_stations(tmp_path, stub_transport):
+    station = json.loads((TEST_DATA_DIR / "stations.json").read_text())[0]
+    dataset = [
+        {**station, "station_name": "Western", "map_id": str(40000 + i)}
+        for i in range(6)
+    ]
+    snapshot = tmp_path / "stations.json"
+    snapshot.write_text(json.dumps(dataset))
+    stations = Stations(snapshot=snapshot)
+    cta_client = CTAClient(key=FAKE_KEY, transport=stub_transport, stations=stations)
+
+    with pytest.raises(TooManyArgsError, match="'Western' matches 6 stations"):
+        cta_client.arrivals(mapid="Western")
+    assert not stub_transport.calls
+
+    cta_client.arrivals_bulk(mapid="Western")
+    assert len(stub_transport.calls) == 2
+
+
+def follow_handler(url, params):
+    runnumber = params["runnumber"][0]
+    if runnumber == "3":
+        return {"ctatt": {"errCd": "502", "errNm": "Invalid run number"}}
+    if runnumber == "4":
+        return TransportResponse(status_code=500, content=b"")
+
+    return load_test_data(file_name="follow_response.json")
+
+
+def test_follow_bulk():
+    transport = StubTransport(follow_handler)
+    cta_client = CTAClient(key=FAKE_KEY, transport=transport)
+
+    follow_response = cta_client.follow_bulk([1, "2", 3, 4, 1])
+
+    assert len(transport.calls) == 4
+    assert isinstance(follow_response, FollowResponse)
+    assert list(follow_response.responses) == ["1", "2"]
+    assert isinstance(follow_response.errors["3"], ValueError)
+    assert isinstance(follow_response.errors["4"], HTTPStatusError)
+
+    df_follow = follow_response.to_frame()
+    n_etas = len(load_test_data("follow_response.json")["ctatt"]["eta"])
+    assert df_follow["rn"].value_counts().to_dict() == {"1": n_etas, "2": n_etas}
+
+
+def test_follow_bulk_keeps_rate_limit_errors(stub_transport):
+    cta_client = CTAClient(
+        key=FAKE_KEY,
+        transport=stub_transport,
+        rate_limiter=RateLimiter(daily_budget=1, mode="shed"),
+    )
+
+    follow_response = cta_client.follow_bulk([1, 2], max_workers=1)
+
+    assert len(follow_response.responses) == 1
+    assert [type(error) for error in follow_response.errors.values()] == [
+        QuotaExhaustedError
+    ]
+
+
+def test_follow_bulk_raises_other_errors(mocker, stub_transport):
+    cta_client = CTAClient(key=FAKE_KEY, transport=stub_transport)
+    mocker.patch.object(cta_client, "follow", side_effect=KeyError("rn"))
+
+    with pytest.raises(KeyError):
+        cta_client.follow_bulk([1, 2])
+
+
+def test_async_follow_bulk():
+    transport = AsyncStubTransport(follow_handler)
+    cta_client = AsyncCTAClient(key=FAKE_KEY, transport=transport, max_concurrency=2)
+
+    follow_response = asyncio.run(cta_client.follow_bulk(["1", "3"]))
+
+    assert list(follow_response.responses) == ["1"]
+    assert list(follow_response.errors) == ["3"]
+
+
+
+def test_unchanged_body_reuses_response(mocker, stub_transport):
+    instrumentation = Instrumentation()
+    cta_client = CTAClient(
+        key=FAKE_KEY,
+        transport=stub_transport,
+        instrumentation=instrumentation,
+        fingerprints=Fingerprints(),
+    )
+    decode = mocker.spy(cta_client.decoder, "decode")
+
+    first = cta_client.arrivals(mapid=40590)
+    second = cta_client.arrivals(mapid=40590)
+    other = cta_client.arrivals(mapid=40380)
+
+    assert second is first
+    assert other is not first
+    assert decode.call_count == 2
+    assert cta_client.fingerprints.stats() == {"unchanged": 1, "changed": 2, "size": 2}
+    assert instrumentation.registry.counter("unchanged_total", endpoint="arrivals") == 1
+
+
+def test_changed_body_builds_new_response(stub_transport):
+    payloads = [load_test_data("arrivals_response.json") for _ in range(2)]
+    del payloads[1]["ctatt"]["eta"][0]
+    responses = iter(payloads)
+    transport = StubTransport(lambda url, params: next(responses))
+    cta_client = CTAClient(
+        key=FAKE_KEY, transport=transport, fingerprints=Fingerprints()
+    )
+
+    first = cta_client.arrivals(mapid=40590)
+    second = cta_client.arrivals(mapid=40590)
+
+    assert second is not first
+    assert len(second.to_records()) == 3
+    assert cta_client.fingerprints.unchanged == 0
+
+
+def test_async_unchanged_body_reuses_response():
+    transport = AsyncStubTransport(stub_handler)
+    cta_client = AsyncCTAClient(
+        key=FAKE_KEY, transport=transport, fingerprints=Fingerprints()
+    )
+
+    async def poll():
+        return [await cta_client.locations(route=Route.BLUE) for _ in range(2)]
+
+    first, second = asyncio.run(poll())
+
+    assert second is first
+    assert cta_client.fingerprints.unchanged == 1
@@ -0,0 +1,75 @@
+import pytest
+
+from cta.client import CTAClient
+from cta.decoding import Decoder, MsgspecDecoder, OrjsonDecoder, default_decoder
+from cta.transport import StubTransport, TransportResponse
+
+from pathlib import Path
+import json
+
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+FILE_NAMES = [
+    "arrivals_response.json",
+    "follow_response.json",
+    "locations_response.json",
+]
+
+
+def available_decoders() -> list:
+    decoders = [Decoder()]
+    for cls, kwargs in [
+        (OrjsonDecoder, {}),
+        (MsgspecDecoder, {}),
+        (MsgspecDecoder, {"typed": True}),
+    ]:
+        try:
+            decoders.append(cls(**kwargs))
+        except ImportError:
+            continue
+
+    return decoders
+
+
+@pytest.mark.parametrize("decoder", available_decoders(), ids=repr)
+@pytest.mark.parametrize("file_name", FILE_NAMES)
+def test_decoders_match_json(decoder, file_name):
+    content = (TEST_DATA_DIR / file_name).read_bytes()
+
+    assert decoder.decode(content) == json.loads(content)
+
+
+@pytest.mark.parametrize("decoder", available_decoders(), ids=repr)
+def test_decoders_raise_value_error(decoder):
+    with pytest.raises(ValueError):
+        decoder.decode(b"{not json")
+
+
+def test_typed_decoder_schema():
+    pytest.importorskip("msgspec")
+    decoder = MsgspecDecoder(typed=True)
+
+    payload = decoder.decode(b'{"ctatt": {"errCd": "0", "eta": [{"rn": "1", "x": 1}]}}')
+    assert payload == {"ctatt": {"errCd": "0", "eta": [{"rn": "1"}]}}
+
+    with pytest.raises(ValueError):
+        decoder.decode(b'{"ctatt": {"eta": [{"rn": 1}]}}')
+
+
+def test_default_decoder_falls_back(mocker):
+    mocker.patch.dict("sys.modules", {"msgspec": None, "orjson": None})
+
+    assert type(default_decoder()) is Decoder
+
+
+def test_client_uses_decoder(mocker):
+    decoder = Decoder()
+    decode = mocker.spy(decoder, "decode")
+    transport = StubTransport(
+        lambda url, params: TransportResponse(200, b'{"ctatt": {"errCd": "0"}}')
+    )
+    cta_client = CTAClient(key="abc", transport=transport, decoder=decoder)
+
+    cta_client.arrivals(mapid=1)
+
+    decode.assert_called_once_with(b'{"ctatt": {"errCd": "0"}}')
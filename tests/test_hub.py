@@ -0,0 +1,189 @@
+import pytest
+
+from cta.client import CTAClient
+from cta.decoding import Decoder, MsgspecDecoder
+from cta.hub import (
+    Hub,
+    HubClosedError,
+    Subscriber,
+    Topic,
+    build_topics,
+    main,
+    parse_route,
+)
+from cta.poller import EventType
+from cta.responses import ArrivalResponse, LocationResponse
+from cta.route import Route
+from cta.transport import HTTPStatusError, StubTransport, TransportResponse
+
+from pathlib import Path
+import copy
+import json
+import tempfile
+
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+
+
+def load(name):
+    with open(TEST_DATA_DIR / f"{name}_response.json") as f:
+        return json.load(f)
+
+
+class Feed:
+    """Payloads of the stub transport which the tests change between polls."""
+
+    def __init__(self):
+        self.payloads = {"arrivals": load("arrivals"), "locations": load("locations")}
+
+    def __call__(self, url, params):
+        if "ttpositions" in url:
+            return self.payloads["locations"]
+
+        return self.payloads["arrivals"]
+
+
+@pytest.fixture
+def feed():
+    return Feed()
+
+
+@pytest.fixture
+def hub(feed):
+    client = CTAClient(key="abc", transport=StubTransport(feed))
+    topics = [
+        Topic("damen", "arrivals", mapid=40590),
+        Topic("blue", "locations", route=Route.BLUE),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        with Hub(client, Path(directory) / "hub.sock", topics) as hub:
+            hub.start()
+            yield hub
+
+
+def subscribe(hub, topics=None):
+    return Subscriber(hub.path, topics=topics, timeout=5)
+
+
+def test_topic_checks_method():
+    with pytest.raises(ValueError):
+        Topic("damen", "stations")
+
+
+def test_subscriber_gets_latest_snapshots(hub):
+    assert hub.poll() == ["damen", "blue"]
+
+    with subscribe(hub) as subscriber:
+        arrivals = subscriber.snapshot("damen")
+        locations = subscriber.snapshot("blue")
+
+    assert isinstance(arrivals, ArrivalResponse)
+    assert arrivals.data == load("arrivals")
+    assert isinstance(locations, LocationResponse)
+    assert len(locations.to_records()) == 10
+
+
+@pytest.mark.parametrize("decoder", [Decoder(), MsgspecDecoder(typed=True)])
+def test_subscriber_decoder(hub, decoder):
+    hub.poll()
+
+    with Subscriber(
+        hub.path, topics=["damen"], decoder=decoder, timeout=5
+    ) as subscriber:
+        arrivals = subscriber.snapshot("damen")
+
+    assert len(arrivals.to_records()) == 4
+
+
+def test_only_changes_are_published(hub, feed):
+    hub.poll()
+    with subscribe(hub, topics=["damen"]) as subscriber:
+        message = subscriber.receive()
+        assert message.topic == "damen"
+        assert [event.type for event in message.events] == [EventType.NEW] * 4
+
+        payload = copy.deepcopy(feed.payloads["arrivals"])
+        payload["ctatt"]["tmst"] = "2022-05-15T14:47:06"
+        feed.payloads["arrivals"] = payload
+        assert hub.poll() == []
+
+        payload = copy.deepcopy(payload)
+        del payload["ctatt"]["eta"][0]
+        feed.payloads["arrivals"] = payload
+        assert hub.poll() == ["damen"]
+
+        message = subscriber.receive()
+
+    assert message.topic == "damen"
+    assert [(event.type, event.rn) for event in message.events] == [
+        (EventType.DEPARTED, "116")
+    ]
+    assert hub.published == 3
+
+
+def test_subscribers_share_the_requests(hub):
+    subscribers = [subscribe(hub, topics=["blue"]) for _ in range(3)]
+    hub.poll()
+
+    for subscriber in subscribers:
+        message = subscriber.receive()
+        assert message.topic == "blue"
+        assert message.events == []
+        subscriber.close()
+
+    assert len(hub.client.transport.calls) == 2
+
+
+def test_errors_are_kept(hub):
+    hub.client.transport.handler = lambda url, params: TransportResponse(500, b"oops")
+
+    assert hub.poll() == []
+    assert isinstance(hub.errors["damen"], HTTPStatusError)
+    assert hub.polls == 1
+
+
+def test_subscriber_stops_when_hub_closes(hub):
+    hub.poll()
+    subscriber = subscribe(hub, topics=["blue"])
+    subscriber.receive()
+
+    hub.close()
+
+    assert list(subscriber) == []
+    with pytest.raises(HubClosedError):
+        subscriber.receive()
+    subscriber.close()
+
+
+def test_serve_forever_stops_after_max_polls(hub):
+    hub.interval = 0
+    hub.serve_forever(max_polls=3)
+
+    assert hub.polls == 3
+    assert hub.published == 2
+
+
+def test_main_requires_topics():
+    with pytest.raises(SystemExit):
+        main(["--socket", "hub.sock"])
+
+
+@pytest.mark.parametrize(
+    "value, route",
+    [("green", Route.GREEN), ("Brown", Route.BROWN), ("org", Route.ORANGE)],
+)
+def test_parse_route(value, route):
+    assert parse_route(value) == route
+
+
+def test_main_rejects_unknown_route():
+    with pytest.raises(SystemExit):
+        main(["--socket", "hub.sock", "--route", "silver"])
+
+
+def test_build_topics_groups_the_stations():
+    topics = build_topics([Route.PURPLE], [40590, 40380, 41660])
+
+    assert [topic.name for topic in topics] == ["purple", "arrivals"]
+    assert topics[1].method == "arrivals_bulk"
+    assert topics[1].params == {"mapid": [40590, 40380, 41660]}
@@ -0,0 +1,60 @@
+import pytest
+
+import subprocess
+import sys
+
+import cta
+from cta._lazy import LazyModule
+
+
+def test_lazy_module_imports_on_access():
+    json = LazyModule("json")
+
+    assert "not loaded" in repr(json)
+    assert json.loads("[1]") == [1]
+    assert "not loaded" not in repr(json)
+
+
+def test_lazy_module_missing_package():
+    missing = LazyModule("not_a_real_package", extra="pandas")
+
+    with pytest.raises(ImportError, match=r"python-cta\[pandas\]"):
+        missing.DataFrame
+
+
+def test_lazy_attributes():
+    from cta.client import CTAClient
+
+    assert cta.CTAClient is CTAClient
+    assert "Stations" in dir(cta)
+    with pytest.raises(AttributeError):
+        cta.NotAClass
+
+
+def imported_modules(code: str) -> set[str]:
+    code = f"import sys\n{code}\nprint(' '.join(sys.modules))"
+    output = subprocess.check_output([sys.executable, "-c", code])
+
+    return set(output.decode().split())
+
+
+def test_import_cta_is_light():
+    modules = imported_modules("import cta")
+
+    for module in ["pandas", "requests", "cta.client"]:
+        assert module not in modules
+
+
+def test_records_without_pandas_or_requests():
+    code = """
+from cta import CTAClient
+from cta.transport import StubTransport
+
+payload = {"ctatt": {"errCd": "0", "eta": [{"rn": "1", "arrT": "2022-05-15T14:56:18"}]}}
+cta_client = CTAClient(key="abc", transport=StubTransport(lambda url, params: payload))
+cta_client.arrivals(mapid=1).to_records()
+"""
+    modules = imported_modules(code)
+
+    for module in ["pandas", "numpy", "requests", "asyncio"]:
+        assert module not in modules
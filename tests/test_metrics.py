@@ -0,0 +1,127 @@
+import pytest
+
+from cta.client import AsyncCTAClient, CTAClient
+from cta.metrics import Histogram, Instrumentation, MetricsRegistry, timed
+from cta.transport import (
+    AsyncStubTransport,
+    HTTPStatusError,
+    StubTransport,
+    TransportResponse,
+)
+
+from pathlib import Path
+import asyncio
+
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+
+
+def handler(url, params):
+    with open(TEST_DATA_DIR / "arrivals_response.json") as f:
+        return TransportResponse(200, f.read().encode(), url=url, elapsed=0.02)
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1))
+    for value in [0.05, 0.1, 0.5, 2]:
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [(0.1, 2), (1, 3), (float("inf"), 4)]
+    assert histogram.sum == pytest.approx(2.65)
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.9) == float("inf")
+    assert Histogram().quantile(0.5) is None
+
+
+def test_registry_to_prometheus():
+    registry = MetricsRegistry(buckets=(0.1,))
+    registry.describe("requests_total", "Requests made.")
+    registry.inc("requests_total", endpoint="arrivals")
+    registry.inc("requests_total", 2, endpoint="arrivals")
+    registry.observe("stage_seconds", 0.05, stage="transport", endpoint='a"b')
+
+    assert registry.counter("requests_total", endpoint="arrivals") == 3
+    assert registry.counter("requests_total", endpoint="follow") == 0
+    assert registry.to_prometheus().splitlines() == [
+        "# HELP cta_requests_total Requests made.",
+        "# TYPE cta_requests_total counter",
+        'cta_requests_total{endpoint="arrivals"} 3',
+        "# TYPE cta_stage_seconds histogram",
+        'cta_stage_seconds_bucket{endpoint="a\\"b",stage="transport",le="0.1"} 1',
+        'cta_stage_seconds_bucket{endpoint="a\\"b",stage="transport",le="+Inf"} 1',
+        'cta_stage_seconds_sum{endpoint="a\\"b",stage="transport"} 0.05',
+        'cta_stage_seconds_count{endpoint="a\\"b",stage="transport"} 1',
+    ]
+
+
+def test_timed_disabled():
+    assert timed(None, "decode", "arrivals") is timed(None, "to_frame", "follow")
+
+
+def test_client_stages():
+    calls = []
+    instrumentation = Instrumentation(hooks=[lambda *args: calls.append(args)])
+    cta_client = CTAClient(
+        key="abc", transport=StubTransport(handler), instrumentation=instrumentation
+    )
+
+    cta_client.arrivals(mapid=40590).to_frame()
+
+    registry = instrumentation.registry
+    for stage in [
+        "request",
+        "transport",
+        "server",
+        "decode",
+        "check_input",
+        "to_frame",
+    ]:
+        histogram = registry.histogram(
+            "stage_seconds", endpoint="arrivals", stage=stage
+        )
+        assert histogram.count == 1
+
+    assert registry.histogram(
+        "stage_seconds", endpoint="arrivals", stage="server"
+    ).sum == pytest.approx(0.02)
+    assert registry.counter("requests_total", endpoint="arrivals") == 1
+    assert [call[0] for call in calls] == [
+        "transport",
+        "server",
+        "decode",
+        "request",
+        "check_input",
+        "to_frame",
+    ]
+
+
+def test_client_counts_errors():
+    instrumentation = Instrumentation()
+    transport = StubTransport(lambda url, params: TransportResponse(503, b""))
+    cta_client = CTAClient(
+        key="abc", transport=transport, instrumentation=instrumentation
+    )
+
+    with pytest.raises(HTTPStatusError):
+        cta_client.follow(runnumber=123)
+
+    registry = instrumentation.registry
+    assert (
+        registry.counter(
+            "errors_total", endpoint="follow", stage="request", error="HTTPStatusError"
+        )
+        == 1
+    )
+
+
+def test_async_client_stages():
+    instrumentation = Instrumentation()
+    cta_client = AsyncCTAClient(
+        key="abc",
+        transport=AsyncStubTransport(handler),
+        instrumentation=instrumentation,
+    )
+
+    asyncio.run(cta_client.arrivals(mapid=40590))
+
+    assert instrumentation.registry.counter("requests_total", endpoint="arrivals") == 1
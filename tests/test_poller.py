@@ -0,0 +1,170 @@
+import pytest
+
+from cta.client import AsyncCTAClient, CTAClient
+from cta.poller import ChangeEvent, EventType, Poller, diff
+from cta.ratelimit import QuotaExhaustedError, RateLimiter
+from cta.records import Arrival
+from cta.transport import (
+    AsyncStubTransport,
+    HTTPStatusError,
+    StubTransport,
+    TransportResponse,
+)
+
+from pathlib import Path
+import asyncio
+import copy
+import json
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+
+
+@pytest.fixture
+def payloads():
+    with open(TEST_DATA_DIR / "arrivals_response.json") as f:
+        first = json.load(f)
+
+    second = copy.deepcopy(first)
+    etas = second["ctatt"]["eta"]
+    etas[1]["arrT"] = "2022-05-15T14:59:51"
+    etas[2]["isDly"] = "1"
+    etas[3]["rn"] = "999"
+    del etas[0]
+
+    return [first, second]
+
+
+def make_handler(payloads):
+    responses = iter(payloads)
+
+    def handler(url, params):
+        return next(responses)
+
+    return handler
+
+
+def arrival(rn="1", staId="40590", arrT="2022-05-15T14:56:18", isDly="0"):
+    return Arrival.from_dict(
+        {
+            "rn": rn,
+            "staId": staId,
+            "arrT": arrT,
+            "prdt": "2022-05-15T14:46:18",
+            "isDly": isDly,
+        }
+    )
+
+
+def test_diff():
+    previous = {("1", 40590): arrival(), ("2", 40590): arrival(rn="2")}
+    current = {
+        ("1", 40590): arrival(arrT="2022-05-15T14:57:18", isDly="1"),
+        ("3", 40590): arrival(rn="3"),
+    }
+
+    events = diff(previous, current)
+
+    assert [(event.type, event.rn) for event in events] == [
+        (EventType.DELAY_CHANGED, "1"),
+        (EventType.UPDATED, "1"),
+        (EventType.NEW, "3"),
+        (EventType.DEPARTED, "2"),
+    ]
+    assert events[1].previous == previous[("1", 40590)]
+    assert events[-1].key == ("2", 40590)
+
+
+def test_diff_unchanged():
+    snapshot = {("1", 40590): arrival()}
+
+    assert diff(snapshot, dict(snapshot)) == []
+
+
+def test_poller(mocker, payloads):
+    sleep = mocker.patch("time.sleep")
+    client = CTAClient(key="abc", transport=StubTransport(make_handler(payloads)))
+
+    poller = Poller(client, mapid=40590, interval=10, max_polls=2)
+    events = list(poller)
+
+    assert sleep.call_count == 1
+    assert poller.polls == 2
+    assert [event.type for event in events[:4]] == [EventType.NEW] * 4
+    assert [(event.type, event.rn) for event in events[4:]] == [
+        (EventType.UPDATED, "112"),
+        (EventType.DELAY_CHANGED, "211"),
+        (EventType.NEW, "999"),
+        (EventType.DEPARTED, "116"),
+        (EventType.DEPARTED, "123"),
+    ]
+
+
+def test_poller_async(mocker, payloads):
+    mocker.patch("asyncio.sleep")
+    client = AsyncCTAClient(
+        key="abc", transport=AsyncStubTransport(make_handler(payloads))
+    )
+
+    async def collect():
+        return [event async for event in Poller(client, mapid=40590, max_polls=2)]
+
+    events = asyncio.run(collect())
+
+    assert len(events) == 4 + 5
+    assert all(isinstance(event, ChangeEvent) for event in events)
+
+
+def test_poller_keeps_polling_after_errors(mocker, payloads):
+    mocker.patch("time.sleep")
+    failure = TransportResponse(status_code=503, content=b"unavailable")
+    client = CTAClient(
+        key="abc",
+        transport=StubTransport(make_handler([payloads[0], failure, payloads[1]])),
+    )
+    errors = []
+
+    poller = Poller(client, mapid=40590, max_polls=3, on_error=errors.append)
+    events = list(poller)
+
+    assert poller.polls == 3
+    assert poller.errors == 1
+    assert len(errors) == 1
+    assert isinstance(errors[0], HTTPStatusError)
+    assert len(events) == 4 + 5
+
+
+def test_poller_async_keeps_polling_after_errors(mocker, payloads):
+    mocker.patch("asyncio.sleep")
+    client = AsyncCTAClient(
+        key="abc",
+        transport=AsyncStubTransport(
+            make_handler([{"ctatt": {"errCd": "500", "errNm": "Down"}}, payloads[0]])
+        ),
+    )
+    errors = []
+
+    async def collect():
+        poller = Poller(client, mapid=40590, max_polls=2, on_error=errors.append)
+        return [event async for event in poller]
+
+    events = asyncio.run(collect())
+
+    assert len(errors) == 1
+    assert len(events) == 4
+
+
+def test_poller_keeps_polling_when_rate_limited(mocker, payloads):
+    mocker.patch("time.sleep")
+    client = CTAClient(
+        key="abc",
+        transport=StubTransport(make_handler(payloads)),
+        rate_limiter=RateLimiter(daily_budget=1, mode="shed"),
+    )
+    errors = []
+
+    poller = Poller(client, mapid=40590, max_polls=3, on_error=errors.append)
+    events = list(poller)
+
+    assert len(events) == 4
+    assert poller.errors == 2
+    assert all(isinstance(error, QuotaExhaustedError) for error in errors)
@@ -0,0 +1,135 @@
+import pytest
+
+from cta.ratelimit import (
+    MemoryCounter,
+    QuotaExhaustedError,
+    RateLimiter,
+    RateLimitExceededError,
+    SQLiteCounter,
+)
+
+import asyncio
+import threading
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        RateLimiter(mode="drop")
+
+
+def test_shed_mode():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=2, mode="shed", clock=clock)
+
+    limiter.acquire()
+    limiter.acquire()
+    with pytest.raises(RateLimitExceededError):
+        limiter.acquire()
+
+    clock.now = 1
+    limiter.acquire()
+
+
+def test_block_mode_waits(mocker):
+    sleep = mocker.patch("time.sleep")
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, burst=1, clock=clock)
+
+    limiter.acquire()
+    sleep.assert_not_called()
+
+    limiter.acquire()
+    sleep.assert_called_once_with(0.5)
+
+
+def test_daily_budget():
+    limiter = RateLimiter(daily_budget=3)
+
+    for _ in range(3):
+        limiter.acquire()
+
+    assert limiter.used() == 3
+    assert limiter.remaining() == 0
+    with pytest.raises(QuotaExhaustedError):
+        limiter.acquire()
+
+
+def test_exhausted_budget_keeps_the_token():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=1, daily_budget=1, mode="shed", clock=clock)
+
+    limiter.acquire()
+    clock.now = 1
+    with pytest.raises(QuotaExhaustedError):
+        limiter.acquire()
+
+    limiter.counter = MemoryCounter()
+    limiter.acquire()
+
+
+def test_sustainable_rate():
+    limiter = RateLimiter(daily_budget=1000)
+
+    assert 0 < limiter.seconds_until_reset() <= 24 * 60 * 60
+    assert limiter.sustainable_rate() >= 1000 / (24 * 60 * 60)
+
+
+@pytest.mark.parametrize("counter_type", ["memory", "sqlite"])
+def test_counter_is_shared_between_threads(tmp_path, counter_type):
+    if counter_type == "memory":
+        counter = MemoryCounter()
+    else:
+        counter = SQLiteCounter(tmp_path / "usage.db")
+
+    consumed = []
+
+    def consume():
+        for _ in range(10):
+            consumed.append(counter.try_consume("2022-05-15", limit=25))
+
+    threads = [threading.Thread(target=consume) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(consumed) == 25
+    assert counter.used("2022-05-15") == 25
+
+
+def test_sqlite_counter_is_shared_between_instances(tmp_path):
+    path = tmp_path / "usage.db"
+    RateLimiter(counter=SQLiteCounter(path)).acquire()
+
+    assert RateLimiter(counter=SQLiteCounter(path)).used() == 1
+
+
+def test_aacquire_uses_sqlite_counter_from_a_thread(tmp_path):
+    counter = SQLiteCounter(tmp_path / "usage.db")
+    threads = []
+    try_consume = counter.try_consume
+
+    def record_thread(day, limit):
+        threads.append(threading.get_ident())
+        return try_consume(day, limit)
+
+    counter.try_consume = record_thread
+    limiter = RateLimiter(daily_budget=1, counter=counter)
+
+    async def acquire_twice():
+        await limiter.aacquire()
+        await limiter.aacquire()
+
+    with pytest.raises(QuotaExhaustedError):
+        asyncio.run(acquire_twice())
+
+    assert limiter.used() == 1
+    assert threading.get_ident() not in threads
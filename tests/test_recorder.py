@@ -0,0 +1,126 @@
+import pytest
+
+from cta.responses import (
+    ArrivalResponse,
+    FollowBulkResponse,
+    FollowResponse,
+    LocationResponse,
+)
+
+from datetime import datetime
+from pathlib import Path
+import json
+import time
+
+pytest.importorskip("pyarrow")
+
+from cta.recorder import ArchiveReader, Recorder  # noqa: E402
+
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+
+
+def load_response(cls, file_name: str):
+    with open(TEST_DATA_DIR / file_name) as f:
+        return cls(data=json.load(f))
+
+
+@pytest.fixture
+def arrival_response():
+    return load_response(ArrivalResponse, "arrivals_response.json")
+
+
+@pytest.fixture
+def location_response():
+    return load_response(LocationResponse, "locations_response.json")
+
+
+def test_recorder_partitions(tmp_path, arrival_response, location_response):
+    with Recorder(tmp_path, flush_interval=None) as recorder:
+        assert recorder.record(arrival_response) == 4
+        assert recorder.record(location_response) == 10
+        assert recorder.files_written == 0
+
+    assert recorder.rows_written == 14
+    files = sorted(path.relative_to(tmp_path) for path in tmp_path.rglob("*.parquet"))
+    assert [str(file.parent) for file in files] == [
+        "arrivals/date=2022-05-15/route=blue",
+        "locations/date=2022-05-15/route=blue",
+    ]
+
+
+def test_recorder_flushes_when_full(tmp_path, arrival_response):
+    recorder = Recorder(tmp_path, flush_rows=5, flush_interval=None)
+
+    recorder.record(arrival_response)
+    assert recorder.files_written == 0
+    recorder.record(arrival_response)
+    assert recorder.files_written == 1
+
+
+def test_recorder_background_flush(tmp_path, arrival_response):
+    recorder = Recorder(tmp_path, flush_interval=0.01)
+    recorder.record(arrival_response)
+
+    deadline = time.monotonic() + 5
+    while recorder.rows_written == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert recorder.rows_written == 4
+    recorder.close()
+
+
+def test_recorder_keeps_rows_on_failed_write(mocker, tmp_path, arrival_response):
+    recorder = Recorder(tmp_path, flush_interval=None)
+    recorder.record(arrival_response)
+
+    mocker.patch.object(recorder, "_write", side_effect=OSError)
+    with pytest.raises(OSError):
+        recorder.flush()
+
+    mocker.stopall()
+    recorder.flush()
+    assert recorder.rows_written == 4
+
+
+def test_archive_reader(tmp_path, arrival_response, location_response):
+    with Recorder(tmp_path, flush_interval=None) as recorder:
+        recorder.record(arrival_response)
+        recorder.record(arrival_response, recorded_at=datetime(2022, 5, 16, 8))
+        recorder.record(location_response)
+
+    reader = ArchiveReader(tmp_path)
+
+    df = reader.read("arrivals")
+    assert len(df) == 8
+    assert str(df["staId"].dtype) == "int32"
+    assert str(df["rt"].dtype) == "category"
+
+    df = reader.read(
+        "arrivals", start=datetime(2022, 5, 16), end=datetime(2022, 5, 17)
+    )
+    assert df["recorded_at"].unique().tolist() == [datetime(2022, 5, 16, 8)]
+
+    assert len(reader.read("locations", routes=["Blue"])) == 10
+    assert len(reader.read("locations", routes=["red"])) == 0
+
+    batches = reader.iter_batches("locations", columns=["rn", "lat"])
+    assert sum(batch.num_rows for batch in batches) == 10
+
+
+def test_recorder_follow_bulk(tmp_path):
+    follow = load_response(FollowResponse, "follow_response.json")
+    response = FollowBulkResponse({"106": follow, "321": follow})
+
+    with Recorder(tmp_path, flush_interval=None) as recorder:
+        assert recorder.record(response) == 12
+
+    df = ArchiveReader(tmp_path).read("follow", columns=["rn"])
+    assert sorted(df["rn"].unique()) == ["106", "321"]
+
+
+def test_archive_reader_empty(tmp_path):
+    reader = ArchiveReader(tmp_path)
+
+    assert list(reader.iter_batches("follow")) == []
+    assert reader.read("follow", columns=["rn"]).columns.tolist() == ["rn"]
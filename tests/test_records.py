@@ -0,0 +1,111 @@
+import pytest
+
+from datetime import datetime
+
+from cta.records import (
+    Arrival,
+    TrainPosition,
+    parse_bool,
+    parse_datetime,
+    parse_float,
+    parse_int,
+)
+
+eta_data = {
+    "staId": "40590",
+    "stpId": "30115",
+    "staNm": "Damen",
+    "stpDe": "Service toward O'Hare",
+    "rn": "116",
+    "rt": "Blue",
+    "destSt": "30171",
+    "destNm": "O'Hare",
+    "trDr": "1",
+    "prdt": "2022-05-15T14:46:18",
+    "arrT": "2022-05-15T14:56:18",
+    "isApp": "0",
+    "isSch": "0",
+    "isDly": "1",
+    "isFlt": "0",
+    "flags": None,
+    "lat": "41.8807",
+    "lon": "-87.62938",
+    "heading": "358",
+}
+
+
+@pytest.mark.parametrize(
+    "parse, value, expected",
+    [
+        (parse_int, "40590", 40590),
+        (parse_int, None, None),
+        (parse_float, "-87.62938", -87.62938),
+        (parse_float, "", None),
+        (parse_bool, "1", True),
+        (parse_bool, "0", False),
+        (parse_bool, None, False),
+        (parse_datetime, "2022-05-15T14:46:18", datetime(2022, 5, 15, 14, 46, 18)),
+        (parse_datetime, None, None),
+    ],
+)
+def test_parsers(parse, value, expected):
+    assert parse(value) == expected
+
+
+def test_arrival_from_dict():
+    arrival = Arrival.from_dict(eta_data)
+
+    assert arrival.staId == 40590
+    assert arrival.rn == "116"
+    assert arrival.isDly is True
+    assert arrival.arrT == datetime(2022, 5, 15, 14, 56, 18)
+    assert arrival.mins_til_arrival(now=datetime(2022, 5, 15, 14, 50, 18)) == 6
+    assert arrival.mins_since_prediction(now=datetime(2022, 5, 15, 14, 50, 18)) == 4
+
+
+def test_arrival_missing_position():
+    data = {key: value for key, value in eta_data.items() if key not in {"lat", "lon"}}
+
+    arrival = Arrival.from_dict(data)
+
+    assert arrival.lat is None
+    assert arrival.lon is None
+
+
+def test_records_have_slots():
+    arrival = Arrival.from_dict(eta_data)
+
+    assert not hasattr(arrival, "__dict__")
+    with pytest.raises(AttributeError):
+        arrival.other = 1
+
+
+def test_record_to_dict_and_equality():
+    arrival = Arrival.from_dict(eta_data)
+
+    assert arrival.to_dict()["heading"] == 358
+    assert arrival == Arrival.from_dict(eta_data)
+    assert "staId=40590" in repr(arrival)
+
+
+def test_records_are_hashable():
+    arrival = Arrival.from_dict(eta_data)
+    updated = Arrival.from_dict({**eta_data, "isApp": "1"})
+    later = Arrival.from_dict({**eta_data, "arrT": "2022-05-15T14:58:18"})
+
+    assert hash(arrival) == hash(Arrival.from_dict(eta_data))
+    assert hash(arrival) == hash(updated)
+    assert len({arrival, Arrival.from_dict(eta_data), updated, later}) == 3
+
+    position = TrainPosition.from_dict({"rn": "106"}, train="blue")
+    assert {position: 1}[TrainPosition.from_dict({"rn": "106"}, train="blue")] == 1
+
+
+def test_train_position_route():
+    position = TrainPosition.from_dict(
+        {"rn": "106", "nextStaId": "40590", "lat": "41.9"}, train="blue"
+    )
+
+    assert position.train == "blue"
+    assert position.nextStaId == 40590
+    assert position.heading is None
@@ -1,10 +1,14 @@
 import pytest
 
+import pandas as pd
+
+from cta.records import Arrival, TrainPosition
 from cta.responses import (
     ArrivalResponse,
     LocationResponse,
     FollowResponse,
     NoTrainsError,
+    Trains,
 )
 
 
@@ -99,3 +103,116 @@ def test_arrival_and_follow_no_trains(cls):
 
     with pytest.raises(NoTrainsError):
         response.to_frame()
+
+
+def test_merge_arrivals():
+    responses = [
+        ArrivalResponse(
+            data={
+                "ctatt": {
+                    "errCd": "0",
+                    "tmst": "2022-05-15T15:21:26",
+                    "eta": [dummy_train_data_1],
+                }
+            }
+        ),
+        ArrivalResponse(data={"ctatt": {"errCd": "0", "tmst": "2022-05-15T15:21:30"}}),
+        ArrivalResponse(
+            data={
+                "ctatt": {
+                    "errCd": "0",
+                    "tmst": "2022-05-15T15:21:28",
+                    "eta": [dummy_train_data_2],
+                }
+            }
+        ),
+    ]
+
+    merged = ArrivalResponse.merge(responses)
+
+    assert merged.data["ctatt"]["tmst"] == "2022-05-15T15:21:30"
+    assert merged.to_frame()["rn"].tolist() == ["106", "107"]
+
+
+def test_merge_arrivals_no_trains():
+    responses = [ArrivalResponse(data={"ctatt": {"errCd": "0"}})]
+
+    with pytest.raises(NoTrainsError):
+        ArrivalResponse.merge(responses).to_frame()
+
+
+def test_trains_compact_dtypes():
+    df_trains = Trains([dummy_train_data_1, dummy_train_data_2]).to_frame()
+
+    assert df_trains["nextStaId"].dtype == "int32"
+    assert df_trains["heading"].tolist() == [303, 95]
+    assert df_trains["isApp"].tolist() == [False, True]
+    assert isinstance(df_trains["nextStaNm"].dtype, pd.CategoricalDtype)
+    assert df_trains["lat"].dtype == "float64"
+    assert df_trains["arrT"].tolist() == [
+        pd.Timestamp("2022-05-15T15:22:41"),
+        pd.Timestamp("2022-05-15T15:22:04"),
+    ]
+    assert df_trains["rn"].tolist() == ["106", "107"]
+
+
+def test_trains_missing_values():
+    train = {**dummy_train_data_2, "heading": None, "lat": None}
+    df_trains = Trains([dummy_train_data_1, train]).to_frame()
+
+    assert df_trains["heading"].isna().tolist() == [False, True]
+    assert df_trains["lat"].isna().tolist() == [False, True]
+
+
+def test_locations_train_column():
+    data = {
+        "ctatt": {"route": blue_line_route_data + yellow_line_single_data, "errCd": "0"}
+    }
+
+    df_locations = LocationResponse(data=data).to_frame()
+
+    assert df_locations["train"].tolist() == ["blue", "blue", "y"]
+    assert df_locations.columns[-1] == "train"
+
+
+def test_locations_to_records():
+    data = {
+        "ctatt": {"route": blue_line_route_data + yellow_line_single_data, "errCd": "0"}
+    }
+
+    records = LocationResponse(data=data).to_records()
+
+    assert all(isinstance(record, TrainPosition) for record in records)
+    assert [record.train for record in records] == ["blue", "blue", "y"]
+    assert [record.rn for record in records] == ["106", "107", "106"]
+
+
+@pytest.mark.parametrize("cls", [ArrivalResponse, FollowResponse])
+def test_eta_to_records(cls):
+    eta = {**dummy_train_data_1, "staId": "40590"}
+    response = cls(data={"ctatt": {"errCd": "0", "eta": [eta]}})
+
+    (record,) = response.to_records()
+
+    assert isinstance(record, Arrival)
+    assert record.staId == 40590
+
+
+@pytest.mark.parametrize("cls", [ArrivalResponse, FollowResponse])
+def test_eta_to_records_no_trains(cls):
+    assert cls(data={"ctatt": {"errCd": "0"}}).to_records() == []
+
+
+def test_to_frame_reuses_the_trains(mocker):
+    data = {"ctatt": {"route": blue_line_route_data, "errCd": "0"}}
+    response = LocationResponse(data=data)
+    base_frame = mocker.spy(Trains, "base_frame")
+
+    first = response.to_frame()
+    first["rn"] = "0"
+    second = response.to_frame()
+
+    assert base_frame.call_count == 1
+    assert second["rn"].tolist() == ["106", "107"]
+    assert second.columns.tolist() == first.columns.tolist()
+    assert (second["mins_til_arrival"] <= first["mins_til_arrival"]).all()
@@ -0,0 +1,117 @@
+import pytest
+
+from cta.retry import RetryPolicy
+from cta.transport import (
+    HTTPStatusError,
+    TransportConnectionError,
+    TransportTimeoutError,
+)
+
+import asyncio
+
+
+class Flaky:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+        return "ok"
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(mocker):
+    return mocker.patch("time.sleep")
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        TransportTimeoutError("timeout"),
+        TransportConnectionError("reset"),
+        HTTPStatusError("unavailable", status_code=503),
+    ],
+)
+def test_retries_transient_errors(error):
+    policy = RetryPolicy(max_attempts=3)
+    func = Flaky([error, error])
+
+    assert policy.call(func) == "ok"
+    assert func.calls == 3
+    assert policy.stats.retries == 2
+    assert policy.stats.failures == 0
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        HTTPStatusError("not found", status_code=404),
+        ValueError("bad payload"),
+    ],
+)
+def test_does_not_retry_other_errors(error):
+    policy = RetryPolicy(max_attempts=3)
+    func = Flaky([error])
+
+    with pytest.raises(type(error)):
+        policy.call(func)
+
+    assert func.calls == 1
+    assert policy.stats.failures == 1
+
+
+def test_raises_last_error_after_max_attempts():
+    policy = RetryPolicy(max_attempts=2)
+    func = Flaky([TransportTimeoutError("first"), TransportTimeoutError("second")])
+
+    with pytest.raises(TransportTimeoutError, match="second"):
+        policy.call(func)
+
+    assert policy.stats.to_dict()["attempts"] == 2
+
+
+def test_deadline_stops_retries():
+    policy = RetryPolicy(max_attempts=10, backoff=5, jitter=False, deadline=1)
+    func = Flaky([TransportTimeoutError("timeout")])
+
+    with pytest.raises(TransportTimeoutError):
+        policy.call(func)
+
+    assert func.calls == 1
+
+
+@pytest.mark.parametrize(
+    "attempt, expected",
+    [
+        (1, 0.5),
+        (2, 1),
+        (3, 2),
+        (10, 10),
+    ],
+)
+def test_exponential_backoff(attempt, expected):
+    policy = RetryPolicy(backoff=0.5, max_backoff=10, jitter=False)
+
+    assert policy.backoff_for(attempt) == expected
+
+
+def test_backoff_jitter():
+    policy = RetryPolicy(backoff=1, jitter=True)
+
+    assert all(0 <= policy.backoff_for(2) <= 2 for _ in range(100))
+
+
+def test_async_retries(mocker):
+    mocker.patch("asyncio.sleep", return_value=None)
+    policy = RetryPolicy(max_attempts=3)
+    flaky = Flaky([TransportConnectionError("reset")])
+
+    async def func():
+        return flaky()
+
+    assert asyncio.run(policy.acall(func)) == "ok"
+    assert policy.stats.retries == 1
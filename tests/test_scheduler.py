@@ -0,0 +1,181 @@
+import pytest
+
+from cta.client import AsyncCTAClient, CTAClient
+from cta.records import Arrival
+from cta.scheduler import PollScheduler, StationSchedule
+from cta.transport import (
+    AsyncStubTransport,
+    HTTPStatusError,
+    StubTransport,
+    TransportResponse,
+)
+
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import json
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def handler(url, params):
+    with open(TEST_DATA_DIR / "arrivals_response.json") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def transport():
+    return StubTransport(handler)
+
+
+@pytest.fixture
+def scheduler(transport, clock):
+    client = CTAClient(key="abc", transport=transport)
+    mapids = [40590, 40380, 41660, 40170, 40070, 40830]
+
+    return PollScheduler(client, mapids=mapids, rate=1, clock=clock)
+
+
+def station(soonest=None, fresh=True):
+    station = StationSchedule(1, interval=15)
+    station.soonest = soonest
+    station.fresh = fresh
+
+    return station
+
+
+@pytest.mark.parametrize(
+    "soonest, fresh, expected",
+    [
+        (None, True, 300),
+        (0.5, True, 15),
+        (4, True, 120),
+        (4, False, 240),
+        (60, True, 300),
+    ],
+)
+def test_interval_for(scheduler, soonest, fresh, expected):
+    assert scheduler.interval_for(station(soonest, fresh)) == expected
+
+
+def test_step_packs_batches(scheduler, transport):
+    mapids, _ = scheduler.step()
+
+    assert len(mapids) == 4
+    _, params = transport.calls[0]
+    assert sorted(params["mapid"]) == sorted(mapids)
+    assert len(scheduler.next_batch()) == 2
+
+
+def test_update_from_arrivals(scheduler, clock):
+    scheduler.step()
+    scheduler.step()
+
+    damen = scheduler.stations[40590]
+    assert damen.soonest == pytest.approx(9.7)
+    assert damen.interval == pytest.approx(9.7 * 60 * 0.5)
+    assert scheduler.stations[40830].interval == 300
+    assert scheduler.next_batch() == []
+
+    clock.now = damen.interval
+    assert scheduler.next_batch() == [40590]
+    assert scheduler.seconds_until_due() == 0
+
+
+def test_stale_predictions_back_off(scheduler):
+    arrivals = [
+        Arrival.from_dict(
+            {
+                "rn": "1",
+                "staId": "40590",
+                "prdt": "2022-05-15T14:46:00",
+                "arrT": "2022-05-15T14:50:00",
+            }
+        )
+    ]
+    at = datetime(2022, 5, 15, 14, 46)
+
+    scheduler.update([40590], arrivals, now=0, at=at)
+    assert scheduler.stations[40590].interval == 120
+
+    scheduler.update([40590], arrivals, now=120, at=at)
+    assert not scheduler.stations[40590].fresh
+    assert scheduler.stations[40590].interval == 240
+
+
+def test_due_orders_by_lateness(scheduler):
+    for mapid, (polled, interval) in zip([40590, 40380], [(0, 10), (0, 100)]):
+        scheduler.stations[mapid].last_polled = polled
+        scheduler.stations[mapid].interval = interval
+
+    due = scheduler.due(now=100)
+
+    assert due[-2:] == [40590, 40380]
+    assert len(due) == 6
+
+
+def test_rate_must_be_positive(transport):
+    client = CTAClient(key="abc", transport=transport)
+    with pytest.raises(ValueError):
+        PollScheduler(client, mapids=[1], rate=0)
+
+
+def test_run(mocker, scheduler):
+    sleep = mocker.patch("time.sleep")
+
+    results = list(scheduler.run(max_requests=2))
+
+    assert [len(mapids) for mapids, _ in results] == [4, 2]
+    sleep.assert_called_once_with(1)
+
+
+def test_run_keeps_going_after_a_failed_request(mocker, clock):
+    failures = [TransportResponse(status_code=503, content=b"unavailable")]
+
+    def flaky(url, params):
+        return failures.pop() if failures else handler(url, params)
+
+    def sleep(seconds):
+        clock.now += seconds
+
+    mocker.patch("time.sleep", side_effect=sleep)
+    client = CTAClient(key="abc", transport=StubTransport(flaky))
+    mapids = [40590, 40380, 41660, 40170, 40070, 40830]
+    errors = []
+    scheduler = PollScheduler(
+        client, mapids=mapids, rate=1, clock=clock, on_error=errors.append
+    )
+
+    results = list(scheduler.run(max_requests=3))
+
+    assert scheduler.errors == 1
+    assert isinstance(errors[0], HTTPStatusError)
+    assert [len(mapids) for mapids, _ in results] == [2, 4]
+    assert scheduler.stations[40590].last_polled == 30
+
+
+def test_arun(mocker, clock):
+    mocker.patch("asyncio.sleep")
+    client = AsyncCTAClient(key="abc", transport=AsyncStubTransport(handler))
+    scheduler = PollScheduler(client, mapids=[40590, 40380], clock=clock)
+
+    async def collect():
+        return [result async for result in scheduler.arun(max_requests=1)]
+
+    ((mapids, response),) = asyncio.run(collect())
+
+    assert sorted(mapids) == [40380, 40590]
+    assert scheduler.stations[40590].soonest == pytest.approx(9.7)
@@ -0,0 +1,78 @@
+import pytest
+
+from cta.search import StationIndex, normalize, rows_of
+
+NAMES = [
+    "Damen",
+    "Damen",
+    "Clark/Lake",
+    "Lake",
+    "Harlem/Lake",
+    "Cermak-McCormick Place",
+]
+
+
+@pytest.fixture
+def index():
+    return StationIndex(NAMES, groups={"blue": 0b000101, "green": 0b011010})
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Damen", "damen"),
+        ("  Harlem/Lake ", "harlem/lake"),
+        ("Irving   Park", "irving park"),
+    ],
+)
+def test_normalize(name, expected):
+    assert normalize(name) == expected
+
+
+def test_rows_of():
+    assert rows_of(0b10110) == [1, 2, 4]
+    assert rows_of(0) == []
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("damen", [0, 1]),
+        ("DAMEN", [0, 1]),
+        ("lake", [2, 3, 4]),
+        ("a", [0, 1, 2, 3, 4, 5]),
+        ("k/l", [2]),
+        ("mccormick", [5]),
+        ("irving", []),
+        ("", [0, 1, 2, 3, 4, 5]),
+    ],
+)
+def test_search_substring(index, query, expected):
+    assert index.search(query) == expected
+    assert expected == [
+        row for row, name in enumerate(NAMES) if query.lower() in name.lower()
+    ]
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("lake", [3]),
+        ("cl", [2]),
+        ("d", [0, 1]),
+    ],
+)
+def test_search_prefix(index, query, expected):
+    assert index.search(query, prefix=True) == expected
+
+
+@pytest.mark.parametrize(
+    "group, expected",
+    [
+        ("blue", [2]),
+        ("green", [3, 4]),
+        ("red", []),
+    ],
+)
+def test_search_group(index, group, expected):
+    assert index.search("lake", group=group) == expected
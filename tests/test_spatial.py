@@ -0,0 +1,108 @@
+import pytest
+
+from cta.records import TrainPosition
+from cta.route import Route
+from cta.spatial import TrainIndex, route_names
+
+import math
+import random
+
+
+def position(rn, lat, lon, train="blue"):
+    return TrainPosition.from_dict(
+        {"rn": rn, "lat": str(lat), "lon": str(lon)}, train=train
+    )
+
+
+@pytest.fixture
+def positions():
+    rng = random.Random(0)
+
+    return [
+        position(
+            str(i),
+            41.88 + rng.uniform(-0.2, 0.2),
+            -87.63 + rng.uniform(-0.2, 0.2),
+            train=rng.choice(["blue", "red", "g"]),
+        )
+        for i in range(300)
+    ]
+
+
+@pytest.fixture
+def index(positions):
+    index = TrainIndex(cell_size=1000)
+    index.update(positions)
+
+    return index
+
+
+def brute_force(index, positions, lat, lon, route=None):
+    x, y = index.project(lat, lon)
+    distances = []
+    for p in positions:
+        if route is not None and p.train != route:
+            continue
+        px, py = index.project(p.lat, p.lon)
+        distances.append((math.hypot(px - x, py - y), p.rn))
+
+    return sorted(distances)
+
+
+@pytest.mark.parametrize("route", [None, "red"])
+@pytest.mark.parametrize("k", [1, 5, 50])
+def test_nearest_matches_brute_force(index, positions, k, route):
+    rng = random.Random(k)
+    for _ in range(20):
+        lat, lon = 41.88 + rng.uniform(-0.3, 0.3), -87.63 + rng.uniform(-0.3, 0.3)
+
+        nearest = index.nearest(lat, lon, k=k, route=route)
+        expected = brute_force(index, positions, lat, lon, route)[:k]
+
+        assert [d for d, _ in nearest] == pytest.approx([d for d, _ in expected])
+
+
+@pytest.mark.parametrize("radius", [100, 2000, 50_000])
+def test_within_matches_brute_force(index, positions, radius):
+    within = index.within(41.88, -87.63, radius, route=Route.BLUE)
+    expected = [
+        d
+        for d, _ in brute_force(index, positions, 41.88, -87.63, "blue")
+        if d <= radius
+    ]
+
+    assert [d for d, _ in within] == pytest.approx(expected)
+    assert all(p.train == "blue" for _, p in within)
+
+
+def test_nearest_with_fewer_trains_than_k(index):
+    assert len(index.nearest(41.88, -87.63, k=1000)) == 300
+    assert index.nearest(41.88, -87.63, route="y") == []
+    assert TrainIndex().nearest(41.88, -87.63) == []
+
+
+def test_update_moves_and_removes_trains():
+    index = TrainIndex(cell_size=100)
+    index.update([position("1", 41.88, -87.63), position("2", 41.9, -87.65)])
+
+    index.update([position("1", 41.95, -87.7), position("3", 41.88, -87.63, "red")])
+
+    assert len(index) == 2
+    assert "2" not in index
+    ((distance, train),) = index.nearest(41.95, -87.7)
+    assert train.rn == "1"
+    assert distance == pytest.approx(0)
+    assert index.nearest(41.88, -87.63, route="blue")[0][1].rn == "1"
+
+
+def test_update_skips_trains_without_position():
+    index = TrainIndex()
+    index.update([TrainPosition.from_dict({"rn": "1"}, train="blue")])
+
+    assert len(index) == 0
+
+
+def test_route_names():
+    assert route_names(None) is None
+    assert route_names(Route.BROWN) == ["brn"]
+    assert route_names(["Blue", Route.RED]) == ["blue", "red"]
@@ -0,0 +1,192 @@
+import pytest
+
+from cta.responses import (
+    ArrivalResponse,
+    FollowBulkResponse,
+    FollowResponse,
+    LocationResponse,
+)
+from cta.state import NetworkState, Sample
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import copy
+import json
+
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+
+
+def load(name):
+    with open(TEST_DATA_DIR / f"{name}_response.json") as f:
+        return json.load(f)
+
+
+def later(value, minutes):
+    return (datetime.fromisoformat(value) + timedelta(minutes=minutes)).isoformat()
+
+
+def moved(payload, minutes):
+    """Copy of the locations payload with the trains moved north later on."""
+    payload = copy.deepcopy(payload)
+    payload["ctatt"]["tmst"] = later(payload["ctatt"]["tmst"], minutes)
+    for route in payload["ctatt"]["route"]:
+        for train in route["train"]:
+            train["prdt"] = later(train["prdt"], minutes)
+            train["lat"] = str(float(train["lat"]) + 0.001 * minutes)
+
+    return payload
+
+
+@pytest.fixture
+def state():
+    return NetworkState()
+
+
+def test_ingest_arrivals(state):
+    n_records = state.ingest(ArrivalResponse(data=load("arrivals")))
+
+    assert n_records == 4
+    assert state.now == datetime(2022, 5, 15, 14, 46, 36)
+    assert [arrival.rn for arrival in state.arrivals_at(40590)] == [
+        "116",
+        "112",
+        "211",
+        "123",
+    ]
+    assert [arrival.rn for arrival in state.arrivals_at("40590", n=2)] == [
+        "116",
+        "112",
+    ]
+    assert [arrival.staId for arrival in state.predictions("116")] == [40590]
+    assert state.position("116") == Sample(
+        datetime(2022, 5, 15, 14, 46, 18), 41.8807, -87.62938, 358
+    )
+
+
+def test_arrivals_at_skips_passed_predictions(state):
+    state.ingest(ArrivalResponse(data=load("arrivals")))
+
+    now = datetime(2022, 5, 15, 15, 0)
+    assert [arrival.rn for arrival in state.arrivals_at(40590, now=now)] == [
+        "211",
+        "123",
+    ]
+    assert state.arrivals_at(41660) == []
+
+
+def test_prune_drops_passed_predictions(state):
+    state.ingest(ArrivalResponse(data=load("arrivals")))
+
+    state.prune(datetime(2022, 5, 15, 15, 0))
+
+    assert [arrival.rn for arrival in state.arrivals_at(40590, now=datetime.min)] == [
+        "211",
+        "123",
+    ]
+    assert state.predictions("116") == []
+
+
+def test_updated_prediction(state):
+    payload = load("arrivals")
+    state.ingest(ArrivalResponse(data=payload))
+
+    payload = copy.deepcopy(payload)
+    payload["ctatt"]["eta"][0]["arrT"] = "2022-05-15T15:02:00"
+    state.ingest(ArrivalResponse(data=payload))
+
+    assert [arrival.rn for arrival in state.arrivals_at(40590)] == [
+        "112",
+        "211",
+        "116",
+        "123",
+    ]
+
+    state.prune(datetime(2022, 5, 15, 14, 57))
+    assert len(state.arrivals_at(40590)) == 4
+
+
+def test_ingest_follow_replaces_predictions_of_the_train(state):
+    payload = load("follow")
+    state.ingest(FollowResponse(data=payload))
+
+    assert len(state.predictions("106")) == 6
+    assert state.position("106").lat == 41.9523
+
+    payload = copy.deepcopy(payload)
+    del payload["ctatt"]["eta"][0]
+    state.ingest(FollowResponse(data=payload))
+
+    assert len(state.predictions("106")) == 5
+    assert state.arrivals_at(40550) == []
+    assert [arrival.rn for arrival in state.arrivals_at(41330)] == ["106"]
+
+
+def test_ingest_follow_bulk(state):
+    follow = FollowResponse(data=load("follow"))
+    response = FollowBulkResponse({"106": follow, "107": follow})
+
+    assert state.ingest(response) == 12
+    assert len(state.predictions("107")) == 6
+    assert len(state.arrivals_at(41330)) == 2
+
+
+def test_ingest_locations_history(state):
+    payload = load("locations")
+    for minutes in range(0, 20, 2):
+        state.ingest(LocationResponse(data=moved(payload, minutes)))
+
+    assert len(state) == 10
+    assert "123" in state
+    assert state.trains["123"].nextStaNm is not None
+    assert len(state.history("123")) == 10
+
+    recent = state.history("123", minutes=5)
+    assert len(recent) == 3
+    assert recent[-1] == state.position("123")
+    assert recent[0].time < recent[-1].time
+
+
+def test_history_is_bounded(state):
+    state = NetworkState(history=3)
+    payload = load("locations")
+    for minutes in range(10):
+        state.ingest(LocationResponse(data=moved(payload, minutes)))
+
+    assert len(state.history("123")) == 3
+
+
+def test_same_snapshot_is_not_repeated(state):
+    response = LocationResponse(data=load("locations"))
+    state.ingest(response)
+    state.ingest(response)
+
+    assert len(state.history("123")) == 1
+
+
+def test_trains_not_seen_are_dropped(state):
+    state.ingest(LocationResponse(data=load("locations")))
+
+    state.prune(datetime(2022, 5, 15, 16, 0))
+
+    assert len(state) == 0
+    assert state.position("123") is None
+    assert state.history("123") == []
+
+
+def test_late_response_is_dropped_in_time():
+    state = NetworkState(max_age=timedelta(minutes=30))
+    payload = load("locations")
+    state.ingest(LocationResponse(data=moved(payload, 20)))
+
+    late = copy.deepcopy(payload)
+    late["ctatt"]["route"][0]["train"] = [
+        {**late["ctatt"]["route"][0]["train"][0], "rn": "999"}
+    ]
+    state.ingest(LocationResponse(data=late))
+    assert "999" in state
+
+    state.prune(datetime(2022, 5, 15, 15, 55))
+
+    assert "999" not in state
+    assert len(state) == 10
@@ -2,7 +2,18 @@ import pandas as pd
 
 import pytest
 
-from cta import Stations
+from cta import Route, Stations
+from cta.records import Arrival
+from cta.stations import (
+    InvalidStationsError,
+    StationNotFoundError,
+    StationsCache,
+    StationsUnavailableError,
+    WrongFileTypeError,
+    read_snapshot,
+)
+
+import requests
 
 from pathlib import Path
 
@@ -12,10 +23,199 @@ TEST_DATA_DIR = Path(__file__).parent / "data"
 
 @pytest.fixture
 def stations():
-    Stations.url = TEST_DATA_DIR / "stations.json"
-    return Stations()
+    return Stations(snapshot=TEST_DATA_DIR / "stations.json")
 
 
 def test_stations(stations):
     assert isinstance(stations.data, pd.DataFrame)
     assert len(stations.lookup("18th")) == 2
+
+
+@pytest.mark.parametrize(
+    "name, route, n_rows",
+    [
+        ("18TH", None, 2),
+        ("18th", Route.PINK, 2),
+        ("18th", Route.BLUE, 0),
+        ("8th", None, 2),
+        ("", Route.PINK, 2),
+    ],
+)
+def test_lookup(stations, name, route, n_rows):
+    df_stations = stations.lookup(name, route=route)
+
+    assert len(df_stations) == n_rows
+    assert df_stations.columns.tolist() == stations.columns
+
+
+def test_lookup_prefix(stations):
+    assert len(stations.lookup("18", prefix=True)) == 2
+    assert len(stations.lookup("8th", prefix=True)) == 0
+
+
+def test_lookup_many(stations):
+    df_stations = stations.lookup_many(["18th", "not a station", "18"])
+
+    assert df_stations["query"].tolist() == ["18th", "18th", "18", "18"]
+    assert df_stations.columns.tolist() == ["query", *stations.columns]
+
+
+@pytest.fixture
+def stations_content():
+    return (TEST_DATA_DIR / "stations.json").read_bytes()
+
+
+@pytest.fixture
+def portal(mocker, stations_content):
+    response = mocker.Mock(
+        status_code=200, content=stations_content, headers={"ETag": '"v1"'}
+    )
+
+    return mocker.patch("requests.get", return_value=response)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StationsCache(cache_dir=tmp_path, max_age=60)
+
+
+URL = "https://data.cityofchicago.org/resource/8pix-ypme.json"
+
+
+def test_cache_downloads_once(portal, cache):
+    for _ in range(3):
+        df_stations = cache.load(URL)
+
+    assert portal.call_count == 1
+    assert len(df_stations) == 3
+    assert cache.metadata()["etag"] == '"v1"'
+
+
+def test_cache_revalidates_with_etag(portal, cache):
+    cache.load(URL)
+    cache.max_age = 0
+    portal.return_value.status_code = 304
+
+    df_stations = cache.load(URL)
+
+    assert len(df_stations) == 3
+    assert portal.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+
+def test_cache_falls_back_to_stale_copy(portal, cache):
+    cache.load(URL)
+    cache.max_age = 0
+    portal.side_effect = requests.ConnectionError
+
+    with pytest.warns(UserWarning, match="stale"):
+        df_stations = cache.load(URL)
+
+    assert len(df_stations) == 3
+
+
+def test_cache_keeps_stale_copy_on_malformed_download(portal, cache):
+    cache.load(URL)
+    cache.max_age = 0
+    portal.return_value.content = b"<html>maintenance</html>"
+
+    with pytest.warns(UserWarning, match="stale"):
+        df_stations = cache.load(URL)
+
+    assert len(df_stations) == 3
+    assert cache.json_file.read_bytes() != b"<html>maintenance</html>"
+
+
+def test_cache_unavailable(portal, cache):
+    portal.side_effect = requests.ConnectionError
+
+    with pytest.raises(StationsUnavailableError):
+        cache.load(URL)
+
+
+def test_offline_never_downloads(portal, cache, stations_content):
+    with pytest.raises(StationsUnavailableError):
+        cache.load(URL, offline=True)
+
+    cache.write(stations_content)
+    cache.max_age = 0
+
+    assert len(cache.load(URL, offline=True)) == 3
+    portal.assert_not_called()
+
+
+def test_cache_rejects_malformed_content(cache):
+    with pytest.raises(InvalidStationsError):
+        cache.write(b"not json")
+
+    assert not cache.exists()
+
+
+def test_cache_arrow_copy(cache, stations_content):
+    pytest.importorskip("pyarrow")
+    cache.write(stations_content)
+
+    assert cache.arrow_file.exists()
+    pd.testing.assert_frame_equal(cache.read(), read_snapshot(cache.json_file))
+
+
+def test_stations_snapshot(tmp_path):
+    pytest.importorskip("pyarrow")
+    snapshot = tmp_path / "stations.feather"
+    pd.read_json(TEST_DATA_DIR / "stations.json").to_feather(snapshot)
+
+    stations = Stations(snapshot=snapshot)
+
+    assert len(stations.lookup("18th")) == 2
+
+
+def test_stations_snapshot_wrong_type(tmp_path):
+    with pytest.raises(WrongFileTypeError):
+        Stations(snapshot=tmp_path / "stations.csv")
+
+
+def test_id_maps(stations):
+    assert stations.station(40830)["stop_ids"] == [30162, 30161]
+    assert stations.station(40830)["routes"] == [Route.PINK]
+    assert stations.stop(30022)["station_name"] == "35th/Archer"
+    assert stations.stop_ids(40830, route=Route.PINK) == [30162, 30161]
+    assert stations.stop_ids(40830, route=Route.BLUE) == []
+
+    with pytest.raises(StationNotFoundError):
+        stations.station(1)
+
+
+@pytest.mark.parametrize(
+    "name, route, expected",
+    [
+        ("18th", None, [40830]),
+        ("18TH", Route.PINK, [40830]),
+        ("35th/archer", None, [40120]),
+    ],
+)
+def test_map_ids(stations, name, route, expected):
+    assert stations.map_ids(name, route=route) == expected
+
+
+@pytest.mark.parametrize("name, route", [("18", None), ("18th", Route.BLUE)])
+def test_map_ids_not_found(stations, name, route):
+    with pytest.raises(StationNotFoundError):
+        stations.map_ids(name, route=route)
+
+
+def test_enrich(stations):
+    df = pd.DataFrame({"rn": ["1", "2", "3"], "stpId": [30161, 30022, 1]})
+
+    df_enriched = stations.enrich(df)
+
+    assert df_enriched["station_name"].tolist()[:2] == ["18th", "35th/Archer"]
+    assert pd.isna(df_enriched["station_name"].iloc[2])
+    assert len(df_enriched) == 3
+
+
+def test_enrich_records(stations):
+    record = Arrival.from_dict({"rn": "1", "stpId": "30161"})
+
+    (enriched,) = stations.enrich_records([record])
+
+    assert enriched["rn"] == "1"
+    assert enriched["stop_name"] == "18th (Loop-bound)"
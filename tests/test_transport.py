@@ -0,0 +1,157 @@
+import pytest
+
+import requests
+
+from cta.client import AsyncCTAClient, CTAClient
+from cta.transport import (
+    AsyncReplayTransport,
+    RecordingTransport,
+    ReplayTransport,
+    RequestsTransport,
+    StubTransport,
+    TransportError,
+    TransportConnectionError,
+    TransportResponse,
+    TransportTimeoutError,
+)
+
+import asyncio
+
+
+def test_requests_transport_reuses_session(mocker):
+    transport = RequestsTransport(pool_maxsize=20, timeout=5)
+    get = mocker.patch.object(transport.session, "get")
+    get.return_value = mocker.Mock(status_code=200, content=b"{}", url="url")
+
+    for _ in range(3):
+        response = transport.get("http://example.com", params={"a": [1]})
+
+    assert get.call_count == 3
+    get.assert_called_with("http://example.com", params={"a": [1]}, timeout=5)
+    assert response.ok
+    assert response.json() == {}
+
+
+def test_requests_transport_pool_size():
+    with RequestsTransport(pool_maxsize=20) as transport:
+        adapter = transport.session.get_adapter("http://lapi.transitchicago.com")
+
+        assert adapter._pool_maxsize == 20
+
+
+@pytest.mark.parametrize(
+    "status_code, ok",
+    [
+        (200, True),
+        (304, True),
+        (404, False),
+        (503, False),
+    ],
+)
+def test_transport_response_ok(status_code, ok):
+    assert TransportResponse(status_code, b"").ok is ok
+
+
+def test_stub_transport_records_calls():
+    transport = StubTransport(lambda url, params: {"value": params["a"]})
+
+    response = transport.get("url", {"a": 1})
+
+    assert response.json() == {"value": 1}
+    assert transport.calls == [("url", {"a": 1})]
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (requests.ConnectTimeout, TransportTimeoutError),
+        (requests.ReadTimeout, TransportTimeoutError),
+        (requests.ConnectionError, TransportConnectionError),
+    ],
+)
+def test_requests_transport_typed_errors(mocker, error, expected):
+    transport = RequestsTransport()
+    mocker.patch.object(transport.session, "get", side_effect=error)
+
+    with pytest.raises(expected):
+        transport.get("http://example.com", params={})
+
+
+def payload_handler(url, params):
+    return {"ctatt": {"errCd": "0", "eta": [{"rn": str(params["mapid"][0])}]}}
+
+
+@pytest.fixture(params=["traffic.jsonl", "traffic.jsonl.gz"])
+def traffic_log(request, tmp_path):
+    path = tmp_path / request.param
+    transport = RecordingTransport(StubTransport(payload_handler), path)
+    with CTAClient(key="secret", transport=transport) as cta_client:
+        cta_client.arrivals(mapid=1)
+        cta_client.arrivals(mapid=2)
+
+    return path
+
+
+def test_recording_transport(traffic_log):
+    entries = ReplayTransport(traffic_log).entries
+
+    assert [entry["params"]["mapid"] for entry in entries] == [[1], [2]]
+    assert all("key" not in entry["params"] for entry in entries)
+    assert entries[0]["status_code"] == 200
+    assert entries[0]["latency"] >= 0
+
+
+def test_recording_transport_logs_errors(tmp_path):
+    def handler(url, params):
+        raise TransportTimeoutError("timed out")
+
+    path = tmp_path / "traffic.jsonl"
+    with RecordingTransport(StubTransport(handler), path) as transport:
+        with pytest.raises(TransportTimeoutError):
+            transport.get("url", {"mapid": [1]})
+
+    replay = ReplayTransport(path)
+    with pytest.raises(TransportTimeoutError):
+        replay.get("url", {"mapid": [1]})
+
+
+def test_replay_transport(traffic_log):
+    transport = ReplayTransport(traffic_log, speed=None)
+    cta_client = CTAClient(key="other", transport=transport)
+
+    records = cta_client.arrivals(mapid=2).to_records()
+
+    assert records[0].rn == "2"
+    assert transport.replayed == 1
+    with pytest.raises(TransportError):
+        cta_client.arrivals(mapid=2)
+
+
+def test_replay_transport_loop(traffic_log):
+    transport = ReplayTransport(traffic_log, speed=None, loop=True)
+    entry = transport.entries[0]
+
+    for _ in range(3):
+        response = transport.get(entry["url"], {**entry["params"], "key": "other"})
+        assert response.json()["ctatt"]["eta"] == [{"rn": "1"}]
+
+
+@pytest.mark.parametrize("speed, expected", [(1, 0.5), (10, 0.05), (None, 0)])
+def test_replay_transport_speed(traffic_log, speed, expected):
+    transport = ReplayTransport(traffic_log, speed=speed)
+
+    assert transport.delay({"latency": 0.5}) == pytest.approx(expected)
+
+
+def test_replay_transport_speed_must_be_positive(traffic_log):
+    with pytest.raises(ValueError):
+        ReplayTransport(traffic_log, speed=0)
+
+
+def test_async_replay_transport(traffic_log):
+    transport = AsyncReplayTransport(traffic_log, speed=None)
+    cta_client = AsyncCTAClient(key="other", transport=transport)
+
+    response = asyncio.run(cta_client.arrivals(mapid=1))
+
+    assert response.to_records()[0].rn == "1"